@@ -194,7 +194,10 @@ if __name__ == "__main__":
     # Set up logging as early as possible.
     from pyanaconda import anaconda_logging
     from pyanaconda import anaconda_loggers
-    anaconda_logging.init(write_to_journal=conf.target.is_hardware)
+    anaconda_logging.init(
+        write_to_journal=conf.target.is_hardware,
+        queued=conf.anaconda.queued_logging
+    )
     anaconda_logging.logger.setupVirtio(opts.virtiolog)
 
     # Load the remaining configuration after a logging is set up.
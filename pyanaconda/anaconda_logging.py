@@ -19,11 +19,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import atexit
+import copy
 import logging
-from logging.handlers import SysLogHandler, SocketHandler
+from logging.handlers import SysLogHandler, SocketHandler, QueueHandler
 from systemd.journal import JournalHandler
 import os
+import queue
 import sys
+import threading
 import warnings
 
 from pyanaconda.core import constants
@@ -47,6 +51,16 @@ ANACONDA_SYSLOG_IDENTIFIER = "anaconda"
 from threading import Lock
 program_log_lock = Lock()
 
+# The maximal number of log records written by the log writer at once.
+LOG_WRITER_BATCH_SIZE = 256
+
+# The maximal number of seconds to wait for the log writer.
+LOG_WRITER_TIMEOUT = 10
+
+# The types of log arguments that can't change before the log writer
+# formats them. Messages with other arguments are formatted at once.
+LOG_WRITER_IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
+
 
 class _AnacondaLogFixer(object):
     """ A mixin for logging.StreamHandler that does not lock during format.
@@ -123,6 +137,25 @@ class AnacondaFileHandler(_AnacondaLogFixer, logging.FileHandler):
     pass
 
 
+class AnacondaBatchFileHandler(AnacondaFileHandler):
+    """A file handler that is flushed after a batch of records.
+
+    The handler is used by the log writer that calls flush_batch.
+    """
+
+    def flush(self):
+        # The file is flushed by the log writer.
+        pass
+
+    def flush_batch(self):
+        """Flush the written batch of records."""
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
 class AnacondaStreamHandler(_AnacondaLogFixer, logging.StreamHandler):
     pass
 
@@ -147,12 +180,164 @@ class AnacondaPrefixFilter(logging.Filter):
         return True
 
 
+class AnacondaQueueHandler(QueueHandler):
+    """A handler that passes records to the log writer.
+
+    The records are only copied in the calling thread. They are
+    formatted and written by the given handlers in the thread of
+    the log writer.
+    """
+
+    def __init__(self, writer):
+        super().__init__(writer.queue)
+        self.target_handlers = []
+
+    def prepare(self, record):
+        """Prepare the record for the log writer.
+
+        Don't format the record like the QueueHandler class does.
+        The message is merged with its arguments only if some of
+        them could change before the log writer formats them.
+        """
+        record = copy.copy(record)
+
+        if not self._is_immutable(record.msg, record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        elif isinstance(record.args, dict):
+            # The dictionary itself can change.
+            record.args = dict(record.args)
+
+        return record
+
+    @staticmethod
+    def _is_immutable(msg, args):
+        """Are the message and its arguments immutable?"""
+        if not isinstance(msg, str):
+            return False
+
+        if not args:
+            return True
+
+        if isinstance(args, dict):
+            args = args.values()
+
+        return all(isinstance(arg, LOG_WRITER_IMMUTABLE_TYPES) for arg in args)
+
+    def enqueue(self, record):
+        self.queue.put((self.target_handlers, record))
+
+
+class AnacondaLogWriter(object):
+    """A background thread that writes log records in batches.
+
+    The records are taken from the queue, formatted and written by
+    their handlers and the files are flushed once per batch, so logging
+    doesn't block the threads that log.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self._thread = None
+
+    def start(self):
+        """Start the thread of the log writer."""
+        if self._thread:
+            return
+
+        self._thread = threading.Thread(
+            name="AnaLogWriterThread",
+            target=self._run,
+            daemon=True
+        )
+        self._thread.start()
+
+    def flush(self):
+        """Wait until all queued records are written."""
+        if not self._is_running() or threading.current_thread() is self._thread:
+            return
+
+        event = threading.Event()
+        self.queue.put(event)
+        event.wait(LOG_WRITER_TIMEOUT)
+
+    def stop(self):
+        """Write all queued records and stop the thread."""
+        if not self._is_running() or threading.current_thread() is self._thread:
+            return
+
+        self.queue.put(None)
+        self._thread.join(LOG_WRITER_TIMEOUT)
+
+    def _is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        """Write the queued records until the writer is stopped."""
+        while True:
+            batch = [self.queue.get()]
+
+            while len(batch) < LOG_WRITER_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not self._write_batch(batch):
+                return
+
+    def _write_batch(self, batch):
+        """Write the batch of records.
+
+        :return: False if the writer should stop, otherwise True
+        """
+        handlers = {}
+
+        for item in batch:
+            if item is None or isinstance(item, threading.Event):
+                self._flush_handlers(handlers.values())
+                handlers.clear()
+
+                if item is None:
+                    return False
+
+                item.set()
+                continue
+
+            target_handlers, record = item
+
+            for handler in target_handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+                    handlers[id(handler)] = handler
+
+        self._flush_handlers(handlers.values())
+        return True
+
+    @staticmethod
+    def _flush_handlers(handlers):
+        """Flush the handlers after a batch."""
+        for handler in handlers:
+            flush_batch = getattr(handler, "flush_batch", None)
+
+            if flush_batch:
+                flush_batch()
+
+
 class AnacondaLog(object):
     SYSLOG_CFGFILE = "/etc/rsyslog.conf"
 
-    def __init__(self, write_to_journal=False):
+    def __init__(self, write_to_journal=False, queued=False):
         self.remote_syslog = None
         self.write_to_journal = write_to_journal
+        self._writer = None
+        self._queue_handlers = {}
+
+        # Write the logs in a background thread.
+        if queued:
+            self._writer = AnacondaLogWriter()
+            self._writer.start()
+            atexit.register(self._writer.stop)
         # Rename the loglevels so they are the same as in syslog.
         logging.addLevelName(logging.CRITICAL, "CRT")
         logging.addLevelName(logging.ERROR, "ERR")
@@ -227,7 +412,9 @@ class AnacondaLog(object):
     # Add a simple handler - file or stream, depending on what we're given.
     def addFileHandler(self, dest, addToLogger, fmtStr=ENTRY_FORMAT, log_filter=None):
         try:
-            if isinstance(dest, str):
+            if isinstance(dest, str) and self._writer:
+                logfile_handler = AnacondaBatchFileHandler(dest)
+            elif isinstance(dest, str):
                 logfile_handler = AnacondaFileHandler(dest)
             else:
                 logfile_handler = AnacondaStreamHandler(dest)
@@ -236,10 +423,31 @@ class AnacondaLog(object):
                 logfile_handler.addFilter(log_filter)
 
             logfile_handler.setFormatter(logging.Formatter(fmtStr, DATE_FORMAT))
-            addToLogger.addHandler(logfile_handler)
+            self._add_handler(addToLogger, logfile_handler)
         except OSError:
             pass
 
+    def _add_handler(self, logr, handler):
+        """Add the handler to the logger.
+
+        In the queued mode, the handler is called by the log writer.
+        """
+        if not self._writer:
+            logr.addHandler(handler)
+            return
+
+        if logr not in self._queue_handlers:
+            queue_handler = AnacondaQueueHandler(self._writer)
+            logr.addHandler(queue_handler)
+            self._queue_handlers[logr] = queue_handler
+
+        self._queue_handlers[logr].target_handlers.append(handler)
+
+    def flush(self):
+        """Write all queued log records."""
+        if self._writer:
+            self._writer.flush()
+
     def forwardToJournal(self, logr, log_formatter=None, log_filter=None):
         """Forward everything that goes in the logger to the journal daemon."""
         # Don't add syslog tag if custom formatter is in use.
@@ -258,7 +466,7 @@ class AnacondaLog(object):
             journal_handler.addFilter(log_filter)
         if log_formatter:
             journal_handler.setFormatter(log_formatter)
-        logr.addHandler(journal_handler)
+        self._add_handler(logr, journal_handler)
 
     # pylint: disable=redefined-builtin
     def showwarning(self, message, category, filename, lineno,
@@ -275,7 +483,7 @@ class AnacondaLog(object):
         remotelog = AnacondaSocketHandler(host, port)
         remotelog.setFormatter(logging.Formatter(ENTRY_FORMAT, DATE_FORMAT))
         remotelog.setLevel(logging.DEBUG)
-        logging.getLogger().addHandler(remotelog)
+        self._add_handler(logging.getLogger(), remotelog)
 
     def restartSyslog(self):
         # Import here instead of at the module level to avoid an import loop
@@ -309,9 +517,19 @@ class AnacondaLog(object):
         self.restartSyslog()
 
 
-def init(write_to_journal=False):
+def init(write_to_journal=False, queued=False):
     global logger
-    logger = AnacondaLog(write_to_journal=write_to_journal)
+    logger = AnacondaLog(write_to_journal=write_to_journal, queued=queued)
+
+
+def flush():
+    """Write all queued log records.
+
+    Call this function before the log files are read, for example
+    by the exception handler.
+    """
+    if logger:
+        logger.flush()
 
 
 logger = None
@@ -445,6 +445,8 @@ def getArgumentParser(version_string, boot_cmdline=None):
     # Method of operation
     ap.add_argument("-d", "--debug", dest="debug", action="store_true",
                     default=False, help=help_parser.help_text("debug"))
+    ap.add_argument("--queued-logging", dest="queued_logging", action="store_true",
+                    default=False, help=help_parser.help_text("queued-logging"))
     ap.add_argument("--ks", dest="ksfile", action="store_const",
                     metavar="KICKSTART_URL", const="/run/install/ks.cfg",
                     help=help_parser.help_text("ks"))
@@ -469,6 +471,8 @@ def getArgumentParser(version_string, boot_cmdline=None):
                     action="append", help=help_parser.help_text("addrepo"))
     ap.add_argument("--noverifyssl", action="store_true", default=False,
                     help=help_parser.help_text("noverifyssl"))
+    ap.add_argument("--metadata-snapshot", dest="metadata_snapshot", default=None,
+                    metavar="PATH", help=help_parser.help_text("metadata-snapshot"))
     ap.add_argument("--liveinst", action="store_true", default=False,
                     help=help_parser.help_text("liveinst"))
 
@@ -48,6 +48,19 @@ class AnacondaSection(Section):
         """Run Anaconda in the debugging mode."""
         return self._get_option("debug", bool)
 
+    @property
+    def queued_logging(self):
+        """Write the logs of the installer in a background thread.
+
+        The log records are queued and a single thread writes them
+        in batches to the log files, the journal and remote hosts.
+
+        The logging is set up before the configuration files and
+        the profiles are loaded, so only the default configuration
+        and the inst.queued-logging boot option are used.
+        """
+        return self._get_option("queued_logging", bool)
+
     @property
     def activatable_modules(self):
         """List of Anaconda DBus modules that can be activated.
@@ -353,6 +366,9 @@ class AnacondaConfiguration(Configuration):
         if opts.debug:
             self.anaconda._set_option("debug", True)
 
+        if opts.queued_logging:
+            self.anaconda._set_option("queued_logging", True)
+
         # Set "nosave flags".
         if "can_copy_input_kickstart" in opts:
             self.target._set_option("can_copy_input_kickstart", opts.can_copy_input_kickstart)
@@ -403,6 +419,9 @@ class AnacondaConfiguration(Configuration):
         if opts.noverifyssl:
             self.payload._set_option("verify_ssl", not opts.noverifyssl)
 
+        if opts.metadata_snapshot:
+            self.payload._set_option("metadata_snapshot_path", opts.metadata_snapshot)
+
         self.validate()
 
 
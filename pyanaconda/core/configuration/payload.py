@@ -17,6 +17,8 @@
 #
 #  Author(s):  Vendula Poncova <vponcova@redhat.com>
 #
+from blivet.size import Size
+
 from pyanaconda.core.configuration.base import Section
 from pyanaconda.core.constants import SOURCE_TYPE_CLOSEST_MIRROR, SOURCE_TYPE_CDN
 
@@ -113,6 +115,77 @@ class PayloadSection(Section):
         """
         return self._get_option("verify_ssl", bool)
 
+    @property
+    def pipelined_installation(self):
+        """Download and install packages in a pipeline.
+
+        The software selection is split into batches ordered by dependencies.
+        Every batch is installed in a separate RPM transaction as soon as it
+        is downloaded, while the next batches are still being downloaded.
+        """
+        return self._get_option("pipelined_installation", bool)
+
+    @property
+    def package_cache_path(self):
+        """Path to a persistent cache of downloaded packages.
+
+        The packages are stored under their checksums, so the cache
+        can be shared by many installations, for example on a local
+        disk or a NFS mount. The cache is disabled if the path is empty.
+        """
+        return self._get_option("package_cache_path", str)
+
+    @property
+    def package_cache_size(self):
+        """Maximal size of the persistent cache of downloaded packages.
+
+        The least recently used packages are removed from the cache
+        if it exceeds this size.
+        """
+        return self._get_option("package_cache_size", Size)
+
+    @property
+    def metadata_snapshot_path(self):
+        """Path to a snapshot of repository metadata.
+
+        The metadata of a repository are loaded from the snapshot
+        if the repository provides the same repomd.xml file. If the
+        snapshot doesn't exist, it is created from the downloaded
+        metadata. The snapshot is disabled if the path is empty.
+        """
+        return self._get_option("metadata_snapshot_path", str)
+
+    @property
+    def native_image_installation(self):
+        """Install live images without rsync.
+
+        The content of a mounted image is copied to the system root by
+        a pool of threads in the installer. The data is cloned or copied
+        in the kernel if the file systems support it.
+        """
+        return self._get_option("native_image_installation", bool)
+
+    @property
+    def streamed_tarball_installation(self):
+        """Install remote live tarballs without downloading them first.
+
+        The tarball is extracted while it is downloaded, so it is never
+        stored on the disk. Tarballs with a checksum are always downloaded
+        first, because the checksum has to be verified before the tarball
+        is extracted to the target system.
+        """
+        return self._get_option("streamed_tarball_installation", bool)
+
+    @property
+    def precise_installation_size(self):
+        """Count installed files to calculate the installation size.
+
+        The file lists of all packages in the transaction have to be
+        loaded. Otherwise, the number of files is estimated from the
+        installed sizes of the packages.
+        """
+        return self._get_option("precise_installation_size", bool)
+
     @property
     def default_rpm_gpg_keys(self):
         """List of GPG keys to import into RPM database at end of installation."""
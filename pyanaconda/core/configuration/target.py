@@ -84,3 +84,22 @@ class TargetSection(Section):
     def can_save_installation_logs(self):
         """Should we save logs from the installation to the new system?"""
         return self._get_option("can_save_installation_logs", bool)
+
+    @property
+    def configuration_task_workers(self):
+        """Maximal number of configuration tasks that run at the same time.
+
+        Only the tasks that declare which paths on the target system
+        they read and write can run concurrently with other tasks.
+        """
+        return self._get_option("configuration_task_workers", int)
+
+    @property
+    def batch_user_provisioning(self):
+        """Should we create users, groups and SSH keys in a batch?
+
+        The user databases of the target system are loaded once,
+        modified in memory and written back instead of running
+        useradd and groupadd for every account.
+        """
+        return self._get_option("batch_user_provisioning", bool)
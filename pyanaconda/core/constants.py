@@ -108,7 +108,6 @@ THREAD_WAIT_FOR_CONNECTING_NM = "AnaWaitForConnectingNMThread"
 THREAD_PAYLOAD = "AnaPayloadThread"
 THREAD_PAYLOAD_RESTART = "AnaPayloadRestartThread"
 THREAD_EXCEPTION_HANDLING_TEST = "AnaExceptionHandlingTest"
-THREAD_LIVE_PROGRESS = "AnaLiveProgressThread"
 THREAD_SOFTWARE_WATCHER = "AnaSoftwareWatcher"
 THREAD_CHECK_SOFTWARE = "AnaCheckSoftwareThread"
 THREAD_SOURCE_WATCHER = "AnaSourceWatcher"
@@ -302,6 +301,12 @@ NTP_SERVER_QUERY = 2
 # Timeout for the NTP server check
 NTP_SERVER_TIMEOUT = 5
 
+# Maximal number of NTP server checks that run at the same time
+NTP_SERVER_CHECK_WORKERS = 4
+
+# Number of seconds for which the result of the NTP server check is valid
+NTP_SERVER_STATUS_TTL = 60
+
 # Storage checker constraints
 STORAGE_MIN_RAM = "min_ram"
 STORAGE_ROOT_DEVICE_TYPES = "root_device_types"
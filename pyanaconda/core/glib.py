@@ -30,12 +30,12 @@ from gi.repository.GLib import markup_escape_text, format_size_full, \
                                io_add_watch, child_watch_add, \
                                source_remove, \
                                spawn_close_pid, spawn_async_with_pipes, \
-                               MainLoop, MainContext, \
+                               MainLoop, MainContext, timeout_source_new, \
                                GError, Variant, VariantType, Bytes, \
                                IOCondition, IOChannel, SpawnFlags, \
                                MAXUINT
 
-__all__ = ["create_main_loop", "create_new_context",
+__all__ = ["create_main_loop", "create_new_context", "iterate_context",
            "markup_escape_text", "format_size_full",
            "timeout_add_seconds", "timeout_add", "idle_add",
            "io_add_watch", "child_watch_add",
@@ -59,3 +59,22 @@ def create_new_context():
 
     :returns: GLib.MainContext."""
     return MainContext.new()
+
+
+def iterate_context(context, timeout):
+    """Iterate the context once.
+
+    Wait until an event of the context is dispatched
+    or the timeout expires.
+
+    :param context: GLib.MainContext
+    :param timeout: a maximal number of seconds to wait
+    """
+    source = timeout_source_new(int(timeout * 1000))
+    source.set_callback(lambda *args: False)
+    source.attach(context)
+
+    try:
+        context.iteration(True)
+    finally:
+        source.destroy()
@@ -0,0 +1,248 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.  All rights reserved.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This module is imported before the logging and the configuration
+# are initialized, so it shouldn't import anything from Anaconda.
+#
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+__all__ = ["lazy_import", "langtable", "ImportProfiler", "start_import_profiler",
+           "stop_import_profiler"]
+
+# The number of the slowest imports in the import profile.
+IMPORT_PROFILE_LIMIT = 25
+
+# The profiler of the startup imports.
+_import_profiler = None
+
+
+# The lazily imported modules.
+_lazy_modules = {}
+_lazy_modules_lock = threading.Lock()
+
+
+class _LazyModule(object):
+    """A proxy of a module that is imported on the first use.
+
+    The module is imported under a lock, so threads that use it
+    for the first time at the same time never see a module that
+    is not fully initialized.
+    """
+
+    def __init__(self, name):
+        """Create a new proxy.
+
+        :param str name: a full name of the module
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Import the module if it's not imported yet.
+
+        :return: a module
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return "<lazy module '{}'>".format(self._name)
+
+
+def lazy_import(name):
+    """Import a module lazily.
+
+    The module is loaded on the first access to its attributes,
+    so heavy dependencies don't slow down the start of a process
+    that doesn't need them yet. It is safe to use the returned
+    module from multiple threads.
+
+    :param str name: a full name of the module
+    :return: a module or a proxy of the module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    with _lazy_modules_lock:
+        if name not in _lazy_modules:
+            if importlib.util.find_spec(name) is None:
+                raise ModuleNotFoundError("No module named '{}'".format(name), name=name)
+
+            _lazy_modules[name] = _LazyModule(name)
+
+        return _lazy_modules[name]
+
+
+def __getattr__(name):
+    """Get a module that is imported lazily.
+
+    The language tables are loaded on the first use. The module
+    is looked up only when it's imported from here, so the other
+    users of this module don't need it.
+
+    :param str name: a name of the attribute
+    :return: a module
+    """
+    if name == "langtable":
+        return lazy_import("langtable")
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+class ImportProfiler(object):
+    """Profiler of the import time.
+
+    The profiler measures the time of the first imports of modules
+    in the current thread. The cumulative time includes imports of
+    other modules, the self time doesn't.
+    """
+
+    def __init__(self):
+        """Create a new profiler."""
+        self._original_import = None
+        self._thread_id = None
+        self._stack = []
+        self._records = {}
+        self._start_time = None
+        self._total_time = 0
+        self._imports_time = 0
+
+    @property
+    def records(self):
+        """The measured imports.
+
+        :return: a dictionary of module names and tuples of the cumulative and self times
+        """
+        return dict(self._records)
+
+    @property
+    def total_time(self):
+        """The time between the start and the stop of the profiler."""
+        return self._total_time
+
+    def start(self):
+        """Start to measure the imports."""
+        if self._original_import:
+            return
+
+        self._thread_id = threading.get_ident()
+        self._original_import = builtins.__import__
+        self._start_time = time.perf_counter()
+        builtins.__import__ = self._import
+
+    def stop(self):
+        """Stop to measure the imports."""
+        if not self._original_import:
+            return
+
+        builtins.__import__ = self._original_import
+        self._original_import = None
+        self._total_time = time.perf_counter() - self._start_time
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """Import and measure a module."""
+        # pylint: disable=redefined-builtin
+        original_import = self._original_import
+
+        if not original_import:
+            return builtins.__import__(name, globals, locals, fromlist, level)
+
+        if threading.get_ident() != self._thread_id:
+            return original_import(name, globals, locals, fromlist, level)
+
+        module_name = name
+
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            module_name = importlib.util.resolve_name("." * level + name, package)
+
+        if module_name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0)
+        start = time.perf_counter()
+
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.perf_counter() - start
+            children = self._stack.pop()
+
+            if self._stack:
+                self._stack[-1] += duration
+            else:
+                self._imports_time += duration
+
+            self._records[module_name] = (duration, duration - children)
+
+    def get_report(self, limit=IMPORT_PROFILE_LIMIT):
+        """Get a report of the slowest imports.
+
+        :param int limit: a maximal number of reported imports
+        :return: a list of lines
+        """
+        lines = ["The imports took {:.3f} s of {:.3f} s.".format(
+            self._imports_time,
+            self._total_time
+        )]
+
+        records = sorted(self._records.items(), key=lambda item: -item[1][0])
+
+        for name, (duration, self_time) in records[:limit]:
+            lines.append("{:>8.3f} s {:>8.3f} s  {}".format(duration, self_time, name))
+
+        return lines
+
+
+def start_import_profiler():
+    """Start to profile the imports of the current process."""
+    global _import_profiler  # pylint: disable=global-statement
+
+    if _import_profiler:
+        return
+
+    _import_profiler = ImportProfiler()
+    _import_profiler.start()
+
+
+def stop_import_profiler(log):
+    """Stop to profile the imports and log the profile.
+
+    :param log: a logger
+    """
+    global _import_profiler  # pylint: disable=global-statement
+
+    if not _import_profiler:
+        return
+
+    _import_profiler.stop()
+
+    for line in _import_profiler.get_report():
+        log.debug(line)
+
+    _import_profiler = None
@@ -21,7 +21,8 @@ from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
 
 __all__ = ["start_service", "stop_service", "restart_service", "is_service_running",
-           "is_service_installed", "enable_service", "disable_service"]
+           "is_service_installed", "enable_service", "disable_service", "enable_services",
+           "disable_services"]
 
 
 def _run_systemctl(command, service, root):
@@ -33,7 +34,18 @@ def _run_systemctl(command, service, root):
     :return: exit status of the systemctl run
     """
 
-    args = [command, service]
+    return _run_systemctl_batch(command, [service], root)
+
+
+def _run_systemctl_batch(command, services, root):
+    """Runs 'systemctl command service1 service2 ...'
+
+    :param str command: command to run on the services
+    :param services: names of the services to work on
+    :param str root: root to run the command in
+    :return: exit status of the systemctl run
+    """
+    args = [command] + list(services)
     if root != "/":
         args += ["--root", root]
 
@@ -137,3 +149,78 @@ def disable_service(service, root="/"):
     # exist, because that's effectively disabled
     if ret != 0:
         log.warning("Disabling %s failed. It probably doesn't exist", service)
+
+
+def _get_unit_file_states(services, root="/"):
+    """Get the unit file states of systemd services.
+
+    Runs 'systemctl is-enabled service1 service2 ...'.
+
+    :param services: names of the services to check
+    :param str root: path to the sysroot, defaults to installation environment
+    :return: a dictionary of services and their states
+    """
+    args = ["is-enabled"] + list(services)
+
+    if root != "/":
+        args += ["--root", root]
+
+    output = execWithCapture("systemctl", args, filter_stderr=True)
+    states = output.splitlines()
+
+    if len(states) != len(services):
+        return {}
+
+    return dict(zip(services, states))
+
+
+def enable_services(services, root="/"):
+    """Enable systemd services in the sysroot.
+
+    Runs 'systemctl enable service1 service2 ...' once and verifies
+    that the services are enabled. If it fails, the services are
+    enabled one by one to find out which one has failed.
+
+    :param services: names of the services to enable
+    :param str root: path to the sysroot, defaults to installation environment
+    """
+    if not services:
+        return
+
+    ret = _run_systemctl_batch("enable", services, root)
+
+    if ret != 0:
+        log.debug("Enabling %s failed, enabling the services one by one.", services)
+
+        for service in services:
+            enable_service(service, root)
+
+        return
+
+    states = _get_unit_file_states(services, root)
+
+    for service in services:
+        if states.get(service) == "disabled":
+            raise ValueError("Error enabling service %s: %s" % (service, states[service]))
+
+
+def disable_services(services, root="/"):
+    """Disable systemd services in the sysroot.
+
+    Runs 'systemctl disable service1 service2 ...' once. If it fails,
+    the services are disabled one by one, so the existing services
+    are disabled even if some of the services don't exist.
+
+    :param services: names of the services to disable
+    :param str root: path to the sysroot, defaults to installation environment
+    """
+    if not services:
+        return
+
+    ret = _run_systemctl_batch("disable", services, root)
+
+    if ret != 0:
+        log.debug("Disabling %s failed, disabling the services one by one.", services)
+
+        for service in services:
+            disable_service(service, root)
@@ -0,0 +1,573 @@
+#
+# user_database.py:  Code for creating many user accounts at once
+#
+# Copyright (C) 2021 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from pyanaconda.core import util
+from pyanaconda.core.path import make_directories, open_with_perm
+from pyanaconda.core.regexes import GROUPLIST_FANCY_PARSE
+from pyanaconda.core.users import crypt_password
+
+from pyanaconda.anaconda_loggers import get_module_logger
+log = get_module_logger(__name__)
+
+__all__ = ["UserDatabase"]
+
+
+class _DatabaseFile(object):
+    """A file of the user database, like /etc/passwd.
+
+    The entries are lists of fields indexed by the first field.
+    """
+
+    def __init__(self, path, default_mode=0o644):
+        """Create a new database file.
+
+        :param str path: a path to the file
+        :param int default_mode: a mode of the file if it doesn't exist
+        """
+        self._path = path
+        self._default_mode = default_mode
+        self._exists = False
+        self._lines = []
+        self._index = {}
+        self._modified = False
+
+    @property
+    def path(self):
+        """The path to the file."""
+        return self._path
+
+    @property
+    def exists(self):
+        """Does the file exist?"""
+        return self._exists
+
+    @property
+    def modified(self):
+        """Was the file modified?"""
+        return self._modified
+
+    @property
+    def entries(self):
+        """A list of all entries."""
+        return list(self._index.values())
+
+    def load(self):
+        """Load the file."""
+        self._lines = []
+        self._index = {}
+        self._modified = False
+        self._exists = os.path.exists(self._path)
+
+        if not self._exists:
+            return
+
+        with open(self._path, "r") as f:
+            for line in f:
+                line = line.rstrip("\n")
+
+                # Keep comments, empty lines and NIS entries as they are.
+                if not line or line.startswith(("#", "+", "-")):
+                    self._lines.append(line)
+                    continue
+
+                fields = line.split(":")
+                self._lines.append(fields)
+                self._index.setdefault(fields[0], fields)
+
+    def get(self, name):
+        """Get an entry with the given name.
+
+        :param str name: a name of the entry
+        :return: a list of fields or None
+        """
+        return self._index.get(name)
+
+    def add(self, fields):
+        """Add a new entry.
+
+        :param fields: a list of fields
+        """
+        self._lines.append(fields)
+        self._index[fields[0]] = fields
+        self._modified = True
+
+    def touch(self):
+        """Mark the file as modified."""
+        self._modified = True
+
+    def write(self):
+        """Write the file atomically.
+
+        The original file is kept as a backup with the - suffix.
+        """
+        if not self._modified:
+            return
+
+        directory = os.path.dirname(self._path)
+        fd, path = tempfile.mkstemp(dir=directory, prefix=".anaconda")
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                for line in self._lines:
+                    if isinstance(line, list):
+                        line = ":".join(line)
+
+                    f.write(line + "\n")
+
+                f.flush()
+                os.fsync(f.fileno())
+
+            if self._exists:
+                stat = os.stat(self._path)
+                os.chmod(path, stat.st_mode & 0o7777)
+                os.chown(path, stat.st_uid, stat.st_gid)
+                shutil.copy2(self._path, self._path + "-")
+            else:
+                os.chmod(path, self._default_mode)
+
+            os.replace(path, self._path)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+        self._exists = True
+        self._modified = False
+
+
+class UserDatabase(object):
+    """The user and group databases of the target system.
+
+    The databases are loaded once, modified in memory and written
+    back atomically, so we don't have to run useradd, groupadd and
+    chage and parse /etc/passwd and /etc/group for every account.
+    It should behave the same way as the create_user and create_group
+    functions.
+
+    Home directories are created immediately. The databases are
+    written and the SELinux contexts restored by the write method.
+    """
+
+    def __init__(self, root):
+        """Create a new user database.
+
+        :param str root: a path to the root of the target system
+        """
+        self._root = root
+        self._passwd = _DatabaseFile(root + "/etc/passwd")
+        self._shadow = _DatabaseFile(root + "/etc/shadow", 0o000)
+        self._group = _DatabaseFile(root + "/etc/group")
+        self._gshadow = _DatabaseFile(root + "/etc/gshadow", 0o000)
+        self._subuid = _DatabaseFile(root + "/etc/subuid")
+        self._subgid = _DatabaseFile(root + "/etc/subgid")
+        self._uids = {}
+        self._gids = {}
+        self._login_defs = {}
+        self._useradd_defaults = {}
+        self._relabel_paths = []
+
+    @property
+    def _files(self):
+        """A list of the database files in the order of writing."""
+        return [
+            self._group, self._gshadow, self._passwd, self._shadow,
+            self._subuid, self._subgid
+        ]
+
+    def load(self):
+        """Load the databases and the defaults of the system."""
+        for db_file in self._files:
+            db_file.load()
+
+        self._uids = {int(e[2]): e for e in self._passwd.entries if e[2].isdigit()}
+        self._gids = {int(e[2]): e for e in self._group.entries if e[2].isdigit()}
+        self._login_defs = self._read_settings("/etc/login.defs", " \t")
+        self._useradd_defaults = self._read_settings("/etc/default/useradd", "=")
+        self._relabel_paths = []
+
+    def _read_settings(self, path, separators):
+        """Read a file with settings of shadow-utils.
+
+        :param str path: a path to the file in the target system
+        :param str separators: characters that separate keys and values
+        :return: a dictionary of settings
+        """
+        settings = {}
+
+        if not os.path.exists(self._root + path):
+            return settings
+
+        with open(self._root + path, "r") as f:
+            for line in f:
+                line = line.strip()
+
+                if not line or line.startswith("#"):
+                    continue
+
+                for separator in separators:
+                    if separator in line:
+                        key, value = line.split(separator, 1)
+                        settings[key.strip()] = value.strip().strip("\"")
+                        break
+
+        return settings
+
+    def _get_number(self, name, default):
+        """Get a number from login.defs.
+
+        :param str name: a name of the setting
+        :param int default: a default value
+        :return: an integer
+        """
+        try:
+            return int(self._login_defs.get(name, str(default)))
+        except ValueError:
+            return default
+
+    def _get_home_mode(self):
+        """Get a mode of new home directories."""
+        if "HOME_MODE" in self._login_defs:
+            return int(self._login_defs["HOME_MODE"], 8)
+
+        return 0o777 & ~int(self._login_defs.get("UMASK", "077"), 8)
+
+    def get_user(self, username):
+        """Get the passwd entry of the given user.
+
+        :param str username: a name of the user
+        :return: a list of fields or None
+        """
+        return self._passwd.get(username)
+
+    def get_group(self, group_name):
+        """Get the group entry of the given group.
+
+        :param str group_name: a name of the group
+        :return: a list of fields or None
+        """
+        return self._group.get(group_name)
+
+    def get_group_by_id(self, gid):
+        """Get the group entry of the given GID.
+
+        :param int gid: a group id
+        :return: a list of fields or None
+        """
+        return self._gids.get(int(gid))
+
+    @staticmethod
+    def _find_free_id(used_ids, minimum, maximum):
+        """Find the next available id like shadow-utils.
+
+        Use the id after the highest used one. If it is not
+        available, use the lowest available id in the range.
+
+        :param used_ids: a collection of used ids
+        :param int minimum: the lowest allowed id
+        :param int maximum: the highest allowed id
+        :return: an available id
+        """
+        used = [i for i in used_ids if minimum <= i <= maximum]
+        candidate = max(used) + 1 if used else minimum
+
+        if candidate <= maximum:
+            return candidate
+
+        for candidate in range(minimum, maximum + 1):
+            if candidate not in used_ids:
+                return candidate
+
+        raise ValueError("No free id between %s and %s" % (minimum, maximum))
+
+    def _find_free_uid(self):
+        return self._find_free_id(
+            self._uids,
+            self._get_number("UID_MIN", 1000),
+            self._get_number("UID_MAX", 60000)
+        )
+
+    def _find_free_gid(self):
+        return self._find_free_id(
+            self._gids,
+            self._get_number("GID_MIN", 1000),
+            self._get_number("GID_MAX", 60000)
+        )
+
+    def create_group(self, group_name, gid=None):
+        """Create a new group.
+
+        :param str group_name: a name of the group
+        :param int gid: The GID for the new group. If none is given, the next available one is used.
+        """
+        if self._group.get(group_name):
+            raise ValueError("Group %s already exists" % group_name)
+
+        if gid is not None and int(gid) in self._gids:
+            raise ValueError("GID %s already exists" % gid)
+
+        if gid is None:
+            gid = self._find_free_gid()
+
+        self._add_group(group_name, int(gid))
+
+    def _add_group(self, group_name, gid):
+        """Add a new group to the databases."""
+        entry = [group_name, "x" if self._gshadow.exists else "!", str(gid), ""]
+        self._group.add(entry)
+        self._gids[gid] = entry
+
+        if self._gshadow.exists:
+            self._gshadow.add([group_name, "!", "", ""])
+
+    def _add_group_member(self, group_name, username):
+        """Add a user to the member list of the group."""
+        for db_file, index in ((self._group, 3), (self._gshadow, 3)):
+            entry = db_file.get(group_name)
+
+            if not entry:
+                continue
+
+            members = [m for m in entry[index].split(",") if m]
+
+            if username not in members:
+                entry[index] = ",".join(members + [username])
+                db_file.touch()
+
+    def create_user(self, username, password=False, is_crypted=False, lock=False,
+                    homedir=None, uid=None, gid=None, groups=None, shell=None, gecos=""):
+        """Create a new user.
+
+        See the create_user function for the description of the arguments.
+        """
+        if not homedir:
+            homedir = "/home/" + username
+
+        if groups is None:
+            groups = []
+
+        if self._passwd.get(username):
+            raise ValueError("User %s already exists" % username)
+
+        if uid and int(uid) in self._uids:
+            raise ValueError("UID %s already exists" % uid)
+
+        # Split the groups argument into a list of (username, gid or None) tuples
+        # the gid, if any, is a string since that makes things simpler
+        group_gids = [GROUPLIST_FANCY_PARSE.match(group).groups() for group in groups]
+
+        # Create the primary group the same way as the create_user function.
+        if gid:
+            if not self.get_group_by_id(gid) \
+                    and not any(one_gid[1] == str(gid) for one_gid in group_gids):
+                self.create_group(username, gid=gid)
+        elif self._group.get(username):
+            raise ValueError("Group %s already exists" % username)
+
+        # If any requested groups do not exist, create them.
+        group_list = []
+        for group_name, group_gid in group_gids:
+            existing_group = self._group.get(group_name)
+
+            # Check for a bad GID request
+            if group_gid and existing_group and group_gid != existing_group[2]:
+                raise ValueError("Group %s already exists with GID %s" % (group_name, group_gid))
+
+            # Otherwise, create the group if it does not already exist
+            if not existing_group:
+                self.create_group(group_name, gid=group_gid)
+            group_list.append(group_name)
+
+        uid = int(uid) if uid else self._find_free_uid()
+
+        # Create a user group with the same id if possible.
+        if not gid:
+            gid = uid if uid not in self._gids else self._find_free_gid()
+            self._add_group(username, gid)
+
+        for group_name in group_list:
+            self._add_group_member(group_name, username)
+
+        if not shell:
+            shell = self._useradd_defaults.get("SHELL", "/bin/bash")
+
+        self._add_user(username, uid, int(gid), homedir, shell, gecos)
+        self._create_home(username, homedir, uid, int(gid))
+        self.set_user_password(username, password, is_crypted, lock)
+
+    def _add_user(self, username, uid, gid, homedir, shell, gecos):
+        """Add a new user to the databases."""
+        entry = [
+            username, "x" if self._shadow.exists else "!", str(uid), str(gid),
+            gecos, homedir, shell
+        ]
+        self._passwd.add(entry)
+        self._uids[uid] = entry
+
+        if self._shadow.exists:
+            # Reset sp_lstchg to an empty string. See set_user_password.
+            self._shadow.add([
+                username, "!", "",
+                str(self._get_number("PASS_MIN_DAYS", 0)),
+                str(self._get_number("PASS_MAX_DAYS", 99999)),
+                str(self._get_number("PASS_WARN_AGE", 7)),
+                "", "", ""
+            ])
+
+        self._add_subordinate_ids(self._subuid, username, "SUB_UID")
+        self._add_subordinate_ids(self._subgid, username, "SUB_GID")
+
+    def _add_subordinate_ids(self, db_file, username, prefix):
+        """Allocate subordinate ids for the user like useradd."""
+        count = self._get_number(prefix + "_COUNT", 65536)
+
+        if not db_file.exists or count <= 0 or db_file.get(username):
+            return
+
+        start = self._get_number(prefix + "_MIN", 100000)
+
+        for entry in db_file.entries:
+            if entry[1].isdigit() and entry[2].isdigit():
+                start = max(start, int(entry[1]) + int(entry[2]))
+
+        if start + count - 1 > self._get_number(prefix + "_MAX", 600100000):
+            log.warning("No free subordinate ids for %s.", username)
+            return
+
+        db_file.add([username, str(start), str(count)])
+
+    def _create_home(self, username, homedir, uid, gid):
+        """Create the home directory of the user."""
+        path = self._root + homedir
+
+        # If root + homedir came out to "/", such as if we're creating the sshpw user,
+        # parent_dir will be empty. Don't create that.
+        parent_dir = Path(path).resolve().parent
+
+        if parent_dir != Path("/"):
+            make_directories(str(parent_dir))
+
+        self._relabel_paths.append(path)
+
+        if os.path.exists(path):
+            log.info("Home directory for the user %s already existed, "
+                     "fixing the owner and SELinux context.", username)
+            self._reown_home(path, uid, gid)
+            return
+
+        skel = self._root + self._useradd_defaults.get("SKEL", "/etc/skel")
+
+        if os.path.isdir(skel):
+            shutil.copytree(skel, path, symlinks=True)
+        else:
+            os.mkdir(path)
+
+        os.chmod(path, self._get_home_mode())
+
+        for directory, dirs, files in os.walk(path):
+            os.lchown(directory, uid, gid)
+
+            for name in dirs + files:
+                os.lchown(os.path.join(directory, name), uid, gid)
+
+    @staticmethod
+    def _reown_home(path, uid, gid):
+        """Change the owner of the existing home directory."""
+        try:
+            stats = os.stat(path)
+            from_ids = "--from={}:{}".format(stats.st_uid, stats.st_gid)
+            to_ids = "{}:{}".format(uid, gid)
+            util.execWithRedirect("chown", ["--recursive", "--no-dereference",
+                                            from_ids, to_ids, path])
+        except OSError as e:
+            log.critical("Unable to change owner of existing home directory: %s", e.strerror)
+            raise
+
+    def set_user_password(self, username, password, is_crypted, lock):
+        """Set the password of the user.
+
+        See the set_user_password function for the description of the arguments.
+        """
+        if not (password or password == ""):
+            return
+
+        if password == "":
+            log.info("user account %s setup with no password", username)
+        elif not is_crypted:
+            password = crypt_password(password)
+
+        if lock:
+            password = "!" + password
+            log.info("user account %s locked", username)
+
+        if self._shadow.exists:
+            self._shadow.get(username)[1] = password
+            self._shadow.touch()
+        else:
+            self._passwd.get(username)[1] = password
+            self._passwd.touch()
+
+    def add_ssh_key(self, username, key):
+        """Add an SSH key of the user.
+
+        :param str username: a username
+        :param str key: the SSH key to set
+        """
+        pwent = self._passwd.get(username)
+        if not pwent:
+            raise ValueError("set_user_ssh_key: user %s does not exist" % username)
+
+        homedir = self._root + pwent[5]
+        if not os.path.exists(homedir):
+            log.error("set_user_ssh_key: home directory for %s does not exist", username)
+            raise ValueError("set_user_ssh_key: home directory for %s does not exist" % username)
+
+        uid = int(pwent[2])
+        gid = int(pwent[3])
+
+        sshdir = os.path.join(homedir, ".ssh")
+        if not os.path.isdir(sshdir):
+            os.mkdir(sshdir, 0o700)
+            os.chown(sshdir, uid, gid)
+
+        authfile = os.path.join(sshdir, "authorized_keys")
+        authfile_existed = os.path.exists(authfile)
+        with open_with_perm(authfile, "a", 0o600) as f:
+            f.write(key + "\n")
+
+        # Only change ownership if we created it
+        if not authfile_existed:
+            os.chown(authfile, uid, gid)
+            self._relabel_paths.append(sshdir)
+
+    def write(self):
+        """Write the modified databases and restore the SELinux contexts."""
+        for db_file in self._files:
+            if db_file.modified:
+                db_file.write()
+                self._relabel_paths.append(db_file.path)
+
+        if not self._relabel_paths:
+            return
+
+        util.execWithRedirect("restorecon", ["-r"] + self._relabel_paths)
+        self._relabel_paths = []
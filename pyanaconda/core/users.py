@@ -18,9 +18,11 @@
 #
 
 # Used for ascii_letters and digits constants
+import multiprocessing
 import os
 import os.path
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -70,6 +72,25 @@ def crypt_password(password):
     return cryptpw
 
 
+def crypt_passwords(passwords, max_workers=None):
+    """Crypt several passwords at the same time.
+
+    The crypt module doesn't release the global interpreter lock,
+    so the passwords are processed in a pool of processes.
+
+    :param passwords: a list of passwords to be crypted
+    :param max_workers: a maximal number of processes or None for the number of CPUs
+    :return: a list of crypted passwords in the same order
+    """
+    if len(passwords) < 2:
+        return [crypt_password(password) for password in passwords]
+
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers, mp_context=context) as executor:
+        return list(executor.map(crypt_password, passwords))
+
+
 def check_username(name):
     """Check if given username is valid.
 
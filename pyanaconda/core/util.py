@@ -18,6 +18,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import io
 import os
 import os.path
 import subprocess
@@ -30,11 +31,14 @@ import sys
 import types
 import inspect
 import functools
+import threading
 import importlib.util
 import importlib.machinery
 import warnings
 import blivet.arch
 
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from requests_file import FileAdapter
 from requests_ftp import FTPAdapter
@@ -327,6 +331,109 @@ def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_ou
     return (proc.returncode, output_string)
 
 
+def _stream_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_output=True,
+                    filter_stderr=False, callback=None, log_prefix=""):
+    """ Run an external program and process its output line by line
+
+        The output is logged, written to the file and passed to the callback
+        while the program is running, so it is never kept in memory. Carriage
+        returns end a line as well, so updates of progress meters are passed
+        to the callback as soon as they are printed.
+
+        NOTE/WARNING: UnicodeDecodeError will be raised if the output of the of the
+                      external command can't be decoded as UTF-8.
+
+        :param argv: The command to run and argument
+        :param root: The directory to chroot to before running command.
+        :param stdin: The file object to read stdin from.
+        :param stdout: Optional file object to write the output to.
+        :param env_prune: environment variable to remove before execution
+        :param log_output: whether to log the output of command
+        :param filter_stderr: whether to exclude the contents of stderr from the processed output
+        :param callback: Optional function called with every line of the output
+        :param log_prefix: a prefix of the logged lines
+        :return: The return code of the command
+    """
+    if filter_stderr:
+        stderr = subprocess.PIPE
+    else:
+        stderr = subprocess.STDOUT
+
+    try:
+        proc = startProgram(argv, root=root, stdin=stdin, stdout=subprocess.PIPE, stderr=stderr,
+                            env_prune=env_prune)
+    except OSError as e:
+        with program_log_lock:
+            program_log.error("Error running %s: %s", argv[0], e.strerror)
+        raise
+
+    # If stderr is filtered, log it separately
+    stderr_thread = None
+
+    if filter_stderr:
+        stderr_thread = threading.Thread(
+            target=_log_program_lines,
+            args=(proc.stderr, log_output, log_prefix),
+            daemon=True
+        )
+        stderr_thread.start()
+
+    # Translate carriage returns to new lines.
+    output = io.TextIOWrapper(proc.stdout, encoding="utf-8", newline=None)
+
+    try:
+        for line in output:
+            if line[-1] != "\n":
+                line = line + "\n"
+
+            if log_output:
+                with program_log_lock:
+                    program_log.info("%s%s", log_prefix, line.strip())
+
+            if stdout:
+                stdout.write(line)
+
+            if callback:
+                callback(line[:-1])
+
+    except BaseException:
+        # Don't leave the program running.
+        proc.kill()
+        raise
+
+    finally:
+        output.close()
+        proc.wait()
+
+        if stderr_thread:
+            stderr_thread.join()
+
+    with program_log_lock:
+        program_log.debug("%sReturn code: %d", log_prefix, proc.returncode)
+
+    return proc.returncode
+
+
+def _log_program_lines(pipe, log_output, log_prefix=""):
+    """ Log lines from the pipe of an external program
+
+        :param pipe: a binary pipe
+        :param log_output: whether to log the lines
+        :param log_prefix: a prefix of the logged lines
+    """
+    with pipe:
+        for raw_line in pipe:
+            if not log_output:
+                continue
+
+            # try to decode as utf-8 and replace all undecodable data by
+            # "safe" printable representations
+            line = raw_line.decode("utf-8", "replace")
+
+            with program_log_lock:
+                program_log.info("%s%s", log_prefix, line.strip())
+
+
 def execInSysroot(command, argv, stdin=None):
     """ Run an external program in the target root.
 
@@ -343,9 +450,13 @@ def execInSysroot(command, argv, stdin=None):
 
 
 def execWithRedirect(command, argv, stdin=None, stdout=None,
-                     root='/', env_prune=None, log_output=True, binary_output=False):
+                     root='/', env_prune=None, log_output=True, binary_output=False,
+                     callback=None):
     """ Run an external program and redirect the output to a file.
 
+        The output is processed line by line while the program is running,
+        unless it is treated as binary data.
+
         :param command: The command to run
         :param argv: The argument list
         :param stdin: The file object to read stdin from.
@@ -354,11 +465,52 @@ def execWithRedirect(command, argv, stdin=None, stdout=None,
         :param env_prune: environment variable to remove before execution
         :param log_output: whether to log the output of command
         :param binary_output: whether to treat the output of command as binary data
+        :param callback: Optional function called with every line of the output
         :return: The return code of the command
     """
     argv = [command] + argv
-    return _run_program(argv, stdin=stdin, stdout=stdout, root=root, env_prune=env_prune,
-                        log_output=log_output, binary_output=binary_output)[0]
+
+    if binary_output:
+        return _run_program(argv, stdin=stdin, stdout=stdout, root=root, env_prune=env_prune,
+                            log_output=log_output, binary_output=binary_output)[0]
+
+    return _stream_program(argv, stdin=stdin, stdout=stdout, root=root, env_prune=env_prune,
+                           log_output=log_output, callback=callback)
+
+
+def execConcurrently(commands, max_workers=None, root='/', env_prune=None, log_output=True):
+    """ Run several external programs at the same time.
+
+        The output of every program is logged line by line with
+        the name of the program and its index as a prefix.
+
+        :param commands: a list of tuples with a command and its argument list
+        :param max_workers: a maximal number of running programs or None for the number of CPUs
+        :param root: The directory to chroot to before running commands.
+        :param env_prune: environment variable to remove before execution
+        :param log_output: whether to log the output of commands
+        :return: a list of return codes in the order of the commands
+        :raise: OSError if a program cannot be started
+    """
+    if not commands:
+        return []
+
+    workers = min(max_workers or os.cpu_count() or 1, len(commands))
+
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(
+                _stream_program,
+                [command] + argv,
+                root=root,
+                env_prune=env_prune,
+                log_output=log_output,
+                log_prefix="{}[{}]: ".format(os.path.basename(command), index)
+            )
+            for index, (command, argv) in enumerate(commands)
+        ]
+
+    return [future.result() for future in futures]
 
 
 def execWithCapture(command, argv, stdin=None, root='/', log_output=True, filter_stderr=False):
@@ -33,6 +33,7 @@ from meh import Config
 from meh.dump import ReverseExceptionDump
 from meh.handler import ExceptionHandler
 
+from pyanaconda import anaconda_logging
 from pyanaconda import kickstart
 from pyanaconda.core import util
 from pyanaconda import product
@@ -141,6 +142,9 @@ class AnacondaExceptionHandler(ExceptionHandler):
         exception_lines = traceback.format_exception(*dump_info.exc_info)
         log.critical("\n".join(exception_lines))
 
+        # Make sure that the logs are written before they are collected.
+        anaconda_logging.flush()
+
         ty = dump_info.exc_info.type
         value = dump_info.exc_info.value
 
@@ -17,6 +17,8 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import os
+
 from pyanaconda.core.dbus import DBus
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import PAYLOAD_LIVE_TYPES, PAYLOAD_TYPE_DNF
@@ -28,14 +30,14 @@ from pyanaconda.modules.common.util import is_module_available
 from pyanaconda.progress import progress_message, progress_step, progress_complete, progress_init
 from pyanaconda import flags
 from pyanaconda.core import util
-from pyanaconda.core.path import open_with_perm
+from pyanaconda.core.path import open_with_perm, join_paths, make_directories
 from pyanaconda import timezone
 from pyanaconda import network
 from pyanaconda.core.i18n import N_
 from pyanaconda.threading import threadMgr
 from pyanaconda.kickstart import runPostScripts, runPreInstallScripts
 from pyanaconda.kexec import setup_kexec
-from pyanaconda.installation_tasks import Task, TaskQueue, DBusTask
+from pyanaconda.installation_tasks import Task, TaskQueue, DBusTask, write_telemetry_report
 from pyanaconda.progress import progressQ
 from pykickstart.constants import SNAPSHOT_WHEN_POST_INSTALL
 
@@ -44,6 +46,9 @@ log = get_module_logger(__name__)
 
 __all__ = ["run_installation"]
 
+# The directory with the telemetry report on the installed system.
+TELEMETRY_REPORT_DIR = "/var/log/anaconda"
+
 
 def _writeKS(ksdata):
     path = conf.target.system_root + "/root/anaconda-ks.cfg"
@@ -73,7 +78,12 @@ def _prepare_configuration(payload, ksdata):
         configuration_queue.append(subscription_config)
 
     # schedule the execute methods of ksdata that require an installed system to be present
-    os_config = TaskQueue("Installed system configuration", N_("Configuring installed system"))
+    # - tasks with declared paths on the target system can run concurrently
+    os_config = TaskQueue(
+        "Installed system configuration",
+        N_("Configuring installed system"),
+        max_workers=conf.target.configuration_task_workers
+    )
 
     # add installation tasks for the Security DBus module
     if is_module_available(SECURITY):
@@ -86,25 +96,46 @@ def _prepare_configuration(payload, ksdata):
     if is_module_available(TIMEZONE):
         timezone_proxy = TIMEZONE.get_proxy()
         timezone_dbus_tasks = timezone_proxy.InstallWithTasks()
-        os_config.append_dbus_tasks(TIMEZONE, timezone_dbus_tasks)
+        os_config.append_dbus_tasks(
+            TIMEZONE, timezone_dbus_tasks,
+            reads=["/usr/share/zoneinfo", "/usr/lib/systemd"],
+            writes=["/etc/localtime", "/etc/adjtime", "/etc/chrony.conf", "/etc/systemd/system"]
+        )
 
     # add installation tasks for the Services DBus module
     if is_module_available(SERVICES):
         services_proxy = SERVICES.get_proxy()
         services_dbus_tasks = services_proxy.InstallWithTasks()
-        os_config.append_dbus_tasks(SERVICES, services_dbus_tasks)
+        os_config.append_dbus_tasks(
+            SERVICES, services_dbus_tasks,
+            reads=["/usr/lib/systemd"],
+            writes=[
+                "/etc/systemd/system",
+                "/etc/reconfigSys",
+                "/etc/sysconfig/anaconda",
+                "/etc/sysconfig/desktop"
+            ]
+        )
 
     # add installation tasks for the Localization DBus module
     if is_module_available(LOCALIZATION):
         localization_proxy = LOCALIZATION.get_proxy()
         localization_dbus_tasks = localization_proxy.InstallWithTasks()
-        os_config.append_dbus_tasks(LOCALIZATION, localization_dbus_tasks)
+        os_config.append_dbus_tasks(
+            LOCALIZATION, localization_dbus_tasks,
+            reads=[],
+            writes=["/etc/locale.conf", "/etc/vconsole.conf", "/etc/X11/xorg.conf.d"]
+        )
 
     # add the Firewall configuration task
     if conf.target.can_configure_network:
         firewall_proxy = NETWORK.get_proxy(FIREWALL)
         firewall_dbus_task = firewall_proxy.InstallWithTask()
-        os_config.append_dbus_tasks(NETWORK, [firewall_dbus_task])
+        os_config.append_dbus_tasks(
+            NETWORK, [firewall_dbus_task],
+            reads=["/usr/lib/firewalld", "/usr/lib/systemd"],
+            writes=["/etc/firewalld", "/etc/systemd/system"]
+        )
 
     configuration_queue.append(os_config)
 
@@ -363,6 +394,29 @@ def _prepare_installation(payload, ksdata):
     return installation_queue
 
 
+def _write_telemetry_report(queue):
+    """Write the telemetry report of the installation queue.
+
+    The report is written to /tmp and to the installed system.
+    """
+    directories = ["/tmp"]
+
+    if conf.target.can_save_installation_logs:
+        directories.append(join_paths(conf.target.system_root, TELEMETRY_REPORT_DIR))
+
+    for directory in directories:
+        try:
+            make_directories(directory)
+            paths = write_telemetry_report(queue, directory)
+
+            for path in paths:
+                os.chmod(path, 0o600)
+        except OSError as e:
+            log.warning("Failed to write the telemetry report to %s: %s", directory, e)
+        else:
+            log.debug("The telemetry report is written to %s.", ", ".join(paths))
+
+
 def run_installation(payload, ksdata):
     """Run the complete installation."""
     # before building the install task queue make
@@ -399,6 +453,9 @@ def run_installation(payload, ksdata):
     # start the task queue
     queue.start()
 
+    # save the telemetry of the tasks
+    _write_telemetry_report(queue)
+
     # done
     progress_complete()
     # this message is automatically detected by QE tools, do not change it lightly
@@ -17,6 +17,12 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import csv
+import json
+import os
+import resource
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from threading import RLock
 
 from dasbus.error import DBusError
@@ -31,6 +37,138 @@ from pyanaconda.progress import progress_message
 
 log = get_module_logger(__name__)
 
+# The columns of the telemetry report.
+#
+# Only the wall time and the progress steps belong to the task. Most
+# of the tasks run in the DBus modules, so the other columns describe
+# what happened meanwhile in the installer process and in the system.
+TELEMETRY_FIELDS = [
+    "type",
+    "name",
+    "parent",
+    "depth",
+    "wall_time",
+    "progress_steps",
+    "installer_cpu_time",
+    "installer_peak_rss",
+    "children_peak_rss",
+    "system_read_bytes",
+    "system_write_bytes",
+]
+
+
+class TaskTelemetry(object):
+    """Telemetry of a task or a task queue.
+
+    The wall time and the number of progress steps are measured for
+    the task. The other values are not measured for the task, because
+    most of the tasks run in the DBus modules:
+
+    installer_cpu_time is the CPU time used by the installer process
+    and its children while the task was running, installer_peak_rss
+    is the peak resident set size of the installer process and
+    children_peak_rss is the largest peak resident set size of its
+    finished children when the task finished. The peaks are high-water
+    marks since the start of the installer, so a task has raised the
+    peak if the value is larger than the value of the previous task.
+    system_read_bytes and system_write_bytes are the bytes read from
+    and written to block devices by the whole system while the task
+    was running.
+    """
+
+    def __init__(self):
+        self._start_usage = None
+        self._stop_usage = None
+        self._peak_rss = {}
+        self.progress_steps = 0
+
+    def start(self):
+        """Start to measure the task."""
+        self._start_usage = self._get_usage()
+
+    def stop(self):
+        """Stop to measure the task."""
+        self._stop_usage = self._get_usage()
+        self._peak_rss = self._get_peak_rss()
+
+    @property
+    def measured(self):
+        """Has the task been measured?"""
+        return bool(self._start_usage and self._stop_usage)
+
+    def get_data(self):
+        """Get the measured data.
+
+        The times are in seconds, the sizes are in bytes.
+
+        :return: a dictionary of measured values
+        """
+        if not self.measured:
+            return {}
+
+        data = {
+            name: self._stop_usage[name] - self._start_usage[name]
+            for name in self._start_usage
+        }
+
+        data.update(self._peak_rss)
+        data["progress_steps"] = self.progress_steps
+        return data
+
+    @classmethod
+    def _get_usage(cls):
+        """Get the current usage of resources."""
+        times = os.times()
+        read_bytes, write_bytes = cls._get_system_io_bytes()
+
+        return {
+            "wall_time": time.monotonic(),
+            "installer_cpu_time": sum((
+                times.user,
+                times.system,
+                times.children_user,
+                times.children_system
+            )),
+            "system_read_bytes": read_bytes,
+            "system_write_bytes": write_bytes,
+        }
+
+    @staticmethod
+    def _get_peak_rss():
+        """Get the peak RSS of the installer process and its children.
+
+        :return: a dictionary of peak sizes in bytes
+        """
+        # The maximal resident set sizes are in kilobytes.
+        return {
+            "installer_peak_rss": 1024 * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "children_peak_rss": 1024 * resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+
+    @staticmethod
+    def _get_system_io_bytes():
+        """Get the numbers of bytes read from and written to block devices.
+
+        The counters are system-wide.
+
+        :return: a tuple of read and written bytes
+        """
+        counters = {}
+
+        try:
+            with open("/proc/vmstat") as f:
+                for line in f:
+                    name, _sep, value = line.partition(" ")
+                    counters[name] = value
+        except OSError:
+            return 0, 0
+
+        # The counters are in kilobytes.
+        return (
+            1024 * int(counters.get("pgpgin", 0)),
+            1024 * int(counters.get("pgpgout", 0))
+        )
+
 
 class BaseTask(object):
     """A base class for Task and TaskQueue.
@@ -46,6 +184,7 @@ class BaseTask(object):
         self._parent = None
         self._start_timestamp = None
         self._done_timestamp = None
+        self._telemetry = TaskTelemetry()
         self.started = Signal()
         self.completed = Signal()
 
@@ -80,6 +219,14 @@ class BaseTask(object):
         else:
             return None
 
+    @property
+    def telemetry(self):
+        """Telemetry of the task.
+
+        :return: an instance of TaskTelemetry
+        """
+        return self._telemetry
+
     @property
     @synchronized
     def done(self):
@@ -90,6 +237,21 @@ class BaseTask(object):
         """
         return self._done
 
+    def _get_telemetry_record(self, item_type, depth):
+        """Get a telemetry record of the task.
+
+        :param item_type: a type of the task
+        :param depth: a depth of the task in the queue
+        :return: a dictionary with TELEMETRY_FIELDS
+        """
+        record = dict.fromkeys(TELEMETRY_FIELDS)
+        record.update(self._telemetry.get_data())
+        record["type"] = item_type
+        record["name"] = self.name
+        record["parent"] = self._parent.name if self._parent else None
+        record["depth"] = depth
+        return record
+
     @property
     def summary(self):
         """A description of the task - to be overridden by subclasses."""
@@ -104,11 +266,19 @@ class TaskQueue(BaseTask):
     """TaskQueue represents a queue of TaskQueues or Tasks.
 
     TaskQueues and Tasks can be mixed in a single TaskQueue.
+
+    If the queue has more than one worker, tasks that declare the paths
+    they read and write can run concurrently. The tasks are started in
+    the order of the queue once the previous tasks with conflicting paths
+    are finished, and they are completed in the same order, so the
+    signals are always emitted in the order of the queue. Other items
+    wait for all previous tasks and block all following items.
     """
 
-    def __init__(self, name, status_message=None):
+    def __init__(self, name, status_message=None, max_workers=1):
         super().__init__(name=name)
         self._status_message = status_message
+        self._max_workers = max_workers
         self._current_task_number = None
         self._current_queue_number = None
         # the list backing this TaskQueue instance
@@ -294,6 +464,8 @@ class TaskQueue(BaseTask):
             else:
                 do_start = True
                 self._running = True
+                self._start_timestamp = time.time()
+                self._telemetry.start()
                 if self.task_count:
                     # only set the initial task number if we have some tasks
                     self._current_task_number = 0
@@ -306,14 +478,23 @@ class TaskQueue(BaseTask):
             self.started.emit(self)
             if len(self) == 0:
                 log.warning("The task group %s is empty.", self.name)
-            for item in self:
-                # start the item (TaskQueue/Task)
-                item.start()
+            if self._max_workers > 1:
+                # start the items concurrently
+                self._start_concurrently()
+            else:
+                for item in self:
+                    # start the item (TaskQueue/Task)
+                    item.start()
 
             # we are done, set the task queue state accordingly
             with self._lock:
+                self._telemetry.progress_steps = sum(
+                    item.telemetry.progress_steps for item in self
+                )
+                self._telemetry.stop()
                 self._running = False
                 self._done = True
+                self._done_timestamp = time.time()
                 # also set the current task variables accordingly as we no longer process a task
                 self._current_task_number = None
                 self._current_queue_number = None
@@ -321,6 +502,68 @@ class TaskQueue(BaseTask):
             # trigger the "completed" signals
             self.completed.emit(self)
 
+    def _start_concurrently(self):
+        """Start the items of the queue in a pool of threads."""
+        # running tasks and their futures in the order of the queue
+        pending = deque()
+
+        with ThreadPoolExecutor(self._max_workers) as executor:
+            for item in self:
+                if not isinstance(item, Task) or not item.has_declared_paths:
+                    # wait for all running tasks
+                    self._complete_tasks(pending, [f for _, f in pending])
+                    item.start()
+                    continue
+
+                # wait for the running tasks with conflicting paths
+                self._complete_tasks(pending, [f for t, f in pending if t.conflicts_with(item)])
+
+                if item.begin():
+                    pending.append((item, executor.submit(item.run)))
+
+            # wait for the remaining tasks
+            self._complete_tasks(pending, [f for _, f in pending])
+
+    @staticmethod
+    def _complete_tasks(pending, futures):
+        """Wait for the given futures and complete finished tasks.
+
+        The tasks are completed in the order of the queue. If a task
+        has failed, all running tasks are waited for and the error
+        of the first failed task is raised.
+
+        :param pending: a deque of running tasks and their futures
+        :param futures: a list of futures to wait for
+        """
+        wait(futures)
+
+        if any(f.done() and f.exception() for _, f in pending):
+            wait([f for _, f in pending])
+
+        while pending and pending[0][1].done():
+            task, future = pending.popleft()
+            future.result()
+            task.finish()
+
+    @synchronized
+    def get_telemetry_records(self, depth=0):
+        """Get telemetry records of this queue and all nested items.
+
+        The records are ordered as the items in the queue.
+
+        :param depth: a depth of this queue
+        :return: a list of dictionaries with TELEMETRY_FIELDS
+        """
+        records = [self._get_telemetry_record("queue", depth)]
+
+        for item in self:
+            if isinstance(item, TaskQueue):
+                records.extend(item.get_telemetry_records(depth + 1))
+            else:
+                records.append(item._get_telemetry_record("task", depth + 1))
+
+        return records
+
     # implement the Python list "interface" and make sure parent is always
     # set to a correct value
     @synchronized
@@ -329,15 +572,17 @@ class TaskQueue(BaseTask):
         self._list.append(item)
 
     @synchronized
-    def append_dbus_tasks(self, service_id, dbus_tasks):
+    def append_dbus_tasks(self, service_id, dbus_tasks, reads=None, writes=None):
         """Append DBus Tasks from a module to the TaskQueue.
 
         :param service_id: DBusServiceIdentifier instance corresponding to an Anaconda DBus module
         :param dbus_tasks: list of DBus Tasks paths
+        :param reads: paths on the target system read by the tasks or None
+        :param writes: paths on the target system written by the tasks or None
         """
         for dbus_task_path in dbus_tasks:
             task_proxy = service_id.get_proxy(dbus_task_path)
-            self.append(DBusTask(task_proxy))
+            self.append(DBusTask(task_proxy, reads=reads, writes=writes))
 
     @synchronized
     def insert(self, index, item):
@@ -400,10 +645,17 @@ class Task(BaseTask):
     only once, further attempts will result in an error being logged.
     If you want to run a task multiple times, just schedule multiple
     Task instances to run.
+
+    The task can declare paths on the target system that it reads and
+    writes with the reads and writes options. A task with declared paths
+    can run concurrently with other tasks that don't write its paths.
     """
 
-    def __init__(self, name, task=None, task_args=None, task_kwargs=None):
+    def __init__(self, name, task=None, task_args=None, task_kwargs=None,
+                 reads=None, writes=None):
         super().__init__(name=name)
+        self._reads = None if reads is None else [os.path.normpath(p) for p in reads]
+        self._writes = None if writes is None else [os.path.normpath(p) for p in writes]
         self._task = task
         if task_args is None:
             task_args = []
@@ -445,6 +697,27 @@ class Task(BaseTask):
         self.started.connect(self._parent.task_started.emit)
         self.completed.connect(self._parent.task_completed.emit)
 
+    @property
+    def has_declared_paths(self):
+        """Has the task declared the paths it reads and writes?"""
+        return self._reads is not None or self._writes is not None
+
+    def conflicts_with(self, task):
+        """Does this task conflict with the given task?
+
+        Tasks conflict if one of them writes a path that the other one
+        reads or writes. A path conflicts also with its parents and
+        children. Tasks without declared paths conflict with all tasks.
+
+        :param task: another task
+        :return: True or False
+        """
+        if not self.has_declared_paths or not task.has_declared_paths:
+            return True
+
+        return _paths_overlap(self._writes or [], (task._reads or []) + (task._writes or [])) \
+            or _paths_overlap(task._writes or [], self._reads or [])
+
     def run_task(self):
         """Runs the task (callable) assigned to this Task class instance.
 
@@ -474,7 +747,15 @@ class Task(BaseTask):
         once it is running or completed. Attempt's to do so will only result in an
         error being logged.
         """
-        do_start = False
+        if self.begin():
+            self.run()
+            self.finish()
+
+    def begin(self):
+        """Mark the task as started.
+
+        :return: True if the task can run, otherwise False
+        """
         with self._lock:
             # the task can only be started once
             if self.running or self.done:
@@ -484,34 +765,48 @@ class Task(BaseTask):
                 else:
                     # attempt to start a task that an already finished task
                     log.error("Can't start task %s - already done.")
-            else:
-                do_start = True
-                self._running = True
-                self._start_timestamp = time.time()
+                return False
 
-        if do_start:
-            # trigger the "started" signal
-            self.started.emit(self)
-            # run the task
-            self.run_task()
-            # trigger the "completed" signal
-            self.completed.emit(self)
-            # the task should be done, set the task state accordingly
-            with self._lock:
-                self._running = False
-                self._done = True
-                self._done_timestamp = time.time()
+            self._running = True
+            self._start_timestamp = time.time()
+            self._telemetry.start()
+
+        # trigger the "started" signal
+        self.started.emit(self)
+        return True
+
+    def run(self):
+        """Run the started task.
+
+        This method can be called in a different thread.
+        """
+        self.run_task()
+
+        with self._lock:
+            self._telemetry.stop()
+            self._done_timestamp = time.time()
+
+    def finish(self):
+        """Mark the task as completed."""
+        # trigger the "completed" signal
+        self.completed.emit(self)
+        # the task should be done, set the task state accordingly
+        with self._lock:
+            self._running = False
+            self._done = True
 
 
 class DBusTask(Task):
     """Wrapper for a DBus installation task."""
 
-    def __init__(self, task_proxy):
+    def __init__(self, task_proxy, reads=None, writes=None):
         """Create a new task.
 
         :param task_proxy: a DBus proxy of the task
+        :param reads: paths on the target system read by the task or None
+        :param writes: paths on the target system written by the task or None
         """
-        super().__init__(task_proxy.Name)
+        super().__init__(task_proxy.Name, reads=reads, writes=writes)
         self._task_proxy = task_proxy
         self._msg_counter = 0
 
@@ -543,6 +838,48 @@ class DBusTask(Task):
         FIXME: Drop the ugly workaround for the first message.
         """
         self._msg_counter += 1
+        self._telemetry.progress_steps = self._msg_counter
 
         if self._msg_counter > 1:
             progress_message(msg)
+
+
+def _paths_overlap(paths, other_paths):
+    """Does any of the paths overlap with any of the other paths?
+
+    Paths overlap if they are the same or one of them contains the other.
+
+    :param paths: a list of normalized paths
+    :param other_paths: a list of normalized paths
+    :return: True or False
+    """
+    for path in paths:
+        for other_path in other_paths:
+            if os.path.commonpath([path, other_path]) in (path, other_path):
+                return True
+
+    return False
+
+
+def write_telemetry_report(queue, directory):
+    """Write the telemetry report of the task queue.
+
+    The report is written in the JSON and CSV formats.
+
+    :param queue: a finished task queue
+    :param directory: a path to the directory for the report
+    :return: a list of paths to the written files
+    """
+    records = queue.get_telemetry_records()
+    json_path = os.path.join(directory, "task-telemetry.json")
+    csv_path = os.path.join(directory, "task-telemetry.csv")
+
+    with open(json_path, "w") as f:
+        json.dump({"queue": queue.name, "tasks": records}, f, indent=4)
+
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TELEMETRY_FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+    return [json_path, csv_path]
@@ -21,7 +21,6 @@ This module provides functions for dealing with keyboard layouts/keymaps in Anac
 """
 
 import re
-import langtable
 
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda import localization
@@ -29,6 +28,7 @@ from pyanaconda.core.constants import DEFAULT_KEYBOARD
 from pyanaconda.core.util import execWithRedirect
 from pyanaconda.modules.common.task import sync_run_task
 from pyanaconda.modules.common.constants.services import LOCALIZATION
+from pyanaconda.core.imports import langtable
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
@@ -20,7 +20,6 @@
 import gettext
 import os
 import re
-import langtable
 import locale as locale_mod
 import glob
 from collections import namedtuple
@@ -30,6 +29,7 @@ from pyanaconda.core import constants
 from pyanaconda.core.util import setenv, execWithRedirect
 from pyanaconda.core.string import upcase_first_letter
 from pyanaconda.modules.common.constants.services import BOSS
+from pyanaconda.core.imports import langtable
 
 from pyanaconda.anaconda_loggers import get_module_logger
 log = get_module_logger(__name__)
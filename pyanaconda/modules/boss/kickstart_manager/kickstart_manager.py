@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+from concurrent.futures import ThreadPoolExecutor
+
 from pykickstart.errors import KickstartError
 from pykickstart.version import makeVersion
 
@@ -35,6 +37,7 @@ class KickstartManager(object):
 
     def __init__(self):
         self._module_observers = []
+        self._kickstart_ownership = {}
 
     @property
     def module_observers(self):
@@ -45,6 +48,13 @@ class KickstartManager(object):
         """Set module observers for kickstart distribution."""
         self._module_observers = list(observers)
 
+        # Forget the kickstart ownership of modules that are gone.
+        names = {observer.service_name for observer in self._module_observers}
+        self._kickstart_ownership = {
+            name: ownership for name, ownership in self._kickstart_ownership.items()
+            if name in names
+        }
+
     def read_kickstart_file(self, path):
         """Read the specified kickstart file.
 
@@ -72,23 +82,68 @@ class KickstartManager(object):
         parser = SplitKickstartParser(handler, valid_sections=VALID_SECTIONS_ANACONDA)
         return parser.split(path)
 
-    def _distribute_to_modules(self, elements):
-        """Distribute split kickstart to modules synchronously.
+    def _get_kickstart_ownership(self, observer):
+        """Get the kickstart commands, sections and addons of a module.
 
-        :returns: list of (Line number, Message) errors reported by modules when
-                  distributing kickstart
-        :rtype: list of kickstart reports
+        The ownership doesn't change, so it is cached after the first lookup.
+
+        :param observer: a module observer
+        :return: a tuple of commands, sections and addons
         """
-        reports = []
+        name = observer.service_name
+
+        if name not in self._kickstart_ownership:
+            self._kickstart_ownership[name] = (
+                observer.proxy.KickstartCommands,
+                observer.proxy.KickstartSections,
+                observer.proxy.KickstartAddons
+            )
+
+        return self._kickstart_ownership[name]
+
+    def _get_available_observers(self):
+        """Get observers of the available modules."""
+        observers = []
 
         for observer in self._module_observers:
             if not observer.is_service_available:
                 log.warning("Module %s not available!", observer.service_name)
                 continue
 
-            commands = observer.proxy.KickstartCommands
-            sections = observer.proxy.KickstartSections
-            addons = observer.proxy.KickstartAddons
+            observers.append(observer)
+
+        return observers
+
+    @staticmethod
+    def _call_concurrently(calls):
+        """Call the given D-Bus methods at the same time.
+
+        :param calls: a list of functions and their arguments
+        :return: a list of results in the order of the calls
+        """
+        if not calls:
+            return []
+
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            futures = [executor.submit(method, *args) for method, *args in calls]
+
+        return [future.result() for future in futures]
+
+    def _distribute_to_modules(self, elements):
+        """Distribute split kickstart to modules concurrently.
+
+        The kickstart is split in the order of the modules, but the
+        modules read their parts at the same time. The reports are
+        merged in the order of the modules.
+
+        :returns: list of (Line number, Message) errors reported by modules when
+                  distributing kickstart
+        :rtype: list of kickstart reports
+        """
+        jobs = []
+
+        for observer in self._get_available_observers():
+            commands, sections, addons = self._get_kickstart_ownership(observer)
 
             log.info("%s handles commands %s sections %s addons %s.",
                      observer.service_name, commands, sections, addons)
@@ -107,14 +162,22 @@ class KickstartManager(object):
                 log.info("There are no kickstart data for %s.", observer.service_name)
                 continue
 
-            module_report = KickstartReport.from_structure(
-                observer.proxy.ReadKickstart(module_kickstart)
-            )
-
             line_references = elements.get_references_from_elements(
                 module_elements
             )
 
+            jobs.append((observer, module_kickstart, line_references))
+
+        results = self._call_concurrently([
+            (observer.proxy.ReadKickstart, module_kickstart)
+            for observer, module_kickstart, _ in jobs
+        ])
+
+        reports = []
+
+        for (observer, _, line_references), result in zip(jobs, results):
+            module_report = KickstartReport.from_structure(result)
+
             for message in module_report.get_messages():
                 line_number, file_name = line_references[message.line_number]
                 message.line_number = line_number
@@ -140,22 +203,20 @@ class KickstartManager(object):
         return self._merge_module_kickstarts(kickstarts)
 
     def _generate_from_modules(self):
-        """Generate kickstart from modules.
+        """Generate kickstart from modules concurrently.
 
         :return: a map of module names and kickstart strings
         """
-        result = {}
-
-        for observer in self._module_observers:
-            if not observer.is_service_available:
-                log.warning("Module %s not available!", observer.service_name)
-                continue
+        observers = self._get_available_observers()
 
-            module_name = observer.service_name
-            module_kickstart = observer.proxy.GenerateKickstart()
-            result[module_name] = module_kickstart
+        kickstarts = self._call_concurrently([
+            (observer.proxy.GenerateKickstart, ) for observer in observers
+        ])
 
-        return result
+        return {
+            observer.service_name: module_kickstart
+            for observer, module_kickstart in zip(observers, kickstarts)
+        }
 
     def _merge_module_kickstarts(self, module_kickstarts):
         """Merge kickstart from modules
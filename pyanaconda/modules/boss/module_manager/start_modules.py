@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
+import time
+
 from functools import partial
 from queue import SimpleQueue
 
@@ -36,6 +38,8 @@ class StartModulesTask(Task):
     The timeout service_start_timeout from the Anaconda bus
     configuration file is applied by default when the DBus
     method StartServiceByName is called.
+
+    The time it took to start every module is measured and logged.
     """
 
     def __init__(self, message_bus, activatable, forbidden, optional):
@@ -55,8 +59,18 @@ class StartModulesTask(Task):
         self._forbidden = forbidden
         self._optional = optional
         self._module_observers = []
+        self._start_times = {}
+        self._module_timings = {}
         self._callbacks = SimpleQueue()
 
+    @property
+    def module_timings(self):
+        """Time it took to start the modules.
+
+        :return: a dictionary of service names and times in seconds
+        """
+        return dict(self._module_timings)
+
     @property
     def name(self):
         """Name of the task."""
@@ -76,6 +90,9 @@ class StartModulesTask(Task):
         # Process the callbacks of the asynchronous calls.
         self._process_callbacks(self._module_observers)
 
+        # Report the timings.
+        self._log_module_timings()
+
         return self._module_observers
 
     @staticmethod
@@ -127,6 +144,7 @@ class StartModulesTask(Task):
 
         for observer in module_observers:
             log.debug("Starting %s.", observer)
+            self._start_times[observer.service_name] = time.monotonic()
 
             dbus.StartServiceByName(
                 observer.service_name,
@@ -164,10 +182,21 @@ class StartModulesTask(Task):
 
     def _service_available_handler(self, observer):
         """Handler for the service_available signal."""
-        log.debug("%s is available.", observer)
         observer.proxy.Ping()
+
+        duration = time.monotonic() - self._start_times[observer.service_name]
+        self._module_timings[observer.service_name] = duration
+
+        log.debug("%s is available after %.2f s.", observer, duration)
         return True
 
+    def _log_module_timings(self):
+        """Log the time it took to start the modules."""
+        timings = sorted(self._module_timings.items(), key=lambda item: -item[1])
+
+        for service_name, duration in timings:
+            log.debug("%s has started in %.2f s.", service_name, duration)
+
     def _process_callbacks(self, module_observers):
         """Process callbacks of the asynchronous calls.
 
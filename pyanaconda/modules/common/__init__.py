@@ -26,9 +26,14 @@ def init(log_filename=None, log_stream=sys.stderr):
     This method should be imported and called from __main__.py of every
     Anaconda DBus module before any other import.
 
+    The imports are profiled until the service is published.
+
     :param log_filename: a file for logging or None
     :param log_stream: a stream for logging or None
     """
+    from pyanaconda.core.imports import start_import_profiler
+    start_import_profiler()
+
     import faulthandler
     faulthandler.enable()
 
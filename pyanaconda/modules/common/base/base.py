@@ -26,6 +26,7 @@ from locale import setlocale, LC_ALL
 from pykickstart.errors import KickstartError, KickstartParseWarning
 
 from pyanaconda.core.glib import create_main_loop
+from pyanaconda.core.imports import stop_import_profiler
 from pyanaconda.core.timer import Timer
 from pyanaconda.core.util import setenv
 from pyanaconda.core.dbus import DBus
@@ -86,6 +87,7 @@ class Service(BaseModule):
 
     def run(self):
         """Run the loop."""
+        stop_import_profiler(log)
         log.debug("Publish the service.")
         self.publish()
         log.debug("Start the loop.")
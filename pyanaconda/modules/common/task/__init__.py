@@ -15,33 +15,158 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
-from time import sleep
+import time
 
+from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.core.glib import create_new_context, iterate_context
 from pyanaconda.modules.common.task.task_interface import TaskInterface
 from pyanaconda.modules.common.task.task import Task, AbstractTask
 
+log = get_module_logger(__name__)
+
 __all__ = ["sync_run_task", "async_run_task", "AbstractTask", "Task", "TaskInterface"]
 
+# The interval of checks of a remote task in seconds.
+TASK_POLLING_INTERVAL = 1
+
 
-def sync_run_task(task_proxy, callback=None):
+def sync_run_task(task_proxy, callback=None, timeout=None):
     """Run a remote task synchronously.
 
-    The given callback will be called every iteration.
+    Wait for the Stopped signal of the task. The signals of the task
+    are received in a private main context of the current thread,
+    so they are dispatched here no matter which thread runs the task
+    and whether there is a running main loop. The state of the task
+    is checked every second in case the signal wasn't delivered.
+
+    The given callback will be called every iteration and
+    every time the task reports a progress.
+
+    If the task doesn't finish in the given time or the waiting
+    is interrupted, the task is cancelled.
 
     :param task_proxy: a proxy of the remote task
     :param callback: a callback
+    :param timeout: a number of seconds or None
     :raise: a remote error
+    :raise TimeoutError: if the task has timed out
     """
-    task_proxy.Start()
+    # The signals are subscribed in the thread-default context.
+    context = create_new_context()
+    context.push_thread_default()
+
+    try:
+        signals = _TaskSignals(context)
+        task_proxy.Stopped.connect(signals.on_stopped)
+        task_proxy.ProgressChanged.connect(signals.on_progress_changed)
+
+        try:
+            task_proxy.Start()
+            _wait_for_task(task_proxy, signals, callback, timeout)
+        finally:
+            task_proxy.Stopped.disconnect(signals.on_stopped)
+            task_proxy.ProgressChanged.disconnect(signals.on_progress_changed)
+    finally:
+        context.pop_thread_default()
 
-    while task_proxy.IsRunning:
+    task_proxy.Finish()
 
-        if callback:
-            callback(task_proxy)
 
-        sleep(1)
+class _TaskSignals(object):
+    """Signals of a remote task received by sync_run_task."""
 
-    task_proxy.Finish()
+    def __init__(self, context):
+        """Create a new receiver of the signals.
+
+        :param context: a main context of the signals
+        """
+        self._context = context
+        self._received = False
+        self.stopped = False
+        self.progress_changed = False
+
+    def on_stopped(self):
+        """Handle the Stopped signal."""
+        self.stopped = True
+        self._received = True
+
+    def on_progress_changed(self, step, message):
+        """Handle the ProgressChanged signal."""
+        self.progress_changed = True
+        self._received = True
+
+    def wait(self, interval):
+        """Wait for a signal.
+
+        Dispatch the events of the private main context.
+
+        :param interval: a maximal number of seconds to wait
+        """
+        if not self._received:
+            iterate_context(self._context, max(interval, 0))
+
+        self._received = False
+
+
+def _wait_for_task(task_proxy, signals, callback, timeout):
+    """Wait for the remote task to stop.
+
+    :param task_proxy: a proxy of the remote task
+    :param signals: signals of the remote task
+    :param callback: a callback or None
+    :param timeout: a number of seconds or None
+    :raise TimeoutError: if the task has timed out
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    next_check = time.monotonic() + TASK_POLLING_INTERVAL
+
+    try:
+        while not signals.stopped:
+            now = time.monotonic()
+
+            if deadline is not None and now >= deadline:
+                raise TimeoutError(
+                    "The task {} has timed out after {} s.".format(task_proxy.Name, timeout)
+                )
+
+            if now >= next_check:
+                next_check = now + TASK_POLLING_INTERVAL
+
+                if not task_proxy.IsRunning:
+                    break
+
+                signals.progress_changed = True
+
+            if signals.progress_changed:
+                signals.progress_changed = False
+
+                if callback:
+                    callback(task_proxy)
+
+            interval = next_check - now
+
+            if deadline is not None:
+                interval = min(interval, deadline - now)
+
+            signals.wait(interval)
+
+    except BaseException:
+        # Don't leave the task running.
+        _cancel_task(task_proxy, signals)
+        raise
+
+
+def _cancel_task(task_proxy, signals):
+    """Cancel the remote task and wait for it to stop.
+
+    :param task_proxy: a proxy of the remote task
+    :param signals: signals of the remote task
+    """
+    log.debug("Cancelling the task %s.", task_proxy.Name)
+    task_proxy.Cancel()
+
+    while not signals.stopped and task_proxy.IsRunning:
+        signals.wait(TASK_POLLING_INTERVAL)
 
 
 def async_run_task(task_proxy, callback):
@@ -17,10 +17,9 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
-import langtable
-
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.dbus import DBus
+from pyanaconda.core.imports import langtable
 from pyanaconda.core.signal import Signal
 from pyanaconda.modules.common.base import KickstartService
 from pyanaconda.modules.common.constants.services import LOCALIZATION
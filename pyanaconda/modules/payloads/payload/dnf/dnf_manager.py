@@ -17,11 +17,14 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import copy
 import multiprocessing
 import shutil
 import threading
 import traceback
 
+from concurrent.futures import ThreadPoolExecutor
+
 import dnf
 import dnf.exceptions
 import dnf.module.module_base
@@ -45,11 +48,14 @@ from pyanaconda.modules.common.structures.comps import CompsEnvironmentData, Com
 from pyanaconda.modules.common.structures.packages import PackagesConfigurationData
 from pyanaconda.modules.common.structures.payload import RepoConfigurationData
 from pyanaconda.modules.payloads.constants import DNF_REPO_DIRS
-from pyanaconda.modules.payloads.payload.dnf.download_progress import DownloadProgress
+from pyanaconda.modules.payloads.payload.dnf.download_progress import DownloadProgress, \
+    process_download_progress
+from pyanaconda.modules.payloads.payload.dnf.metadata_snapshot import MetadataSnapshot
+from pyanaconda.modules.payloads.payload.dnf.package_cache import PackageCache
 from pyanaconda.modules.payloads.payload.dnf.transaction_progress import TransactionProgress, \
     process_transaction_progress
 from pyanaconda.modules.payloads.payload.dnf.utils import get_product_release_version, \
-    calculate_hash
+    calculate_hash, order_by_dependencies, split_into_batches, get_repomd_urls_from_mirrors
 
 log = get_module_logger(__name__)
 
@@ -67,6 +73,33 @@ DNF_PLUGINCONF_DIR = '/tmp/dnf.pluginconf'
 #
 DNF_EXTRA_SIZE_PER_FILE = Size("6 KiB")
 
+# The number of files of a package is estimated from its installed size,
+# because the file lists of packages are slow to load. The estimate adds
+# only DNF_EXTRA_SIZE_PER_FILE per file to the required space, so it
+# should rather exceed the real number of files than fall short of it.
+#
+#   24 KiB = the assumed average size of an installed file
+#   16     = the assumed number of directories, documentation and
+#            license files that even the smallest packages install
+#
+# The assumptions can be checked against the average size of a file and
+# the average number of files of a package on an installed system with:
+#
+#   rpm -qa --qf '%{SIZE}[ x]\n' | awk '{ s += $1; f += NF - 1 }
+#       END { print s / f / 1024 " KiB", f / NR " files" }'
+#
+# Set the precise_installation_size option to count the files instead.
+#
+DNF_ESTIMATED_FILE_SIZE = Size("24 KiB")
+DNF_ESTIMATED_FILES_PER_PACKAGE = 16
+
+# The maximal number of repositories that are loaded at the same time.
+DNF_REPOSITORY_WORKERS = 4
+
+# The maximal number of batches of the pipelined installation.
+# Every batch is installed in a separate RPM transaction.
+DNF_PIPELINE_BATCHES = 4
+
 
 class DNFManagerError(Exception):
     """General error for the DNF manager."""
@@ -102,6 +135,16 @@ class DNFManager(object):
         self._ignore_broken_packages = False
         self._download_location = None
         self._md_hashes = {}
+        self._installation_size = None
+        self._comps_index = None
+        self._resolution = None
+        self._enabled_modules = []
+        self._disabled_modules = []
+
+    @property
+    def _module_specs(self):
+        """A tuple of module specs to enable and to disable."""
+        return list(self._enabled_modules), list(self._disabled_modules)
 
     @property
     def _base(self):
@@ -159,6 +202,11 @@ class DNFManager(object):
         self._ignore_broken_packages = False
         self._download_location = None
         self._md_hashes = {}
+        self._installation_size = None
+        self._comps_index = None
+        self._resolution = None
+        self._enabled_modules = []
+        self._disabled_modules = []
         log.debug("The DNF base has been reset.")
 
     def configure_base(self, data: PackagesConfigurationData):
@@ -168,6 +216,7 @@ class DNFManager(object):
         """
         base = self._base
         base.conf.multilib_policy = data.multilib_policy
+        self._resolution = None
 
         if data.timeout != DNF_DEFAULT_TIMEOUT:
             base.conf.timeout = data.timeout
@@ -257,12 +306,55 @@ class DNFManager(object):
         :return: an instance of CompsEnvironmentData
         :raise: UnknownCompsEnvironmentError if no environment is found
         """
-        env = self._get_environment(environment_name)
+        environments, _groups = self._get_comps_index()
+        environment_id = environment_name
 
-        if not env:
+        if environment_id not in environments:
+            environment_id = self.resolve_environment(environment_name)
+
+        if environment_id not in environments:
             raise UnknownCompsEnvironmentError(environment_name)
 
-        return self._get_environment_data(env)
+        return copy.deepcopy(environments[environment_id])
+
+    def get_all_environments_data(self):
+        """Get the data of all environments.
+
+        :return: a list of CompsEnvironmentData instances
+        """
+        environments, _groups = self._get_comps_index()
+        return copy.deepcopy(list(environments.values()))
+
+    def _get_comps_index(self):
+        """Get the index of the comps data.
+
+        The index is created once for the loaded comps and
+        the repomd.xml hashes of the enabled repositories.
+        The data in the index are shared, so the public getters
+        return copies of them.
+
+        :return: a tuple of dictionaries of environment and group data
+        """
+        comps = self._base.comps
+        key = (comps, tuple(sorted(self._md_hashes.items())))
+
+        if self._comps_index and self._comps_index[0] == key:
+            return self._comps_index[1]
+
+        groups = {
+            grp.id: self._get_group_data(grp)
+            for grp in comps.groups
+        }
+        environments = {
+            env.id: self._get_environment_data(env)
+            for env in comps.environments
+        }
+
+        log.debug("Created an index of %d environments and %d groups.",
+                  len(environments), len(groups))
+
+        self._comps_index = (key, (environments, groups))
+        return environments, groups
 
     def _get_environment_data(self, env) -> CompsEnvironmentData:
         """Get the environment data.
@@ -327,12 +419,39 @@ class DNFManager(object):
         :return: an instance of CompsGroupData
         :raise: UnknownCompsGroupError if no group is found
         """
-        grp = self._get_group(group_name)
+        _environments, groups = self._get_comps_index()
+        return self._find_group_data(groups, group_name)
 
-        if not grp:
+    def get_groups_data(self, group_names):
+        """Get the data of the specified groups.
+
+        The index of the comps data is looked up only once
+        for all groups.
+
+        :param group_names: a list of identifiers of groups
+        :return: a list of CompsGroupData instances
+        :raise: UnknownCompsGroupError if a group is not found
+        """
+        _environments, groups = self._get_comps_index()
+        return [self._find_group_data(groups, name) for name in group_names]
+
+    def _find_group_data(self, groups, group_name):
+        """Find the data of the specified group in the index.
+
+        :param groups: a dictionary of group ids and group data
+        :param group_name: an identifier of a group
+        :return: a copy of CompsGroupData from the index
+        :raise: UnknownCompsGroupError if no group is found
+        """
+        group_id = group_name
+
+        if group_id not in groups:
+            group_id = self.resolve_group(group_name)
+
+        if group_id not in groups:
             raise UnknownCompsGroupError(group_name)
 
-        return self._get_group_data(grp)
+        return copy.deepcopy(groups[group_id])
 
     @staticmethod
     def _get_group_data(grp) -> CompsGroupData:
@@ -428,20 +547,30 @@ class DNFManager(object):
     def get_installation_size(self):
         """Calculate the installation size.
 
+        The number of installed files is estimated from the sizes
+        of the packages, unless the precise installation size is
+        required by the configuration. The result is cached for
+        the resolved transaction.
+
         :return: a space required by packages
         :rtype: an instance of Size
         """
-        packages_size = Size(0)
-        files_number = 0
+        transaction = self._base.transaction
 
-        if self._base.transaction is None:
+        if transaction is None:
             return Size("3000 MiB")
 
-        for tsi in self._base.transaction:
+        if self._installation_size and self._installation_size[0] is transaction:
+            return self._installation_size[1]
+
+        packages_size = Size(0)
+        files_number = 0
+
+        for tsi in transaction:
             # Space taken by all files installed by the packages.
             packages_size += tsi.pkg.installsize
             # Number of files installed on the system.
-            files_number += len(tsi.pkg.files)
+            files_number += self._get_files_number(tsi.pkg)
 
         # Calculate the files size depending on number of files.
         files_size = Size(files_number * DNF_EXTRA_SIZE_PER_FILE)
@@ -450,8 +579,24 @@ class DNFManager(object):
         total_space = Size((packages_size + files_size) * 1.1)
 
         log.info("Total install size: %s", total_space)
+        self._installation_size = (transaction, total_space)
         return total_space
 
+    @staticmethod
+    def _get_files_number(package):
+        """Get the number of files installed by the package.
+
+        The precise number requires the file lists of packages,
+        which are slow to load, so it is estimated by default.
+
+        :param package: a DNF package
+        :return: a number of files
+        """
+        if conf.payload.precise_installation_size:
+            return len(package.files)
+
+        return DNF_ESTIMATED_FILES_PER_PACKAGE + package.installsize // int(DNF_ESTIMATED_FILE_SIZE)
+
     def get_download_size(self):
         """Calculate the download size.
 
@@ -518,6 +663,7 @@ class DNFManager(object):
         :raise BrokenSpecsError: if there are broken specs
         """
         log.debug("Enabling modules: %s", module_specs)
+        self._enabled_modules = list(module_specs)
 
         try:
             module_base = dnf.module.module_base.ModuleBase(self._base)
@@ -537,6 +683,7 @@ class DNFManager(object):
         :raise BrokenSpecsError: if there are broken specs
         """
         log.debug("Disabling modules: %s", module_specs)
+        self._disabled_modules = list(module_specs)
         try:
             module_base = dnf.module.module_base.ModuleBase(self._base)
             module_base.disable(module_specs)
@@ -620,8 +767,70 @@ class DNFManager(object):
         log.info("The software selection has been resolved (%d packages selected).",
                  len(self._base.transaction))
 
+    def get_resolution_key(self, include_list, exclude_list, modules, disabled_modules):
+        """Get a key of the software selection.
+
+        The key identifies the software selection together with
+        the enabled repositories and their repomd.xml hashes.
+
+        :param include_list: a list of specs for inclusion
+        :param exclude_list: a list of specs for exclusion
+        :param modules: a list of module specs to enable
+        :param disabled_modules: a list of module specs to disable
+        :return: a hashable key
+        """
+        with self._lock:
+            repo_ids = sorted(r.id for r in self._base.repos.iter_enabled())
+
+        return (
+            tuple(include_list),
+            tuple(exclude_list),
+            tuple(modules),
+            tuple(disabled_modules),
+            tuple(repo_ids),
+            tuple(sorted(self._md_hashes.items())),
+        )
+
+    def get_cached_resolution(self, key):
+        """Get a report of the resolved software selection.
+
+        The report is available only if the software selection with
+        the given key is still resolved in the DNF base.
+
+        :param key: a key of the software selection
+        :return: a validation report or None
+        """
+        if not self._resolution:
+            return None
+
+        resolved_key, sack, transaction, report = self._resolution
+
+        if resolved_key != key \
+                or self._base.sack is not sack \
+                or self._base.transaction is not transaction:
+            return None
+
+        return report
+
+    def cache_resolution(self, key, report):
+        """Remember the resolved software selection.
+
+        Only the resolved selections without errors are remembered.
+
+        :param key: a key of the software selection
+        :param report: a validation report
+        """
+        transaction = self._base.transaction
+
+        if report.error_messages or transaction is None:
+            self._resolution = None
+            return
+
+        self._resolution = (key, self._base.sack, transaction, report)
+
     def clear_selection(self):
         """Clear the software selection."""
+        self._resolution = None
         self._base.reset(goal=True)
         log.debug("The software selection has been cleared.")
 
@@ -648,15 +857,56 @@ class DNFManager(object):
         """
         packages = self._base.transaction.install_set  # pylint: disable=no-member
         progress = DownloadProgress(callback=callback)
+        cache = self._get_package_cache()
 
         log.info("Downloading packages to %s.", self.download_location)
 
         try:
-            self._base.download_packages(packages, progress)
+            self._download_packages(self._base, packages, progress, cache)
         except dnf.exceptions.DownloadError as e:
             msg = "Failed to download the following packages: " + str(e)
             raise PayloadInstallationError(msg) from None
 
+        if cache:
+            cache.evict()
+
+    @staticmethod
+    def _download_packages(base, packages, progress, cache=None):
+        """Download the packages with the package cache.
+
+        The packages found in the package cache are restored
+        in the download location and DNF downloads only the
+        missing ones. The downloaded packages are stored in
+        the package cache afterwards. The cache is not evicted.
+
+        :param base: the DNF base
+        :param packages: a list of DNF packages
+        :param progress: the DNF progress-reporting object
+        :param cache: an instance of PackageCache or None
+        :raise DownloadError: if the download fails
+        """
+        if cache:
+            cache.restore_packages(packages)
+
+        base.download_packages(packages, progress)
+
+        if cache:
+            cache.store_packages(packages)
+
+    @staticmethod
+    def _get_package_cache():
+        """Get the persistent package cache.
+
+        :return: an instance of PackageCache or None
+        """
+        if not conf.payload.package_cache_path:
+            return None
+
+        return PackageCache(
+            conf.payload.package_cache_path,
+            conf.payload.package_cache_size
+        )
+
     def install_packages(self, callback, timeout=20):
         """Install the packages.
 
@@ -664,20 +914,40 @@ class DNFManager(object):
         :param timeout: a time out of a failed process in seconds
         :raise PayloadInstallationError: if the installation fails
         """
-        queue = multiprocessing.Queue()
-        display = TransactionProgress(queue)
+        self._install_packages(callback, timeout)
+
+    def _install_packages(self, callback, timeout, batch=None, offset=0, total=None):
+        """Install the packages in a new process.
+
+        :param callback: a callback for progress reporting
+        :param timeout: a time out of a failed process in seconds
+        :param batch: a list of packages to install or None for the whole transaction
+        :param offset: a number of packages installed by previous transactions
+        :param total: a total number of installed packages or None
+        :raise PayloadInstallationError: if the installation fails
+        """
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        display = TransactionProgress(writer, offset=offset, total=total)
+        packages = None
+
+        if batch is not None:
+            packages = [(str(pkg), pkg.reponame) for pkg in batch]
+
         process = multiprocessing.Process(
             target=self._run_transaction,
-            args=(self._base, display)
+            args=(self._base, display, packages, self._module_specs)
         )
 
         # Start the transaction.
         log.debug("Starting the transaction process...")
         process.start()
 
+        # Only the transaction process writes to the pipe.
+        writer.close()
+
         try:
             # Report the progress.
-            process_transaction_progress(queue, callback)
+            process_transaction_progress(reader, callback)
 
             # Wait for the transaction to end.
             process.join()
@@ -685,10 +955,11 @@ class DNFManager(object):
             # Kill the transaction after the timeout.
             process.join(timeout)
             process.kill()
+            reader.close()
             log.debug("The transaction process exited with %s.", process.exitcode)
 
     @staticmethod
-    def _run_transaction(base, display):
+    def _run_transaction(base, display, packages=None, modules=((), ())):
         """Run the DNF transaction.
 
         Execute the DNF transaction and catch any errors. An error
@@ -697,11 +968,16 @@ class DNFManager(object):
 
         :param base: the DNF base
         :param display: the DNF progress-reporting object
+        :param packages: a list of nevras and repo ids to install or None
+        :param modules: a tuple of module specs to enable and to disable
         """
         log.debug("Running the transaction...")
         exit_reason = None
 
         try:
+            if packages is not None:
+                DNFManager._select_transaction_packages(base, packages, modules)
+
             base.do_transaction(display)
             exit_reason = "DNF done"
         except BaseException as e:  # pylint: disable=broad-except
@@ -712,6 +988,191 @@ class DNFManager(object):
             base.close()  # Always close this base.
             display.quit(exit_reason or "DNF quit")
 
+    @staticmethod
+    def _select_transaction_packages(base, packages, modules):
+        """Replace the resolved transaction with the given packages.
+
+        Reload the sack with the installed packages, so the dependencies
+        installed by the previous transactions are satisfied. The metadata
+        are loaded only from the local cache. The reset drops the state
+        of modules, so the module streams are enabled and disabled again.
+
+        The weak dependencies were already resolved for the whole
+        selection, so the new transaction has to install exactly the
+        given packages. Otherwise, it could install packages that were
+        not downloaded.
+
+        :param base: the DNF base
+        :param packages: a list of nevras and repo ids to install
+        :param modules: a tuple of module specs to enable and to disable
+        :raise DNFManagerError: if the packages can't be installed
+        """
+        enabled_modules, disabled_modules = modules
+
+        base.reset(sack=True, goal=True)
+        base.conf.install_weak_deps = False
+
+        for repo in base.repos.iter_enabled():
+            repo._repo.setSyncStrategy(dnf.repo.SYNC_ONLY_CACHE)
+
+        base.fill_sack(load_system_repo=True)
+
+        module_base = dnf.module.module_base.ModuleBase(base)
+
+        if disabled_modules:
+            module_base.disable(disabled_modules)
+
+        if enabled_modules:
+            module_base.enable(enabled_modules)
+
+        query = base.sack.query().available()
+
+        for nevra, repo_id in packages:
+            matches = query.filter(nevra_strict=nevra, reponame=repo_id)
+
+            if not matches:
+                raise DNFManagerError(
+                    "The package {} from {} is not available.".format(nevra, repo_id)
+                )
+
+            base.package_install(matches[0], strict=True)
+
+        base.resolve()
+
+        expected = set(packages)
+        resolved = {(str(pkg), pkg.reponame) for pkg in base.transaction.install_set}
+
+        if resolved != expected:
+            raise DNFManagerError(
+                "The transaction doesn't match the batch of packages. Unexpected: {}. "
+                "Missing: {}.".format(
+                    sorted(resolved - expected) or "none",
+                    sorted(expected - resolved) or "none"
+                )
+            )
+
+    def get_installation_batches(self, batches_number=DNF_PIPELINE_BATCHES):
+        """Split the resolved transaction into installation batches.
+
+        The packages are ordered by their dependencies, so every batch
+        can be installed as soon as the previous batches are installed.
+
+        The dependencies are looked up only in the provides of packages,
+        so the file lists are not loaded. The packages that require files
+        that are not provided this way are installed in the last batch
+        together with all packages that depend on them.
+
+        :param batches_number: a maximal number of batches
+        :return: a list of lists of DNF packages
+        """
+        packages = sorted(self._base.transaction.install_set)  # pylint: disable=no-member
+        query = self._base.sack.query().filterm(pkg=packages)
+        dependencies = {}
+        deferred = set()
+
+        for pkg in packages:
+            providers = set(query.filter(provides=pkg.requires)) if pkg.requires else set()
+
+            for reldep in pkg.requires:
+                if str(reldep).startswith("/") and not query.filter(provides=reldep):
+                    deferred.add(pkg)
+
+            providers.discard(pkg)
+            dependencies[pkg] = sorted(providers)
+
+        if deferred:
+            log.debug("Installing %d packages with unknown file dependencies "
+                      "in the last batch.", len(deferred))
+
+        groups = order_by_dependencies(dependencies, deferred)
+        batches = split_into_batches(groups, lambda pkg: pkg.downloadsize, batches_number)
+
+        log.debug("The transaction is split into %d batches.", len(batches))
+        return batches
+
+    def download_and_install_packages(self, callback, timeout=20):
+        """Download and install the packages in a pipeline.
+
+        The transaction is split into batches ordered by dependencies.
+        The batches are downloaded in a separate process and every batch
+        is installed in its own transaction as soon as it is downloaded,
+        so the download of the next batch overlaps the installation.
+
+        :param callback: a callback for progress reporting
+        :param timeout: a time out of a failed process in seconds
+        :raise PayloadInstallationError: if the download or the installation fails
+        """
+        batches = self.get_installation_batches()
+        total = sum(map(len, batches))
+        offset = 0
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=self._run_download,
+            args=(self._base, batches, queue)
+        )
+
+        log.info("Downloading packages to %s.", self.download_location)
+        log.debug("Starting the download process...")
+        process.start()
+
+        try:
+            for index, batch in enumerate(batches):
+                # Wait for the batch to be downloaded.
+                process_download_progress(queue, index, callback)
+
+                # Install the batch.
+                log.debug("Installing the batch %d of %d.", index + 1, len(batches))
+                self._install_packages(callback, timeout, batch, offset, total)
+                offset += len(batch)
+
+            # Wait for the download to end.
+            process.join()
+        finally:
+            # Kill the download after the timeout.
+            process.join(timeout)
+            process.kill()
+            log.debug("The download process exited with %s.", process.exitcode)
+
+    @staticmethod
+    def _run_download(base, batches, queue):
+        """Download the batches of packages.
+
+        Report every downloaded batch, so it can be installed
+        while the next batch is being downloaded.
+
+        :param base: the DNF base
+        :param batches: a list of lists of DNF packages
+        :param queue: a process shared queue
+        """
+        log.debug("Running the download...")
+        exit_reason = None
+        cache = DNFManager._get_package_cache()
+
+        def report_progress(msg):
+            queue.put(('progress', msg))
+
+        try:
+            for index, batch in enumerate(batches):
+                progress = DownloadProgress(callback=report_progress)
+                DNFManager._download_packages(base, batch, progress, cache)
+                queue.put(('downloaded', index))
+
+            # Evict the cache once all batches are stored.
+            if cache:
+                cache.evict()
+
+            exit_reason = "DNF done"
+        except dnf.exceptions.DownloadError as e:
+            queue.put(('error', "Failed to download the following packages: " + str(e)))
+        except BaseException as e:  # pylint: disable=broad-except
+            log.error("The download has ended abruptly: %s", str(e))
+            exit_reason = str(e) + traceback.format_exc()
+        finally:
+            log.debug("The download has ended.")
+            queue.put(('quit', exit_reason or "DNF quit"))
+            queue.close()
+
     @property
     def repositories(self):
         """Available repositories.
@@ -848,6 +1309,7 @@ class DNFManager(object):
 
         try:
             repo.enable()
+            self._restore_metadata_snapshot(repo)
             repo.load()
         except dnf.exceptions.RepoError as e:
             log.debug("Failed to load metadata from '%s': %s", url, str(e))
@@ -856,6 +1318,123 @@ class DNFManager(object):
 
         log.info("Loaded metadata from '%s'.", url)
 
+    def load_repositories(self, repo_ids=None):
+        """Download repo metadata of multiple repositories.
+
+        The repositories are loaded concurrently. An invalid
+        repo will be disabled. Failures of other repositories
+        don't stop the loading.
+
+        :param repo_ids: a list of repository identifiers or None for all enabled repositories
+        :return: a dictionary of repository identifiers and MetadataError errors
+        """
+        if repo_ids is None:
+            repo_ids = [r.id for r in self._base.repos.iter_enabled()]
+
+        # It is safe to load the repositories of the shared base at the
+        # same time. Every repository downloads its metadata with its own
+        # librepo handle to its own cache directory and the base is only
+        # read. The sack of the base is not used until the metadata are
+        # loaded into it by the fill_sack method after this call.
+        results = self._run_concurrently(self.load_repository, repo_ids)
+        errors = {}
+
+        for repo_id, future in results.items():
+            try:
+                future.result()
+            except MetadataError as e:
+                errors[repo_id] = e
+
+        return errors
+
+    def _restore_metadata_snapshot(self, repo):
+        """Restore the metadata of the repo from the snapshot.
+
+        The metadata are restored only if the repo provides the same
+        repomd.xml file. DNF will find them in its cache and it will
+        download only the repomd.xml file. The repomd.xml file of a repo
+        without base URLs is downloaded from its metalink or mirrorlist.
+
+        :param repo: a DNF repo
+        """
+        snapshot = self._get_metadata_snapshot()
+
+        if not snapshot or not snapshot.exists:
+            return
+
+        content = self._get_repomd_content(repo, resolve_mirrors=True)
+
+        if not content:
+            log.info(
+                "Skipping the metadata snapshot of '%s'. The repomd.xml "
+                "file of the repository is not available.", repo.id
+            )
+            return
+
+        snapshot.restore_repository(
+            repo.id,
+            calculate_hash(content),
+            repo._repo.getCachedir(),  # pylint: disable=protected-access
+            self._base.conf.cachedir
+        )
+
+    @staticmethod
+    def _get_metadata_snapshot():
+        """Get the configured snapshot of repository metadata.
+
+        :return: an instance of MetadataSnapshot or None
+        """
+        if not conf.payload.metadata_snapshot_path:
+            return None
+
+        return MetadataSnapshot(conf.payload.metadata_snapshot_path)
+
+    def store_metadata_snapshot(self):
+        """Store the loaded metadata in the configured snapshot.
+
+        The snapshot is created only if it doesn't exist yet.
+        """
+        snapshot = self._get_metadata_snapshot()
+
+        if not snapshot or snapshot.exists:
+            return
+
+        self.export_metadata_snapshot(snapshot.path)
+
+    def export_metadata_snapshot(self, path):
+        """Export the loaded metadata of enabled repositories.
+
+        Call this method after the metadata are loaded to the sack,
+        so the snapshot contains also the generated solv files.
+
+        :param path: a path to the snapshot directory
+        :return: a list of exported repo ids
+        """
+        with self._lock:
+            repositories = [
+                (repo.id, repo._repo.getCachedir())  # pylint: disable=protected-access
+                for repo in self._base.repos.iter_enabled()
+            ]
+
+        snapshot = MetadataSnapshot(path)
+        return snapshot.store_repositories(repositories, self._base.conf.cachedir)
+
+    @staticmethod
+    def _run_concurrently(function, items):
+        """Call the function for every item in a pool of threads.
+
+        :param function: a function with one argument
+        :param items: a list of arguments
+        :return: a dictionary of items and futures
+        """
+        if not items:
+            return {}
+
+        workers = min(DNF_REPOSITORY_WORKERS, len(items))
+
+        with ThreadPoolExecutor(workers) as executor:
+            return {item: executor.submit(function, item) for item in items}
+
     def load_repomd_hashes(self):
         """Load a hash of the repomd.xml file for each enabled repository."""
         self._md_hashes = self._get_repomd_hashes()
@@ -876,26 +1455,27 @@ class DNFManager(object):
 
         :return: a dictionary of repo ids and repomd.xml hashes
         """
+        repos = list(self._base.repos.iter_enabled())
+        results = self._run_concurrently(self._get_repomd_content, repos)
         md_hashes = {}
 
-        for repo in self._base.repos.iter_enabled():
-            content = self._get_repomd_content(repo)
+        for repo, future in results.items():
+            content = future.result()
             md_hash = calculate_hash(content) if content else None
             md_hashes[repo.id] = md_hash
 
         log.debug("Loaded repomd.xml hashes: %s", md_hashes)
         return md_hashes
 
-    def _get_repomd_content(self, repo):
+    def _get_repomd_content(self, repo, resolve_mirrors=False):
         """Get a content of a repomd.xml file.
 
         :param repo: a DNF repo
+        :param resolve_mirrors: should the metalink or the mirrorlist be used?
         :return: a content of the repomd.xml file
         """
-        for url in repo.baseurl:
+        for repomd_url in self._get_repomd_urls(repo, resolve_mirrors):
             try:
-                repomd_url = "{}/repodata/repomd.xml".format(url)
-
                 with self._base.urlopen(repomd_url, repo=repo, mode="w+t") as f:
                     return f.read()
 
@@ -904,3 +1484,36 @@ class DNFManager(object):
                 continue
 
         return ""
+
+    def _get_repomd_urls(self, repo, resolve_mirrors=False):
+        """Get URLs of a repomd.xml file.
+
+        The URLs are given by the base URLs of the repo. If the repo
+        has no base URLs, the URLs can be resolved from its metalink
+        or mirrorlist. The mirrors don't have to be in sync, so they
+        are not resolved by default.
+
+        :param repo: a DNF repo
+        :param resolve_mirrors: should the metalink or the mirrorlist be used?
+        :return: a list of URLs
+        """
+        if repo.baseurl:
+            return ["{}/repodata/repomd.xml".format(url) for url in repo.baseurl]
+
+        mirrors_url = repo.metalink or repo.mirrorlist
+
+        if not mirrors_url:
+            return []
+
+        if not resolve_mirrors:
+            log.debug("Skipping mirrors of the '%s' repository.", repo.id)
+            return []
+
+        try:
+            with self._base.urlopen(mirrors_url, repo=repo, mode="w+t") as f:
+                content = f.read()
+        except OSError as e:
+            log.debug("Can't download the list of mirrors from: %s", str(e))
+            return []
+
+        return get_repomd_urls_from_mirrors(content)
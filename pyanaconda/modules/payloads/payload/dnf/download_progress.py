@@ -25,10 +25,11 @@ from blivet.size import Size
 
 from pyanaconda.anaconda_loggers import get_packaging_logger
 from pyanaconda.core.i18n import _
+from pyanaconda.modules.common.errors.installation import PayloadInstallationError
 
 log = get_packaging_logger()
 
-__all__ = ["DownloadProgress"]
+__all__ = ["process_download_progress", "DownloadProgress"]
 
 
 def paced(fn):
@@ -42,6 +43,34 @@ def paced(fn):
     return paced_fn
 
 
+def process_download_progress(queue, index, callback):
+    """Process the download progress until the specified batch is downloaded.
+
+    When the download works correctly it will get 'progress' updates
+    followed by a 'downloaded' message for every batch of packages and
+    then a 'quit' message. If the download fails it will send 'error'
+    or 'quit' before the last 'downloaded' message.
+
+    :param queue: a process shared queue
+    :param index: an index of the expected batch
+    :param callback: a callback for progress reporting
+    :raise PayloadInstallationError: if the download fails
+    """
+    (token, msg) = queue.get()
+
+    while token:
+        if token == 'progress':
+            callback(msg)
+        elif token == 'downloaded' and msg == index:
+            break  # The batch is downloaded
+        elif token == 'quit':
+            raise RuntimeError("The download process has ended abruptly: " + msg)
+        elif token == 'error':
+            raise PayloadInstallationError(msg)
+
+        (token, msg) = queue.get()
+
+
 class DownloadProgress(dnf.callback.DownloadProgress):
     """The class for receiving information about an ongoing download."""
 
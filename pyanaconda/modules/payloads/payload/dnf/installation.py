@@ -28,9 +28,6 @@ from pyanaconda.modules.common.errors.installation import PayloadInstallationErr
     NonCriticalInstallationError
 from pyanaconda.modules.common.structures.packages import PackagesConfigurationData
 from pyanaconda.modules.common.task import Task
-from pyanaconda.modules.payloads.payload.dnf.requirements import collect_remote_requirements, \
-    collect_language_requirements, collect_platform_requirements, \
-    collect_driver_disk_requirements, apply_requirements
 from pyanaconda.modules.payloads.payload.dnf.utils import pick_download_location
 from pyanaconda.modules.payloads.payload.dnf.validation import CheckPackagesSelectionTask
 
@@ -121,24 +118,6 @@ class ResolvePackagesTask(CheckPackagesSelectionTask):
             log.warning("The packages were resolved with warnings:\n\n%s", message)
             raise NonCriticalInstallationError(message)
 
-    @property
-    def _requirements(self):
-        """Requirements for installing packages and groups.
-
-        :return: a list of requirements
-        """
-        return collect_remote_requirements() \
-            + collect_language_requirements(self._dnf_manager) \
-            + collect_platform_requirements(self._dnf_manager) \
-            + collect_driver_disk_requirements()
-
-    def _collect_required_specs(self):
-        """Collect specs for the required software."""
-        super()._collect_required_specs()
-
-        # Apply requirements.
-        apply_requirements(self._requirements, self._include_list, self._exclude_list)
-
 
 class PrepareDownloadLocationTask(Task):
     """The installation task for setting up the download location."""
@@ -243,6 +222,27 @@ class InstallPackagesTask(Task):
         self._dnf_manager.install_packages(self.report_progress)
 
 
+class DownloadAndInstallPackagesTask(Task):
+    """The installation task for downloading and installing the packages in a pipeline."""
+
+    def __init__(self, dnf_manager):
+        """Create a new task.
+
+        :param dnf_manager: a DNF manager
+        """
+        super().__init__()
+        self._dnf_manager = dnf_manager
+
+    @property
+    def name(self):
+        return "Download and install packages"
+
+    def run(self):
+        """Run the task."""
+        self.report_progress(_("Downloading packages"))
+        self._dnf_manager.download_and_install_packages(self.report_progress)
+
+
 class ImportRPMKeysTask(Task):
     """The installation task for import of the RPM keys."""
 
@@ -0,0 +1,207 @@
+#
+# The snapshot of repository metadata
+#
+# Copyright (C) 2021 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import glob
+import json
+import os
+import shutil
+import tempfile
+
+from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.core.path import join_paths, make_directories
+from pyanaconda.modules.payloads.payload.dnf.utils import calculate_hash
+
+log = get_module_logger(__name__)
+
+__all__ = ["MetadataSnapshot"]
+
+# The name of the file with the description of the snapshot.
+METADATA_SNAPSHOT_MANIFEST = "manifest.json"
+
+# The name of the directory with the downloaded metadata.
+METADATA_SNAPSHOT_REPODATA = "repodata"
+
+
+class MetadataSnapshot(object):
+    """The snapshot of repository metadata.
+
+    The snapshot contains the downloaded metadata of repositories
+    and the solv files generated from them, so DNF doesn't have to
+    download and parse the metadata again. The metadata of a repo
+    are used only if the repo provides the same repomd.xml file.
+    """
+
+    def __init__(self, path):
+        """Create a new snapshot.
+
+        :param path: a path to the snapshot directory
+        """
+        self._path = path
+        self._manifest = None
+
+    @property
+    def path(self):
+        """The path to the snapshot directory."""
+        return self._path
+
+    @property
+    def exists(self):
+        """Does the snapshot exist?"""
+        return os.path.exists(join_paths(self._path, METADATA_SNAPSHOT_MANIFEST))
+
+    def _get_manifest(self):
+        """Get the description of the snapshot.
+
+        :return: a dictionary of repo ids and their descriptions
+        """
+        if self._manifest is not None:
+            return self._manifest
+
+        self._manifest = {}
+
+        if not self.exists:
+            return self._manifest
+
+        try:
+            with open(join_paths(self._path, METADATA_SNAPSHOT_MANIFEST)) as f:
+                self._manifest = json.load(f).get("repositories", {})
+        except (OSError, ValueError, AttributeError) as e:
+            log.warning("Failed to read the metadata snapshot %s: %s", self._path, e)
+
+        return self._manifest
+
+    def _save_manifest(self, manifest):
+        """Save the description of the snapshot.
+
+        :param manifest: a dictionary of repo ids and their descriptions
+        """
+        fd, path = tempfile.mkstemp(dir=self._path, prefix=".tmp")
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"repositories": manifest}, f, indent=4, sort_keys=True)
+
+            os.replace(path, join_paths(self._path, METADATA_SNAPSHOT_MANIFEST))
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+        self._manifest = manifest
+
+    def restore_repository(self, repo_id, md_hash, repo_cache_dir, cache_dir):
+        """Restore the metadata of the repository in the DNF cache.
+
+        :param repo_id: an id of the repository
+        :param md_hash: a hash of the current repomd.xml file or None
+        :param repo_cache_dir: a path to the cache directory of the repository
+        :param cache_dir: a path to the cache directory of DNF
+        :return: True if the metadata were restored, otherwise False
+        """
+        description = self._get_manifest().get(repo_id)
+
+        if not description:
+            log.debug("The metadata of '%s' are not in the snapshot.", repo_id)
+            return False
+
+        if not md_hash or description.get("repomd_hash") != md_hash.hex():
+            log.info("The metadata of '%s' in the snapshot are outdated.", repo_id)
+            return False
+
+        source = join_paths(self._path, repo_id)
+
+        try:
+            shutil.copytree(
+                join_paths(source, METADATA_SNAPSHOT_REPODATA),
+                join_paths(repo_cache_dir, METADATA_SNAPSHOT_REPODATA),
+                dirs_exist_ok=True
+            )
+
+            for name in description.get("solv_files", []):
+                shutil.copy2(join_paths(source, name), join_paths(cache_dir, name))
+
+        except OSError as e:
+            log.warning("Failed to restore the metadata of '%s': %s", repo_id, e)
+            return False
+
+        log.info("Restored the metadata of '%s' from the snapshot %s.", repo_id, self._path)
+        return True
+
+    def store_repositories(self, repositories, cache_dir):
+        """Store the metadata of the repositories in the snapshot.
+
+        :param repositories: a list of repo ids and paths to their cache directories
+        :param cache_dir: a path to the cache directory of DNF
+        :return: a list of stored repo ids
+        """
+        manifest = {}
+
+        for repo_id, repo_cache_dir in repositories:
+            description = self._store_repository(repo_id, repo_cache_dir, cache_dir)
+
+            if description:
+                manifest[repo_id] = description
+
+        if not manifest:
+            return []
+
+        try:
+            self._save_manifest(manifest)
+        except OSError as e:
+            log.warning("Failed to save the metadata snapshot %s: %s", self._path, e)
+            return []
+
+        log.info("Stored the metadata of %s in the snapshot %s.", sorted(manifest), self._path)
+        return sorted(manifest)
+
+    def _store_repository(self, repo_id, repo_cache_dir, cache_dir):
+        """Store the metadata of the repository in the snapshot.
+
+        :param repo_id: an id of the repository
+        :param repo_cache_dir: a path to the cache directory of the repository
+        :param cache_dir: a path to the cache directory of DNF
+        :return: a description of the stored metadata or None
+        """
+        repodata = join_paths(repo_cache_dir, METADATA_SNAPSHOT_REPODATA)
+        target = join_paths(self._path, repo_id)
+
+        try:
+            with open(join_paths(repodata, "repomd.xml")) as f:
+                md_hash = calculate_hash(f.read())
+
+            solv_files = [
+                os.path.basename(path) for path in
+                glob.glob(join_paths(cache_dir, glob.escape(repo_id) + ".solv")) +
+                glob.glob(join_paths(cache_dir, glob.escape(repo_id) + "-*.solvx"))
+            ]
+
+            shutil.rmtree(target, ignore_errors=True)
+            make_directories(target)
+            shutil.copytree(repodata, join_paths(target, METADATA_SNAPSHOT_REPODATA))
+
+            for name in solv_files:
+                shutil.copy2(join_paths(cache_dir, name), join_paths(target, name))
+
+        except OSError as e:
+            log.warning("Failed to store the metadata of '%s': %s", repo_id, e)
+            return None
+
+        return {
+            "repomd_hash": md_hash.hex(),
+            "solv_files": sorted(solv_files),
+        }
@@ -0,0 +1,209 @@
+#
+# The persistent cache of downloaded packages
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import shutil
+import tempfile
+
+import hawkey
+
+from blivet.size import Size
+
+from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.core.path import join_paths, make_directories
+
+log = get_module_logger(__name__)
+
+__all__ = ["PackageCache"]
+
+# The suffix of the cached files.
+PACKAGE_CACHE_FILE_SUFFIX = ".rpm"
+
+
+class PackageCache(object):
+    """The persistent cache of downloaded packages.
+
+    The packages are stored under their checksums, so the cache
+    can be shared by installations from different repositories
+    and mirrors. The least recently used packages are removed
+    if the cache exceeds the size limit.
+    """
+
+    def __init__(self, path, max_size):
+        """Create a new cache.
+
+        :param path: a path to the cache directory
+        :param max_size: a maximal size of the cache
+        """
+        self._path = path
+        self._max_size = Size(max_size)
+
+    @property
+    def path(self):
+        """The path to the cache directory."""
+        return self._path
+
+    def get_file_path(self, package):
+        """Get a path to the cached file of the given package.
+
+        :param package: a DNF package
+        :return: a path or None if the checksum is unknown
+        """
+        if not package.chksum:
+            return None
+
+        chksum_type, chksum = package.chksum
+        digest = chksum.hex()
+
+        return join_paths(
+            self._path,
+            hawkey.chksum_name(chksum_type),
+            digest[:2],
+            digest + PACKAGE_CACHE_FILE_SUFFIX
+        )
+
+    def restore_packages(self, packages):
+        """Restore the cached packages in their download location.
+
+        DNF verifies the restored packages and doesn't download them again.
+
+        :param packages: a list of DNF packages
+        :return: a list of restored DNF packages
+        """
+        restored = []
+
+        for package in packages:
+            if self._restore_package(package):
+                restored.append(package)
+
+        log.info("Restored %d of %d packages from the cache %s.",
+                 len(restored), len(packages), self._path)
+
+        return restored
+
+    def _restore_package(self, package):
+        """Restore the cached package.
+
+        :param package: a DNF package
+        :return: True if the package was restored, otherwise False
+        """
+        source = self.get_file_path(package)
+        target = package.localPkg()
+
+        if not source or not os.path.exists(source):
+            return False
+
+        try:
+            make_directories(os.path.dirname(target))
+            shutil.copyfile(source, target)
+            # Mark the file as recently used.
+            os.utime(source)
+        except OSError as e:
+            log.warning("Failed to restore %s from the cache: %s", package, e)
+            return False
+
+        return True
+
+    def store_packages(self, packages):
+        """Store the downloaded packages in the cache.
+
+        The cache is not evicted here. Call the evict method
+        once all packages of the transaction are stored.
+
+        :param packages: a list of verified DNF packages
+        """
+        stored = 0
+
+        for package in packages:
+            if self._store_package(package):
+                stored += 1
+
+        log.info("Stored %d packages in the cache %s.", stored, self._path)
+
+    def _store_package(self, package):
+        """Store the downloaded package in the cache.
+
+        The file is copied to a temporary file first and then
+        renamed, so other installations never see a partial file.
+
+        :param package: a verified DNF package
+        :return: True if the package was stored, otherwise False
+        """
+        source = package.localPkg()
+        target = self.get_file_path(package)
+
+        if not target or os.path.exists(target) or not os.path.exists(source):
+            return False
+
+        try:
+            make_directories(os.path.dirname(target))
+            fd, path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp")
+            os.close(fd)
+
+            try:
+                shutil.copyfile(source, path)
+                os.replace(path, target)
+            finally:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+        except OSError as e:
+            log.warning("Failed to store %s in the cache: %s", package, e)
+            return False
+
+        return True
+
+    def evict(self):
+        """Remove the least recently used packages above the size limit."""
+        entries = []
+        total_size = 0
+
+        for root, _dirs, files in os.walk(self._path):
+            for name in files:
+                if not name.endswith(PACKAGE_CACHE_FILE_SUFFIX):
+                    continue
+
+                path = os.path.join(root, name)
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self._max_size:
+            return
+
+        log.debug("The cache %s exceeds %s.", self._path, self._max_size)
+
+        for _mtime, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+
+            try:
+                os.unlink(path)
+            except OSError as e:
+                log.warning("Failed to remove %s from the cache: %s", path, e)
+                continue
+
+            total_size -= size
+
+        log.info("The size of the cache %s is %s.", self._path, Size(total_size))
@@ -15,6 +15,9 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import struct
+import threading
+
 import dnf.transaction
 import dnf.callback
 
@@ -26,53 +29,148 @@ log = get_module_logger(__name__)
 
 __all__ = ["process_transaction_progress", "TransactionProgress"]
 
+# The tokens of the progress records.
+TRANSACTION_PROGRESS_TOKENS = (
+    'install', 'configure', 'verify', 'log', 'post', 'done', 'quit', 'error'
+)
+
+# The header of a progress record: the token index and the message length.
+#
+# The records are not fixed-size. Every record is a fixed-size header
+# followed by the message, because the messages contain names of packages
+# and checksums that can't be truncated to a fixed size.
+TRANSACTION_PROGRESS_HEADER = struct.Struct("!BI")
+
+# Flush the progress records at least every 0.2 seconds.
+TRANSACTION_PROGRESS_INTERVAL = 0.2
+
+# Flush the progress records if there are at least 256 of them.
+TRANSACTION_PROGRESS_BATCH = 256
+
+
+def encode_progress_records(records):
+    """Encode the progress records into bytes.
+
+    Every record is encoded as a header with the index of the token
+    and the length of the message followed by the UTF-8 message.
+
+    :param records: a list of tokens and messages
+    :return: bytes
+    """
+    data = bytearray()
+
+    for token, msg in records:
+        encoded = (msg or "").encode("utf-8", "replace")
+        data += TRANSACTION_PROGRESS_HEADER.pack(
+            TRANSACTION_PROGRESS_TOKENS.index(token), len(encoded)
+        )
+        data += encoded
+
+    return bytes(data)
+
 
-def process_transaction_progress(queue, callback):
+def decode_progress_records(data):
+    """Decode the progress records from bytes.
+
+    :param data: bytes
+    :return: a generator of tokens and messages
+    :raise ValueError: if the data are not valid
+    """
+    offset = 0
+
+    while offset < len(data):
+        try:
+            index, length = TRANSACTION_PROGRESS_HEADER.unpack_from(data, offset)
+            token = TRANSACTION_PROGRESS_TOKENS[index]
+        except (struct.error, IndexError):
+            raise ValueError("Invalid progress record at {}.".format(offset)) from None
+
+        offset += TRANSACTION_PROGRESS_HEADER.size
+
+        if offset + length > len(data):
+            raise ValueError("Truncated progress record at {}.".format(offset))
+
+        msg = data[offset:offset + length].decode("utf-8", "replace")
+        offset += length
+        yield token, msg
+
+
+def process_transaction_progress(connection, callback):
     """Process the transaction progress.
 
     When the installation works correctly it will get 'install'
     updates followed by a 'done' message and then a 'quit' message.
     If the installation fails it will send 'quit' without 'done'.
 
-    :param queue: a process shared queue
+    The messages are received in batches. Every message is logged,
+    but only the last progress message of a batch is reported.
+
+    :param connection: a readable end of a process shared pipe
     :param callback: a callback for progress reporting
     :raise PayloadInstallationError: if the transaction fails
     """
-    (token, msg) = queue.get()
-
-    while token:
-        if token == 'install':
-            callback(_("Installing {}").format(msg))
-        elif token == 'configure':
-            callback(_("Configuring {}").format(msg))
-        elif token == 'verify':
-            callback(_("Verifying {}").format(msg))
-        elif token == 'log':
-            log.info(msg)
-        elif token == 'post':
-            callback(_("Performing post-installation setup tasks"))
-        elif token == 'done':
-            break  # Installation finished successfully
-        elif token == 'quit':
-            raise RuntimeError("The transaction process has ended abruptly: " + msg)
-        elif token == 'error':
-            raise PayloadInstallationError("An error occurred during the transaction: " + msg)
-
-        (token, msg) = queue.get()
+    while True:
+        try:
+            data = connection.recv_bytes()
+        except EOFError:
+            raise RuntimeError("The transaction process has ended abruptly.") from None
+
+        report = None
+
+        for token, msg in decode_progress_records(data):
+            if token == 'install':
+                report = _("Installing {}").format(msg)
+            elif token == 'configure':
+                report = _("Configuring {}").format(msg)
+            elif token == 'verify':
+                report = _("Verifying {}").format(msg)
+            elif token == 'log':
+                log.info(msg)
+            elif token == 'post':
+                report = _("Performing post-installation setup tasks")
+            elif token == 'done':
+                if report:
+                    callback(report)
+                return  # Installation finished successfully
+            elif token == 'quit':
+                raise RuntimeError("The transaction process has ended abruptly: " + msg)
+            elif token == 'error':
+                raise PayloadInstallationError("An error occurred during the transaction: " + msg)
+
+        if report:
+            callback(report)
 
 
 class TransactionProgress(dnf.callback.TransactionProgress):
-    """The class for receiving information about an ongoing transaction."""
+    """The class for receiving information about an ongoing transaction.
 
-    def __init__(self, queue):
+    The messages are collected and sent to the other process in batches.
+    A batch is sent if it is big enough, if the last batch was sent some
+    time ago or if the transaction reached an important point.
+    """
+
+    def __init__(self, connection, offset=0, total=None):
         """Create a new instance.
 
-        :param queue: a process shared queue
+        The offset and the total number of packages are used to
+        report the progress of a transaction that is a part of
+        a larger installation.
+
+        :param connection: a writable end of a process shared pipe
+        :param offset: a number of packages processed by previous transactions
+        :param total: a total number of packages or None
         """
         super().__init__()
-        self._queue = queue
+        self._connection = connection
+        self._offset = offset
+        self._total = total
         self._last_ts = None
         self._postinst_phase = False
+        self._checksums = {}
+        self._records = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = None
         self.cnt = 0
 
     def progress(self, package, action, ti_done, ti_total, ts_done, ts_total):
@@ -85,7 +183,7 @@ class TransactionProgress(dnf.callback.TransactionProgress):
         :param ts_done: the number of actions processed in the whole transaction
         :param ts_total: the total number of actions in the whole transaction
         """
-        # Process DNF actions, communicating with anaconda via the queue
+        # Process DNF actions, communicating with anaconda via the pipe
         # A normal installation consists of 'install' messages followed by
         # the 'post' message.
         if action == dnf.transaction.PKG_INSTALL and ti_done == 0:
@@ -95,57 +193,123 @@ class TransactionProgress(dnf.callback.TransactionProgress):
             self._last_ts = ts_done
 
             msg = '%s.%s (%d/%d)' % \
-                (package.name, package.arch, ts_done, ts_total)
+                (package.name, package.arch, *self._count(ts_done, ts_total))
             self.cnt += 1
-            self._queue.put(('install', msg))
+            self._put('install', msg)
 
             # Log the exact package nevra, build time and checksum
-            nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Installed: %s %s %s" % (nevra, package.buildtime, package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            log_msg = "Installed: %s" % self._describe(package)
+            self._put('log', log_msg)
 
         elif action == dnf.transaction.TRANS_POST:
-            self._queue.put(('post', None))
+            self._put('post', None)
             log_msg = "Post installation setup phase started."
-            self._queue.put(('log', log_msg))
+            self._put('log', log_msg, flush=True)
             self._postinst_phase = True
 
         elif action == dnf.transaction.PKG_SCRIPTLET:
             # Log the exact package nevra, build time and checksum
-            nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Configuring (running scriptlet for): %s %s %s" % (nevra, package.buildtime,
-                                                                         package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            log_msg = "Configuring (running scriptlet for): %s" % self._describe(package)
+            self._put('log', log_msg)
 
             # only show progress in UI for post-installation scriptlets
             if self._postinst_phase:
                 msg = '%s.%s' % (package.name, package.arch)
-                self._queue.put(('configure', msg))
+                self._put('configure', msg)
 
         elif action == dnf.transaction.PKG_VERIFY:
-            msg = '%s.%s (%d/%d)' % (package.name, package.arch, ts_done, ts_total)
-            self._queue.put(('verify', msg))
+            msg = '%s.%s (%d/%d)' % (package.name, package.arch, *self._count(ts_done, ts_total))
+            self._put('verify', msg)
 
             # Log the exact package nevra, build time and checksum
-            nevra = "%s-%s.%s" % (package.name, package.evr, package.arch)
-            log_msg = "Verifying: %s %s %s" % (nevra, package.buildtime, package.returnIdSum()[1])
-            self._queue.put(('log', log_msg))
+            log_msg = "Verifying: %s" % self._describe(package)
+            self._put('log', log_msg)
 
             # Once the last package is verified the transaction is over
             if ts_done == ts_total:
-                self._queue.put(('done', None))
+                self._put('done', None, flush=True)
+
+    def _count(self, ts_done, ts_total):
+        """Get the number of processed and total packages of the installation.
+
+        :param ts_done: the number of actions processed in the whole transaction
+        :param ts_total: the total number of actions in the whole transaction
+        :return: a tuple with the number of processed and total packages
+        """
+        return ts_done + self._offset, self._total or ts_total
+
+    def _describe(self, package):
+        """Describe the package with its nevra, build time and checksum.
+
+        The description is generated only once for every package.
+
+        :param package: the DNF package object
+        :return: a string
+        """
+        key = (package.name, package.evr, package.arch)
+
+        if key not in self._checksums:
+            self._checksums[key] = "%s-%s.%s %s %s" % (
+                package.name, package.evr, package.arch,
+                package.buildtime, package.returnIdSum()[1]
+            )
+
+        return self._checksums[key]
+
+    def _put(self, token, msg, flush=False):
+        """Add a new message to the current batch.
+
+        :param token: a token of the message
+        :param msg: a message or None
+        :param flush: True to send the batch immediately
+        """
+        with self._lock:
+            self._records.append((token, msg))
+
+            if flush or len(self._records) >= TRANSACTION_PROGRESS_BATCH:
+                self._flush()
+
+        # Flush the messages on a timer in the transaction process.
+        if not self._flusher:
+            self._flusher = threading.Thread(
+                name="AnaTransactionProgressFlusher",
+                target=self._flush_periodically,
+                daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        """Send the collected messages on a timer."""
+        while not self._stopped.wait(TRANSACTION_PROGRESS_INTERVAL):
+            with self._lock:
+                self._flush()
+
+    def _flush(self):
+        """Send the collected messages in one batch.
+
+        The caller has to hold the lock.
+        """
+        if not self._records or self._connection.closed:
+            return
+
+        self._connection.send_bytes(encode_progress_records(self._records))
+        self._records = []
 
     def error(self, message):
         """Report an error that occurred during the transaction.
 
         :param message: a string that describes the error
         """
-        self._queue.put(('error', message))
+        self._put('error', message, flush=True)
 
     def quit(self, message):
-        """Report the end of the transaction and close the queue.
+        """Report the end of the transaction and close the pipe.
 
         :param message: the reason why the transaction ended
         """
-        self._queue.put(('quit', message))
-        self._queue.close()
+        self._stopped.set()
+
+        with self._lock:
+            self._records.append(('quit', message))
+            self._flush()
+            self._connection.close()
@@ -18,6 +18,7 @@
 import fnmatch
 import hashlib
 import os
+import re
 import rpm
 
 from blivet.size import Size
@@ -37,6 +38,9 @@ log = get_module_logger(__name__)
 
 DNF_PACKAGE_CACHE_DIR_SUFFIX = 'dnf.package.cache'
 
+# A URL of the repomd.xml file in a metalink.
+METALINK_REPOMD_URL = re.compile(r"<url\b[^>]*>\s*([^<\s]+/repomd\.xml)\s*</url>")
+
 
 def calculate_hash(data):
     """Calculate hash from the given data.
@@ -48,6 +52,32 @@ def calculate_hash(data):
     return m.digest()
 
 
+def get_repomd_urls_from_mirrors(content):
+    """Get URLs of the repomd.xml file from a list of mirrors.
+
+    The list of mirrors is a metalink or a mirrorlist. A metalink
+    provides URLs of the repomd.xml file, a mirrorlist provides
+    base URLs of the repository.
+
+    :param content: a content of the metalink or the mirrorlist
+    :return: a list of URLs
+    """
+    if "<metalink" in content:
+        return METALINK_REPOMD_URL.findall(content)
+
+    urls = []
+
+    for line in content.splitlines():
+        line = line.strip()
+
+        if not line or line.startswith("#"):
+            continue
+
+        urls.append("{}/repodata/repomd.xml".format(line.rstrip("/")))
+
+    return urls
+
+
 def get_kernel_package(dnf_manager, exclude_list):
     """Get an installable kernel package.
 
@@ -153,6 +183,137 @@ def get_installation_specs(data: PackagesSelectionData, default_environment=None
     return include_list, exclude_list
 
 
+def order_by_dependencies(dependencies, deferred=()):
+    """Order items so that their dependencies come first.
+
+    Items with cyclic dependencies can't be ordered, so they
+    are returned together in one group. This is the Tarjan's
+    algorithm for strongly connected components, implemented
+    without recursion to handle long dependency chains.
+
+    Items with unknown dependencies can be deferred. They are
+    returned in the last group together with all items that
+    depend on them.
+
+    :param dependencies: a dictionary of items and lists of their dependencies
+    :param deferred: a collection of items with unknown dependencies
+    :return: a list of groups of items
+    """
+    groups = _find_dependency_groups(dependencies)
+
+    if not deferred:
+        return groups
+
+    # Find all items that depend on the deferred items.
+    dependents = {}
+
+    for item, item_dependencies in dependencies.items():
+        for dependency in item_dependencies:
+            dependents.setdefault(dependency, []).append(item)
+
+    postponed = set()
+    work = [item for item in deferred if item in dependencies]
+
+    while work:
+        item = work.pop()
+
+        if item in postponed:
+            continue
+
+        postponed.add(item)
+        work.extend(dependents.get(item, ()))
+
+    ordered = [[i for i in group if i not in postponed] for group in groups]
+    last = [i for group in groups for i in group if i in postponed]
+    return [group for group in ordered if group] + ([last] if last else [])
+
+
+def _find_dependency_groups(dependencies):
+    """Find the ordered strongly connected components of the dependency graph.
+
+    :param dependencies: a dictionary of items and lists of their dependencies
+    :return: a list of groups of items
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    groups = []
+
+    for root in dependencies:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(dependencies.get(root, ())))]
+
+        while work:
+            item, children = work[-1]
+
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(dependencies.get(child, ()))))
+                    break
+
+                if child in on_stack:
+                    lowlink[item] = min(lowlink[item], index[child])
+            else:
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[item])
+
+                if lowlink[item] != index[item]:
+                    continue
+
+                group = []
+
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    group.append(member)
+
+                    if member == item:
+                        break
+
+                groups.append(group)
+
+    return groups
+
+
+def split_into_batches(groups, get_size, batches_number):
+    """Split ordered groups of items into batches of a similar size.
+
+    The order of the groups is preserved and a group is never
+    split between two batches.
+
+    :param groups: a list of groups of items
+    :param get_size: a function that returns a size of an item
+    :param batches_number: a maximal number of batches
+    :return: a list of batches of items
+    """
+    sizes = [sum(get_size(item) for item in group) for group in groups]
+    limit = sum(sizes) / max(batches_number, 1)
+    batches = [[]]
+    current = 0
+
+    for group, size in zip(groups, sizes):
+        if batches[-1] and current >= limit and len(batches) < batches_number:
+            batches.append([])
+            current = 0
+
+        batches[-1].extend(group)
+        current += size
+
+    return [batch for batch in batches if batch]
+
+
 def get_kernel_version_list():
     """Get a list of installed kernel versions.
 
@@ -23,6 +23,9 @@ from pyanaconda.modules.common.structures.validation import ValidationReport
 from pyanaconda.modules.common.task import Task
 from pyanaconda.modules.payloads.payload.dnf.dnf_manager import MissingSpecsError, \
     BrokenSpecsError, InvalidSelectionError
+from pyanaconda.modules.payloads.payload.dnf.requirements import collect_remote_requirements, \
+    collect_language_requirements, collect_platform_requirements, \
+    collect_driver_disk_requirements, apply_requirements
 from pyanaconda.modules.payloads.payload.dnf.utils import get_installation_specs, \
     get_kernel_package
 
@@ -52,17 +55,40 @@ class CheckPackagesSelectionTask(Task):
     def run(self):
         """Run the task.
 
+        If the same selection is already resolved, its
+        report is returned without resolving it again.
+
+        The requirements are applied here as well as during
+        the installation, so the installation reuses the
+        selection resolved by this check.
+
         :return: a validation report
         """
-        # Clear the previous selection.
-        self._clear_selection()
-
         # Prepare the new selection.
         self._collect_selected_specs()
         self._collect_required_specs()
 
+        # Reuse the resolved selection.
+        key = self._dnf_manager.get_resolution_key(
+            self._include_list,
+            self._exclude_list,
+            self._selection.modules,
+            self._selection.disabled_modules
+        )
+
+        report = self._dnf_manager.get_cached_resolution(key)
+
+        if report is not None:
+            log.debug("The software selection is already resolved: %s", report)
+            return report
+
+        # Clear the previous selection.
+        self._clear_selection()
+
         # Resolve the new selection.
-        return self._resolve_selection()
+        report = self._resolve_selection()
+        self._dnf_manager.cache_resolution(key, report)
+        return report
 
     def _clear_selection(self):
         """Clear the previous selection."""
@@ -83,6 +109,17 @@ class CheckPackagesSelectionTask(Task):
         self._include_list.extend(include_list)
         self._exclude_list.extend(exclude_list)
 
+    @property
+    def _requirements(self):
+        """Requirements for installing packages and groups.
+
+        :return: a list of requirements
+        """
+        return collect_remote_requirements() \
+            + collect_language_requirements(self._dnf_manager) \
+            + collect_platform_requirements(self._dnf_manager) \
+            + collect_driver_disk_requirements()
+
     def _collect_required_specs(self):
         """Collect specs for the required software."""
         log.debug("Collecting required specs.")
@@ -93,6 +130,9 @@ class CheckPackagesSelectionTask(Task):
         if kernel_package:
             self._include_list.append(kernel_package)
 
+        # Apply requirements.
+        apply_requirements(self._requirements, self._include_list, self._exclude_list)
+
     def _resolve_selection(self):
         """Resolve the new selection."""
         log.debug("Resolving the software selection.")
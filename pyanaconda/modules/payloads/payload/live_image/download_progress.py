@@ -15,6 +15,8 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import time
+
 from blivet.size import Size
 
 from pyanaconda.anaconda_loggers import get_module_logger
@@ -40,6 +42,7 @@ class DownloadProgress(object):
         self._downloaded_size = 0
         self._total_size = total_size
         self._callback = callback
+        self._start_time = time.monotonic()
 
     def _report_progress(self):
         """Report the progress."""
@@ -49,13 +52,15 @@ class DownloadProgress(object):
             return
 
         self._last_pct = pct
+        speed = Size(int(self._downloaded_size / max(time.monotonic() - self._start_time, 1)))
 
-        log.debug("Downloaded %s (%s%%)", Size(self._downloaded_size), pct)
-        self._callback(_("Downloading {} ({}%)").format(self._url, pct))
+        log.debug("Downloaded %s (%s%%, %s/s)", Size(self._downloaded_size), pct, speed)
+        self._callback(_("Downloading {} ({}%, {}/s)").format(self._url, pct, speed))
 
     def start(self):
         """Start the download progress."""
         self._downloaded_size = 0
+        self._start_time = time.monotonic()
         self._report_progress()
 
     def update(self, downloaded_size):
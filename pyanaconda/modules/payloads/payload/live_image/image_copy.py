@@ -0,0 +1,470 @@
+#
+# Copyright (C) 2020 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import errno
+import fcntl
+import os
+import re
+import stat
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pyanaconda.anaconda_loggers import get_module_logger
+
+log = get_module_logger(__name__)
+
+__all__ = ["ImageCopyEngine", "ImageCopyError"]
+
+# The ioctl request for cloning a file (see ioctl_ficlone(2)).
+FICLONE = 0x40049409
+
+# The maximal number of threads that copy files.
+IMAGE_COPY_WORKERS = 8
+
+# The number of files waiting for a free thread per thread.
+IMAGE_COPY_QUEUE_SIZE = 64
+
+# The errors that stop the copying.
+IMAGE_COPY_FATAL_ERRORS = (errno.ENOSPC, errno.EDQUOT, errno.EIO, errno.EROFS)
+
+
+class ImageCopyError(Exception):
+    """The image couldn't be copied."""
+
+
+def get_exclude_pattern_regex(pattern):
+    """Translate an rsync exclude pattern to a regular expression.
+
+    Unlike in the fnmatch module, the '*' and '?' wildcards don't
+    match slashes and only '**' matches any part of the path.
+
+    :param str pattern: an anchored exclude pattern
+    :return: a compiled regular expression
+    """
+    pattern = pattern.rstrip("/")
+    parts = []
+    i = 0
+
+    while i < len(pattern):
+        char = pattern[i]
+
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            chars = pattern[i + 1:end]
+
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+
+            parts.append("[" + chars.replace("\\", "\\\\") + "]")
+            i = end
+        else:
+            parts.append(re.escape(char))
+
+        i += 1
+
+    return re.compile("".join(parts))
+
+
+class ImageCopyEngine(object):
+    """Copy the content of a mounted image to the system root.
+
+    Preserve permissions, owners, groups, ACL's, xattrs, times,
+    symlinks and hardlinks. Go recursively, include devices and
+    special files. Don't cross file system boundaries.
+
+    The directory tree is walked in the current thread and regular
+    files are copied by a pool of threads. The data is cloned if the
+    file systems support it, otherwise it is copied in the kernel.
+    """
+
+    def __init__(self, source, target, excluded_paths=(), callback=None):
+        """Create a new copy engine.
+
+        The excluded paths are absolute paths in the image that can
+        contain wildcards with the meaning of the rsync exclude patterns:
+        '*' and '?' don't match slashes, '**' matches anything. Paths
+        that end with a slash match only directories.
+
+        :param source: a path to the mounted image
+        :param target: a path to the system root
+        :param excluded_paths: a list of excluded paths
+        :param callback: a function called with the number of copied files and bytes
+        """
+        self._source = os.path.normpath(source)
+        self._target = os.path.normpath(target)
+        self._excluded_paths = [
+            (get_exclude_pattern_regex(path), path.endswith("/"))
+            for path in excluded_paths
+        ]
+        self._callback = callback
+        self._workers = min(IMAGE_COPY_WORKERS, os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self._workers * IMAGE_COPY_QUEUE_SIZE)
+        self._copied_files = 0
+        self._copied_size = 0
+        self._failures = 0
+        self._fatal_error = None
+        self._hardlinks = {}
+        self._deferred_links = []
+        self._directories = []
+        self._clone_supported = True
+        self._copy_range_supported = True
+
+    @property
+    def copied_files(self):
+        """The number of copied files."""
+        return self._copied_files
+
+    @property
+    def copied_size(self):
+        """The number of copied bytes."""
+        return self._copied_size
+
+    def run(self):
+        """Copy the image.
+
+        :raise ImageCopyError: if the image cannot be copied
+        """
+        log.debug("Copying %s to %s with %d threads.", self._source, self._target, self._workers)
+
+        with ThreadPoolExecutor(self._workers) as executor:
+            self._walk(executor)
+
+        if self._fatal_error:
+            raise ImageCopyError(str(self._fatal_error))
+
+        for source_path, path in self._deferred_links:
+            self._run_safely(self._copy_hardlink, source_path, path)
+
+        for path, st in reversed(self._directories):
+            self._run_safely(self._copy_directory_metadata, path, st)
+
+        if self._fatal_error:
+            raise ImageCopyError(str(self._fatal_error))
+
+        if self._failures:
+            log.warning("Failed to copy %d files.", self._failures)
+
+        log.debug("Copied %d files and %d bytes.", self._copied_files, self._copied_size)
+
+    def _walk(self, executor):
+        """Walk the image and copy its content.
+
+        :param executor: a pool of threads for copying files
+        """
+        root_device = os.lstat(self._source).st_dev
+        self._create_directory("", os.lstat(self._source))
+        directories = [""]
+
+        while directories and not self._fatal_error:
+            directory = directories.pop()
+
+            with os.scandir(os.path.join(self._source, directory)) as it:
+                entries = sorted(it, key=lambda e: e.name)
+
+            for entry in entries:
+                path = os.path.join(directory, entry.name)
+                st = entry.stat(follow_symlinks=False)
+
+                if self._is_excluded(path, stat.S_ISDIR(st.st_mode)):
+                    continue
+
+                if stat.S_ISDIR(st.st_mode):
+                    self._run_safely(self._create_directory, path, st)
+
+                    # Don't cross file system boundaries.
+                    if st.st_dev == root_device:
+                        directories.append(path)
+
+                elif stat.S_ISREG(st.st_mode):
+                    self._submit_file(executor, path, st)
+
+                elif stat.S_ISLNK(st.st_mode):
+                    self._run_safely(self._copy_symlink, path, st)
+
+                else:
+                    self._run_safely(self._copy_special_file, path, st)
+
+    def _is_excluded(self, path, is_directory):
+        """Is the given path excluded?
+
+        :param path: a path relative to the image root
+        :param is_directory: is the path a directory?
+        :return: True or False
+        """
+        path = "/" + path
+
+        for regex, directory_only in self._excluded_paths:
+            if directory_only and not is_directory:
+                continue
+
+            if regex.fullmatch(path):
+                return True
+
+        return False
+
+    def _submit_file(self, executor, path, st):
+        """Submit a regular file for copying.
+
+        Other hardlinks of the same file are linked later.
+
+        :param executor: a pool of threads
+        :param path: a path relative to the image root
+        :param st: a stat result of the file
+        """
+        if st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino)
+
+            if key in self._hardlinks:
+                self._deferred_links.append((self._hardlinks[key], path))
+                return
+
+            self._hardlinks[key] = path
+
+        self._slots.acquire()
+
+        try:
+            executor.submit(self._run_in_slot, self._copy_file, path, st)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _run_in_slot(self, function, path, *args):
+        """Run the function and free the slot of the queue."""
+        try:
+            self._run_safely(function, path, *args)
+        finally:
+            self._slots.release()
+
+    def _run_safely(self, function, path, *args):
+        """Run the function and handle errors.
+
+        :param function: a function to run
+        :param path: a path relative to the image root
+        """
+        if self._fatal_error:
+            return
+
+        try:
+            function(path, *args)
+        except OSError as e:
+            log.error("Failed to copy /%s: %s", path, e)
+
+            with self._lock:
+                self._failures += 1
+
+                if e.errno in IMAGE_COPY_FATAL_ERRORS:
+                    self._fatal_error = e
+
+    def _report_copied(self, size):
+        """Report a copied file.
+
+        :param size: a number of copied bytes
+        """
+        with self._lock:
+            self._copied_files += 1
+            self._copied_size += size
+
+            if self._callback:
+                self._callback(self._copied_files, self._copied_size)
+
+    def _create_directory(self, path, st):
+        """Create a directory.
+
+        The metadata of the directory are copied after its content.
+
+        :param path: a path relative to the image root
+        :param st: a stat result of the directory
+        """
+        target_path = os.path.join(self._target, path)
+
+        if not os.path.isdir(target_path) or os.path.islink(target_path):
+            self._remove_existing(target_path)
+            os.mkdir(target_path, 0o700)
+
+        self._directories.append((path, st))
+
+    def _copy_directory_metadata(self, path, st):
+        """Copy the metadata of a directory.
+
+        :param path: a path relative to the image root
+        :param st: a stat result of the directory
+        """
+        source_path = os.path.join(self._source, path)
+        target_path = os.path.join(self._target, path)
+        self._copy_metadata(source_path, target_path, st)
+        self._report_copied(0)
+
+    def _copy_file(self, path, st):
+        """Copy a regular file.
+
+        :param path: a path relative to the image root
+        :param st: a stat result of the file
+        """
+        target_path = os.path.join(self._target, path)
+        self._remove_existing(target_path)
+
+        source_fd = os.open(os.path.join(self._source, path), os.O_RDONLY | os.O_CLOEXEC)
+
+        try:
+            target_fd = os.open(
+                target_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_CLOEXEC, 0o600
+            )
+
+            try:
+                self._copy_data(source_fd, target_fd, st.st_size)
+                self._copy_metadata(source_fd, target_fd, st)
+            finally:
+                os.close(target_fd)
+        finally:
+            os.close(source_fd)
+
+        self._report_copied(st.st_size)
+
+    def _copy_data(self, source_fd, target_fd, size):
+        """Copy the data of a file.
+
+        Try to clone the file first. Then try to copy the data
+        with copy_file_range and sendfile. The unsupported methods
+        are not tried again.
+
+        :param source_fd: a file descriptor of the source file
+        :param target_fd: a file descriptor of the target file
+        :param size: a size of the file
+        """
+        if self._clone_supported:
+            try:
+                fcntl.ioctl(target_fd, FICLONE, source_fd)
+                return
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY):
+                    raise
+
+                self._clone_supported = False
+
+        offset = 0
+
+        if self._copy_range_supported:
+            try:
+                while offset < size:
+                    copied = os.copy_file_range(source_fd, target_fd, size - offset)
+
+                    if not copied:
+                        break
+
+                    offset += copied
+
+                return
+            except OSError as e:
+                if offset or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL):
+                    raise
+
+                self._copy_range_supported = False
+
+        while offset < size:
+            copied = os.sendfile(target_fd, source_fd, offset, size - offset)
+
+            if not copied:
+                break
+
+            offset += copied
+
+    def _copy_symlink(self, path, st):
+        """Copy a symbolic link.
+
+        :param path: a path relative to the image root
+        :param st: a stat result of the link
+        """
+        source_path = os.path.join(self._source, path)
+        target_path = os.path.join(self._target, path)
+
+        self._remove_existing(target_path)
+        os.symlink(os.readlink(source_path), target_path)
+        self._copy_metadata(source_path, target_path, st, follow_symlinks=False)
+        self._report_copied(0)
+
+    def _copy_special_file(self, path, st):
+        """Copy a device, a named pipe or a socket.
+
+        :param path: a path relative to the image root
+        :param st: a stat result of the file
+        """
+        source_path = os.path.join(self._source, path)
+        target_path = os.path.join(self._target, path)
+
+        self._remove_existing(target_path)
+        os.mknod(target_path, st.st_mode, st.st_rdev)
+        self._copy_metadata(source_path, target_path, st)
+        self._report_copied(0)
+
+    def _copy_hardlink(self, source_path, path):
+        """Create a hardlink to a copied file.
+
+        :param source_path: a path of the copied file relative to the image root
+        :param path: a path of the link relative to the image root
+        """
+        target_path = os.path.join(self._target, path)
+
+        self._remove_existing(target_path)
+        os.link(os.path.join(self._target, source_path), target_path)
+        self._report_copied(0)
+
+    @staticmethod
+    def _copy_metadata(source, target, st, follow_symlinks=True):
+        """Copy the owner, the permissions, xattrs, ACL's and times.
+
+        The owner is changed first, because it resets the set-user-ID
+        bits and file capabilities. ACL's are stored in xattrs.
+
+        :param source: a source path or a file descriptor
+        :param target: a target path or a file descriptor
+        :param st: a stat result of the source
+        :param follow_symlinks: False to copy the metadata of a link
+        """
+        os.chown(target, st.st_uid, st.st_gid, follow_symlinks=follow_symlinks)
+
+        if follow_symlinks:
+            os.chmod(target, stat.S_IMODE(st.st_mode))
+
+        for name in os.listxattr(source, follow_symlinks=follow_symlinks):
+            value = os.getxattr(source, name, follow_symlinks=follow_symlinks)
+            os.setxattr(target, name, value, follow_symlinks=follow_symlinks)
+
+        os.utime(
+            target,
+            ns=(st.st_atime_ns, st.st_mtime_ns),
+            follow_symlinks=follow_symlinks
+        )
+
+    @staticmethod
+    def _remove_existing(path):
+        """Remove an existing file that is not a directory.
+
+        :param path: a path to the file
+        """
+        if os.path.lexists(path) and (os.path.islink(path) or not os.path.isdir(path)):
+            os.unlink(path)
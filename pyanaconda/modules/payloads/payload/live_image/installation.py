@@ -17,27 +17,135 @@
 #
 import glob
 import hashlib
+import itertools
 import os
+import re
 import stat
+import subprocess
+import tempfile
+import threading
 import requests
 import blivet.util
 
+from concurrent.futures import ThreadPoolExecutor
+
 from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.constants import NETWORK_CONNECTION_TIMEOUT
 from pyanaconda.core.i18n import _
-from pyanaconda.core.util import execWithRedirect, requests_session
+from pyanaconda.core.util import execWithRedirect, requests_session, startProgram
 from pyanaconda.core.path import join_paths
 from pyanaconda.core.string import lower_ascii
 from pyanaconda.modules.common.structures.live_image import LiveImageConfigurationData
 from pyanaconda.modules.common.task import Task
 from pyanaconda.modules.common.errors.installation import PayloadInstallationError
 from pyanaconda.modules.payloads.payload.live_image.download_progress import DownloadProgress
+from pyanaconda.modules.payloads.payload.live_image.image_copy import ImageCopyEngine, \
+    ImageCopyError
 from pyanaconda.modules.payloads.payload.live_image.installation_progress import \
-    InstallationProgress
-from pyanaconda.modules.payloads.payload.live_image.utils import get_proxies_from_option
+    PublishedProgress
+from pyanaconda.modules.payloads.payload.live_image.utils import get_proxies_from_option, \
+    get_tar_decompression_options
 
 log = get_module_logger(__name__)
 
+# The size of a chunk of the downloaded image.
+IMAGE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# The size of a segment of the image downloaded by one range request.
+IMAGE_DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024
+
+# The maximal number of parallel connections for the image download.
+IMAGE_DOWNLOAD_CONNECTIONS = 4
+
+# The number of attempts to resume an interrupted download of a segment.
+IMAGE_DOWNLOAD_RETRIES = 3
+
+# The size of a buffer for the checksum calculation of a local image.
+IMAGE_CHECKSUM_BUFFER_SIZE = 16 * 1024 * 1024
+
+# The size of a header used to detect the compression of a tarball.
+TAR_HEADER_SIZE = 512
+
+# The progress line of rsync --info=progress2, for example:
+#     1,234,567  42%   12.34MB/s    0:00:12 (xfr#123, ir-chk=1000/5678)
+RSYNC_PROGRESS_PATTERN = re.compile(r"^\s*([\d,.]+)\s+\d+%(?:.*xfr#(\d+))?")
+
+# The paths in the image that are not installed.
+IMAGE_EXCLUDED_PATHS = [
+    "/dev/",
+    "/proc/",
+    "/tmp/*",
+    "/sys/",
+    "/run/",
+    "/boot/*rescue*",
+    "/boot/loader/",
+    "/boot/efi/loader/",
+    "/etc/machine-id",
+    "/etc/machine-info",
+]
+
+
+class ChecksumCalculator(object):
+    """Calculate a checksum of an image while it is being downloaded.
+
+    The checksum is updated with the downloaded chunks in the order
+    of their positions in the image. Chunks that arrive too early are
+    read back from the image file once the preceding data is hashed.
+    """
+
+    def __init__(self, fd=None, algorithm="sha256"):
+        """Create a new calculator.
+
+        :param fd: a file descriptor of the image file or None
+        :param algorithm: a name of the hash algorithm
+        """
+        self._fd = fd
+        self._hash = hashlib.new(algorithm)
+        self._position = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def position(self):
+        """The number of hashed bytes."""
+        return self._position
+
+    def update(self, offset, data):
+        """Update the checksum with a chunk of the image.
+
+        :param int offset: a position of the chunk in the image
+        :param bytes data: a content of the chunk
+        """
+        with self._lock:
+            if offset != self._position:
+                self._pending[offset] = len(data)
+                return
+
+            self._hash.update(data)
+            self._position += len(data)
+            self._hash_pending_chunks()
+
+    def _hash_pending_chunks(self):
+        """Hash the written chunks that follow the hashed data."""
+        while self._position in self._pending:
+            size = self._pending.pop(self._position)
+
+            while size > 0:
+                data = os.pread(self._fd, min(size, IMAGE_DOWNLOAD_CHUNK_SIZE), self._position)
+                self._hash.update(data)
+                self._position += len(data)
+                size -= len(data)
+
+    def hexdigest(self):
+        """Get the calculated checksum.
+
+        :return: a string with the checksum
+        """
+        with self._lock:
+            return self._hash.hexdigest()
+
+
 
 class DownloadImageTask(Task):
     """Task to download an image."""
@@ -54,12 +162,25 @@ class DownloadImageTask(Task):
         self._proxy = configuration.proxy
         self._ssl_verify = configuration.ssl_verification_enabled
         self._download_path = download_path
+        self._verify_checksum = bool(configuration.checksum)
+        self._checksum_calculator = None
 
     @property
     def name(self):
         """Name of the task."""
         return "Download an image"
 
+    @property
+    def checksum(self):
+        """The sha256 checksum calculated during the download.
+
+        :return: a string with the checksum or None
+        """
+        if not self._checksum_calculator:
+            return None
+
+        return self._checksum_calculator.hexdigest()
+
     def run(self):
         """Run the task.
 
@@ -81,7 +202,7 @@ class DownloadImageTask(Task):
                 response = self._send_request(session)
 
                 # Download the image to a file.
-                self._download_image(response)
+                self._download_image(session, response)
 
             except requests.exceptions.RequestException as e:
                 raise PayloadInstallationError(
@@ -105,31 +226,70 @@ class DownloadImageTask(Task):
         response.raise_for_status()
         return response
 
-    def _download_image(self, response):
-        """Download the image to a file."""
+    def _download_image(self, session, response):
+        """Download the image to a file.
+
+        Download the image in parallel segments if the server supports
+        range requests. Otherwise, stream the image to the file.
+        """
+        total_size = self._get_content_length(response)
+
+        if total_size and self._accepts_ranges(response):
+            response.close()
+            self._segmented_download(session, int(total_size))
+            return
+
         # Handle no content length header.
-        if not self._get_content_length(response):
+        if not total_size:
             download = self._direct_download
         else:
             download = self._stream_download
 
         # Download the image to a file.
-        with open(self._download_path, "wb") as image_file:
+        with open(self._download_path, "w+b") as image_file:
+            self._create_checksum_calculator(image_file.fileno())
             download(response, image_file)
 
+    def _create_checksum_calculator(self, fd):
+        """Create a calculator of the image checksum if it is required.
+
+        :param fd: a file descriptor of the image file
+        """
+        if self._verify_checksum:
+            self._checksum_calculator = ChecksumCalculator(fd)
+
+    def _update_checksum(self, offset, data):
+        """Update the image checksum with a downloaded chunk.
+
+        :param int offset: a position of the chunk in the image
+        :param bytes data: a content of the chunk
+        """
+        if self._checksum_calculator:
+            self._checksum_calculator.update(offset, data)
+
     def _get_content_length(self, response):
         """Get the content length value."""
         return response.headers.get('content-length')
 
+    def _accepts_ranges(self, response):
+        """Does the server accept range requests?"""
+        return response.headers.get('accept-ranges', '').lower() == 'bytes'
+
     def _direct_download(self, response, image_file):
-        """Download the image at once."""
+        """Download the image of unknown size in 1 MB chunks."""
         log.warning(
             "content-length header is missing for the installation "
             "image, download progress reporting will not be available"
         )
 
         self.report_progress(_("Downloading {}").format(self._url))
-        image_file.write(response.content)
+        downloaded_size = 0
+
+        for chunks in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
+            image_file.write(chunks)
+            self._update_checksum(downloaded_size, chunks)
+            downloaded_size += len(chunks)
+
         log.debug("Downloaded %s.", self._url)
 
     def _stream_download(self, response, image_file):
@@ -145,32 +305,155 @@ class DownloadImageTask(Task):
         progress.start()
         downloaded_size = 0
 
-        for chunks in response.iter_content(1024 * 1024):
+        for chunks in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
             if not chunks:
                 continue
 
             image_file.write(chunks)
-            image_file.flush()
+            self._update_checksum(downloaded_size, chunks)
 
             downloaded_size += len(chunks)
             progress.update(downloaded_size)
 
         progress.end()
 
+    def _segmented_download(self, session, total_size):
+        """Download the image in parallel segments.
+
+        Every segment is downloaded by a range request over a pool
+        of connections and written to its position in the file. An
+        interrupted segment is resumed from the last written byte.
+
+        :param session: a requests session with the connection pool
+        :param int total_size: a size of the image in bytes
+        """
+        segments = [
+            (start, min(start + IMAGE_DOWNLOAD_SEGMENT_SIZE, total_size))
+            for start in range(0, total_size, IMAGE_DOWNLOAD_SEGMENT_SIZE)
+        ]
+        workers = min(IMAGE_DOWNLOAD_CONNECTIONS, len(segments))
+
+        progress = DownloadProgress(
+            url=self._url,
+            callback=self.report_progress,
+            total_size=total_size,
+        )
+
+        lock = threading.Lock()
+        downloaded = [0]
+
+        def update_progress(size):
+            with lock:
+                downloaded[0] += size
+                progress.update(downloaded[0])
+
+        log.debug("Downloading %s in %d segments over %d connections.",
+                  self._url, len(segments), workers)
+
+        progress.start()
+        cancelled = threading.Event()
+
+        try:
+            with open(self._download_path, "w+b") as image_file:
+                image_file.truncate(total_size)
+                self._create_checksum_calculator(image_file.fileno())
+                executor = ThreadPoolExecutor(workers)
+
+                try:
+                    futures = [
+                        executor.submit(
+                            self._download_segment,
+                            session, image_file.fileno(), start, end, update_progress,
+                            cancelled
+                        )
+                        for start, end in segments
+                    ]
+
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    # Don't download the rest of the image if a segment fails.
+                    cancelled.set()
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+                executor.shutdown(wait=True)
+        finally:
+            progress.end()
+
+    def _download_segment(self, session, fd, start, end, callback, cancelled=None):
+        """Download a segment of the image.
+
+        :param session: a requests session
+        :param fd: a file descriptor of the image file
+        :param int start: the first byte of the segment
+        :param int end: the end of the segment (exclusive)
+        :param callback: a function called with a size of every written chunk
+        :param cancelled: an event that stops the download or None
+        """
+        proxies = get_proxies_from_option(self._proxy)
+        attempt = 0
+
+        while start < end:
+            try:
+                with session.get(
+                    url=self._url,
+                    proxies=proxies,
+                    verify=self._ssl_verify,
+                    stream=True,
+                    timeout=NETWORK_CONNECTION_TIMEOUT,
+                    headers={"Range": "bytes={}-{}".format(start, end - 1)},
+                ) as response:
+                    response.raise_for_status()
+
+                    if response.status_code != requests.codes.partial_content:
+                        raise PayloadInstallationError(
+                            "The server doesn't support range requests."
+                        )
+
+                    for chunks in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
+                        if cancelled and cancelled.is_set():
+                            return
+
+                        chunks = chunks[:end - start]
+                        os.pwrite(fd, chunks, start)
+                        self._update_checksum(start, chunks)
+                        start += len(chunks)
+                        callback(len(chunks))
+
+                if start < end:
+                    raise requests.exceptions.ConnectionError(
+                        "The segment is incomplete."
+                    )
+
+            except requests.exceptions.RequestException as e:
+                attempt += 1
+
+                if attempt > IMAGE_DOWNLOAD_RETRIES:
+                    raise
+
+                log.warning("Resuming the download from the byte %d: %s", start, e)
+
 
 class VerifyImageChecksumTask(Task):
     """Task to verify the checksum of the downloaded image."""
 
-    def __init__(self, configuration: LiveImageConfigurationData, image_path):
+    def __init__(self, configuration: LiveImageConfigurationData, image_path,
+                 calculated_checksum=None):
         """Create a new task.
 
+        The checksum calculated during the download of the image
+        can be provided to avoid another pass over the image.
+
         :param configuration: a configuration of a remote image
         :type configuration: an instance of LiveImageConfigurationData
         :param image_path: a path to the image
+        :param calculated_checksum: a precomputed sha256 checksum or None
         """
         super().__init__()
         self._image_path = image_path
         self._checksum = configuration.checksum
+        self._calculated_checksum = calculated_checksum
 
     @property
     def name(self):
@@ -184,7 +467,12 @@ class VerifyImageChecksumTask(Task):
 
         self.report_progress(_("Checking image checksum"))
         expected_checksum = self._normalize_checksum(self._checksum)
-        calculated_checksum = self._calculate_checksum(self._image_path)
+        calculated_checksum = self._calculated_checksum
+
+        if calculated_checksum:
+            log.debug("Using the checksum calculated during the download.")
+        else:
+            calculated_checksum = self._calculate_checksum(self._image_path)
 
         if expected_checksum != calculated_checksum:
             log.error("'%s' does not match '%s'", calculated_checksum, expected_checksum)
@@ -199,15 +487,22 @@ class VerifyImageChecksumTask(Task):
 
     @staticmethod
     def _calculate_checksum(file_path):
-        """Calculate the file checksum."""
+        """Calculate the file checksum.
+
+        Read the file sequentially into one large reusable buffer.
+        """
         sha256 = hashlib.sha256()
+        buffer = bytearray(IMAGE_CHECKSUM_BUFFER_SIZE)
+        view = memoryview(buffer)
+
+        with open(file_path, "rb", buffering=0) as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
 
-        with open(file_path, "rb") as f:
             while True:
-                data = f.read(1024 * 1024)
-                if not data:
+                size = f.readinto(buffer)
+                if not size:
                     break
-                sha256.update(data)
+                sha256.update(view[:size])
 
         checksum = sha256.hexdigest()
         log.debug("sha256 of %s: %s", file_path, checksum)
@@ -321,32 +616,39 @@ class InstallFromTarTask(Task):
         return "Install the payload from a tarball"
 
     @property
-    def _installation_size(self):
-        """The installation size of the archive.
+    def _tarball_size(self):
+        """The size of the archive.
 
-        Use 2x the archive's size to estimate the size of the install.
+        The progress is measured by the size of the archive
+        that was passed to tar.
 
         :return: a size in bytes
         """
-        return os.stat(self._tarfile)[stat.ST_SIZE] * 2
+        return os.stat(self._tarfile)[stat.ST_SIZE]
 
     def run(self):
         """Run the task."""
-        with self._monitor_progress():
-            self._install_tar()
-
-    def _monitor_progress(self):
-        """Get a progress monitor."""
-        return InstallationProgress(
-            sysroot=self._sysroot,
+        progress = PublishedProgress(
+            installation_size=self._tarball_size,
             callback=self.report_progress,
-            installation_size=self._installation_size,
         )
 
-    def _install_tar(self):
+        with open(self._tarfile, "rb") as tarball:
+            chunks = iter(lambda: tarball.read(IMAGE_DOWNLOAD_CHUNK_SIZE), b"")
+            self._install_tar(chunks, progress)
+
+    def _install_tar(self, chunks, progress):
         """Run installation of the payload from a tarball.
 
         Preserve ACL's, xattrs, and SELinux context.
+
+        The tarball is passed to the standard input of tar,
+        so the progress is given by the size of passed data.
+        The tarball is decompressed by a multithreaded program
+        if it is available.
+
+        :param chunks: an iterable of chunks of the tarball
+        :param progress: an instance of PublishedProgress
         """
         cmd = "tar"
         args = [
@@ -365,16 +667,144 @@ class InstallFromTarTask(Task):
             "--exclude", "./boot/efi/loader",
             "--exclude", "./etc/machine-id",
             "--exclude", "./etc/machine-info",
-            "-xaf", self._tarfile,
-            "-C", self._sysroot
+            "-C", self._sysroot,
         ]
 
         try:
-            execWithRedirect(cmd, args)
+            header, chunks = self._read_header(chunks)
+            args.extend(get_tar_decompression_options(header))
+            args.extend(["-xf", "-"])
+
+            self._run_tar([cmd] + args, chunks, progress)
         except (OSError, RuntimeError) as e:
             msg = "Failed to install tar: {}".format(e)
             raise PayloadInstallationError(msg) from None
 
+    @staticmethod
+    def _read_header(chunks):
+        """Read the header of the tarball.
+
+        :param chunks: an iterable of chunks of the tarball
+        :return: a tuple with the header and an iterator of all chunks
+        """
+        chunks = iter(chunks)
+        header = b""
+
+        for chunk in chunks:
+            header += chunk
+
+            if len(header) >= TAR_HEADER_SIZE:
+                break
+
+        return header, itertools.chain([header], chunks)
+
+    def _run_tar(self, argv, chunks, progress):
+        """Run tar and pass the tarball to its standard input.
+
+        :param argv: a command to run
+        :param chunks: an iterable of chunks of the tarball
+        :param progress: an instance of PublishedProgress
+        """
+        with tempfile.TemporaryFile() as output:
+            proc = startProgram(argv, stdin=subprocess.PIPE, stdout=output)
+            passed_size = 0
+
+            try:
+                for chunk in chunks:
+                    proc.stdin.write(chunk)
+                    passed_size += len(chunk)
+                    progress.publish(None, passed_size)
+
+                proc.stdin.close()
+            except BrokenPipeError:
+                log.error("The tar process has ended prematurely.")
+                proc.wait()
+                raise RuntimeError("tar exited with code {}".format(proc.returncode)) from None
+            except BaseException:
+                # The tarball couldn't be read.
+                proc.kill()
+                proc.wait()
+                raise
+
+            rc = proc.wait()
+            output.seek(0)
+
+            for line in output.read().decode("utf-8", "replace").splitlines():
+                log.info(line)
+
+            log.debug("tar exited with code %s.", rc)
+
+
+class InstallFromTarStreamTask(InstallFromTarTask):
+    """Task to install the payload from a tarball streamed from the network."""
+
+    def __init__(self, sysroot, configuration: LiveImageConfigurationData):
+        """Create a new task.
+
+        The tarball is extracted while it is downloaded, so it is
+        never stored on the disk. Its checksum can't be verified
+        before the extraction, so the checksum of the configuration
+        is not supported.
+
+        :param sysroot: a path to the system root
+        :param configuration: a configuration of a remote tarball
+        :type configuration: an instance of LiveImageConfigurationData
+        """
+        super().__init__(sysroot, tarfile=None)
+        self._url = configuration.url
+        self._proxy = configuration.proxy
+        self._ssl_verify = configuration.ssl_verification_enabled
+
+    @property
+    def name(self):
+        """The name of the task."""
+        return "Install the payload from a streamed tarball"
+
+    def run(self):
+        """Run the task."""
+        log.info("Streaming the tarball from %s...", self._url)
+
+        with requests_session() as session:
+            try:
+                response = session.get(
+                    url=self._url,
+                    proxies=get_proxies_from_option(self._proxy),
+                    verify=self._ssl_verify,
+                    stream=True,
+                    timeout=NETWORK_CONNECTION_TIMEOUT,
+                )
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                raise PayloadInstallationError(
+                    "Error while downloading the image: {}".format(e)
+                ) from e
+
+            total_size = int(response.headers.get('content-length') or 0)
+
+            if not total_size:
+                log.warning(
+                    "content-length header is missing for the installation "
+                    "image, installation progress reporting will not be available"
+                )
+
+            progress = PublishedProgress(
+                installation_size=total_size,
+                callback=self.report_progress,
+            )
+
+            with response:
+                self._install_tar(self._read_stream(response), progress)
+
+    def _read_stream(self, response):
+        """Read the tarball from the response.
+
+        :param response: a response with the tarball
+        :return: a generator of chunks of the tarball
+        """
+        yield from response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE)
+
+        log.debug("Downloaded %s.", self._url)
+
 
 class InstallFromImageTask(Task):
     """Task to install the payload from image."""
@@ -405,18 +835,38 @@ class InstallFromImageTask(Task):
 
     def run(self):
         """Run the task."""
-        with self._monitor_progress():
-            self._install_image()
-
-    def _monitor_progress(self):
-        """Get a progress monitor."""
-        return InstallationProgress(
-            sysroot=self._sysroot,
-            callback=self.report_progress,
+        progress = PublishedProgress(
             installation_size=self._installation_size,
+            callback=self.report_progress,
         )
 
-    def _install_image(self):
+        if conf.payload.native_image_installation:
+            self._copy_image(progress)
+        else:
+            self._install_image(progress)
+
+    def _copy_image(self, progress):
+        """Run installation of the payload from image in this process.
+
+        Copy the same content as rsync with a pool of threads.
+        The progress is reported by the copy engine.
+
+        :param progress: an instance of PublishedProgress
+        """
+        engine = ImageCopyEngine(
+            source=self._mount_point,
+            target=self._sysroot,
+            excluded_paths=IMAGE_EXCLUDED_PATHS,
+            callback=progress.publish,
+        )
+
+        try:
+            engine.run()
+        except (OSError, ImageCopyError) as e:
+            msg = "Failed to install image: {}".format(e)
+            raise PayloadInstallationError(msg) from None
+
+    def _install_image(self, progress):
         """Run installation of the payload from image.
 
         Preserve permissions, owners, groups, ACL's, xattrs, times,
@@ -425,27 +875,29 @@ class InstallFromImageTask(Task):
 
         Use a trailing slash on the source directory to copy the content
         instead of the directory itself. See `man rsync`.
+
+        The progress is given by the transferred files and bytes
+        that are reported by rsync.
+
+        :param progress: an instance of PublishedProgress
         """
         cmd = "rsync"
-        args = [
-            "-pogAXtlHrDx",
-            "--stats",
-            "--exclude", "/dev/",
-            "--exclude", "/proc/",
-            "--exclude", "/tmp/*",
-            "--exclude", "/sys/",
-            "--exclude", "/run/",
-            "--exclude", "/boot/*rescue*",
-            "--exclude", "/boot/loader/",
-            "--exclude", "/boot/efi/loader/",
-            "--exclude", "/etc/machine-id",
-            "--exclude", "/etc/machine-info",
+        args = ["-pogAXtlHrDx", "--stats", "--info=progress2"]
+
+        for path in IMAGE_EXCLUDED_PATHS:
+            args.extend(["--exclude", path])
+
+        args.extend([
             os.path.normpath(self._mount_point) + "/",
             self._sysroot
-        ]
+        ])
 
         try:
-            rc = execWithRedirect(cmd, args)
+            rc = execWithRedirect(
+                cmd, args,
+                log_output=False,
+                callback=lambda line: self._publish_rsync_progress(line, progress)
+            )
         except (OSError, RuntimeError) as e:
             msg = "Failed to install image: {}".format(e)
             raise PayloadInstallationError(msg) from None
@@ -456,6 +908,26 @@ class InstallFromImageTask(Task):
                 "{} exited with code {}".format(cmd, rc)
             )
 
+    @staticmethod
+    def _publish_rsync_progress(line, progress):
+        """Publish the progress reported by rsync.
+
+        Other lines of the output are logged.
+
+        :param line: a line of the rsync output
+        :param progress: an instance of PublishedProgress
+        """
+        match = RSYNC_PROGRESS_PATTERN.match(line)
+
+        if not match:
+            if line.strip():
+                log.info(line)
+            return
+
+        processed_size = int(re.sub(r"\D", "", match.group(1)))
+        processed_files = int(match.group(2) or progress.processed_files)
+        progress.publish(processed_files, processed_size)
+
 
 class RemoveImageTask(Task):
     """Task to remove the downloaded image."""
@@ -15,109 +15,163 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
-import os
+import threading
 import time
 
 from blivet.size import Size
 
 from pyanaconda.anaconda_loggers import get_module_logger
-from pyanaconda.core.constants import THREAD_LIVE_PROGRESS
 from pyanaconda.core.i18n import _
-from pyanaconda.core.path import join_paths
-from pyanaconda.modules.common.constants.objects import DEVICE_TREE
-from pyanaconda.modules.common.constants.services import STORAGE
-from pyanaconda.modules.common.task.cancellable import Cancellable
-from pyanaconda.threading import threadMgr, AnacondaThread
 
 log = get_module_logger(__name__)
 
-__all__ = ["InstallationProgress"]
+__all__ = ["PublishedProgress", "ThroughputEstimator"]
 
 
-class InstallationProgress(Cancellable):
-    """Progress monitor of the image installation."""
+class ThroughputEstimator(object):
+    """Estimator of the remaining time based on the measured throughput.
 
-    def __init__(self, sysroot, installation_size, callback):
-        """Create a new installation progress.
+    The throughput is smoothed by the exponential moving average, so
+    short stalls and bursts don't change the estimate too much.
+    """
 
-        :param sysroot: a path to the system root
-        :param installation_size: a size of the installed payload
-        :param callback: a function for the progress reporting
-        """
-        super().__init__()
-        self._sysroot = sysroot
-        self._installation_size = installation_size
-        self._callback = callback
-        self._thread_name = THREAD_LIVE_PROGRESS
-
-    def __enter__(self):
-        """Start to monitor the progress."""
-        # Start the thread.
-        threadMgr.add(AnacondaThread(
-            name=self._thread_name,
-            target=self._monitor_progress
-        ))
+    def __init__(self, total_size, smoothing=0.2, interval=1.0):
+        """Create a new estimator.
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Stop to monitor the progress."""
-        # Cancel the progress reporting.
-        self.cancel()
+        :param total_size: a total size to process in bytes
+        :param smoothing: a weight of the latest measurement
+        :param interval: a minimal time between measurements in seconds
+        """
+        self._total_size = total_size
+        self._smoothing = smoothing
+        self._interval = interval
+        self._last_time = None
+        self._last_size = 0
+        self._processed_size = 0
+        self._throughput = None
+
+    @property
+    def throughput(self):
+        """The measured throughput in bytes per second or None."""
+        return self._throughput
+
+    @property
+    def remaining_time(self):
+        """The estimated remaining time in seconds or None."""
+        if not self._throughput:
+            return None
+
+        remaining_size = max(self._total_size - self._processed_size, 0)
+        return remaining_size / self._throughput
+
+    def update(self, processed_size, now=None):
+        """Update the estimator with the processed size.
+
+        :param processed_size: a processed size in bytes
+        :param now: the current monotonic time or None
+        """
+        now = time.monotonic() if now is None else now
+        self._processed_size = processed_size
 
-        # Wait for the thread to finish.
-        threadMgr.wait(self._thread_name)
+        if self._last_time is None:
+            self._last_time = now
+            self._last_size = processed_size
+            return
 
-    def _monitor_progress(self):
-        """Monitor the amount of disk space used on the target and source."""
-        log.debug("Installing %s.", Size(self._installation_size))
+        elapsed = now - self._last_time
 
-        # Force write everything to disk.
-        self._callback(_("Synchronizing writes to disk"))
-        os.sync()
+        if elapsed < self._interval:
+            return
 
-        # Calculate the starting size used by the system.
-        mount_points = self._get_mount_points()
-        starting_size = self._calculate_used_size(mount_points)
-        log.debug("Used %s by %s.", Size(starting_size), ", ".join(mount_points))
+        throughput = (processed_size - self._last_size) / elapsed
 
-        pct = 0
-        last_pct = -1
+        if self._throughput is None:
+            self._throughput = throughput
+        else:
+            self._throughput = self._smoothing * throughput \
+                + (1 - self._smoothing) * self._throughput
 
-        while pct < 100 and not self.check_cancel():
-            # Calculate the installed size used by the system.
-            current_size = self._calculate_used_size(mount_points)
-            installed_size = current_size - starting_size
+        self._last_time = now
+        self._last_size = processed_size
 
-            # Report the progress message.
-            pct = min(int(100 * installed_size / self._installation_size), 100)
 
-            if pct != last_pct:
-                log.debug("Installed %s (%s%%)", Size(installed_size), pct)
-                self._callback(_("Installing software {}%").format(pct))
+class PublishedProgress(object):
+    """Progress of the image installation published by the installation engine.
 
-            last_pct = pct
-            time.sleep(0.777)
+    The engine that copies or extracts the image publishes the number of
+    processed bytes and, if it knows it, the number of processed files, so
+    the progress is exact and it doesn't have to be measured on the target
+    file systems.
+    """
 
-    def _get_mount_points(self):
-        """Get mount points in the device tree.
+    def __init__(self, installation_size, callback):
+        """Create a new installation progress.
 
-        :return: a list of mount points
+        :param installation_size: a size of the installed payload in bytes or 0
+        :param callback: a function for the progress reporting
         """
-        device_tree = STORAGE.get_proxy(DEVICE_TREE)
-        mount_points = device_tree.GetMountPoints()
-        return [join_paths(self._sysroot, m) for m in mount_points]
+        self._installation_size = installation_size
+        self._callback = callback
+        self._estimator = ThroughputEstimator(installation_size)
+        self._lock = threading.Lock()
+        self._processed_files = 0
+        self._processed_size = 0
+        self._last_pct = -1
 
-    def _calculate_used_size(self, mount_points):
-        """Calculate the total used size of the mount points.
+    @property
+    def processed_files(self):
+        """The number of processed files or None if it is unknown."""
+        return self._processed_files
 
-        :return: a size in bytes
-        """
-        total = 0
+    @property
+    def processed_size(self):
+        """The number of processed bytes."""
+        return self._processed_size
 
-        for path in mount_points:
-            if not os.path.exists(path):
-                continue
+    def publish(self, processed_files, processed_size):
+        """Publish the current state of the installation.
 
-            stat = os.statvfs(path)
-            total += stat.f_frsize * (stat.f_blocks - stat.f_bfree)
+        This method can be called from any thread.
 
-        return total
+        :param processed_files: a number of processed files or None
+        :param processed_size: a number of processed bytes
+        """
+        with self._lock:
+            self._processed_files = processed_files
+            self._processed_size = processed_size
+            self._estimator.update(processed_size)
+            self._report_progress()
+
+    def _report_progress(self):
+        """Report the progress if the percentage has changed."""
+        if not self._installation_size:
+            # The installation size is unknown.
+            if self._last_pct < 0:
+                self._last_pct = 0
+                self._callback(_("Installing software"))
+            return
+
+        pct = min(int(100 * self._processed_size / max(self._installation_size, 1)), 100)
+
+        if pct == self._last_pct:
+            return
+
+        self._last_pct = pct
+        remaining_time = self._estimator.remaining_time
+
+        if self._processed_files is None:
+            log.debug("Installed %s (%s%%)", Size(self._processed_size), pct)
+        else:
+            log.debug(
+                "Installed %d files and %s (%s%%)",
+                self._processed_files, Size(self._processed_size), pct
+            )
+
+        if remaining_time is None or pct == 100:
+            self._callback(_("Installing software {}%").format(pct))
+            return
+
+        minutes, seconds = divmod(int(remaining_time), 60)
+        self._callback(_("Installing software {}% ({}:{:02d} remaining)").format(
+            pct, minutes, seconds
+        ))
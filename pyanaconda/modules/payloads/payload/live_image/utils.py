@@ -15,6 +15,7 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import shutil
 import tarfile
 
 from pyanaconda.anaconda_loggers import get_module_logger
@@ -23,6 +24,22 @@ from pyanaconda.modules.payloads.base.utils import sort_kernel_version_list
 
 log = get_module_logger(__name__)
 
+# Signatures of compressed tarballs and the tar options to decompress them.
+TAR_COMPRESSION_OPTIONS = [
+    (b"\x1f\x8b", "--gzip"),
+    (b"\xfd7zXZ\x00", "--xz"),
+    (b"BZh", "--bzip2"),
+    (b"\x28\xb5\x2f\xfd", "--zstd"),
+    (b"\x5d\x00\x00", "--lzma"),
+]
+
+# Multithreaded decompressors that can replace the tar options.
+TAR_PARALLEL_DECOMPRESSORS = {
+    "--gzip": ["pigz"],
+    "--xz": ["xz -T0"],
+    "--bzip2": ["lbzip2", "pbzip2"],
+}
+
 
 def get_kernel_version_list_from_tar(tarfile_path):
     with tarfile.open(tarfile_path) as archive:
@@ -38,6 +55,39 @@ def get_kernel_version_list_from_tar(tarfile_path):
     return kernel_version_list
 
 
+def get_tar_compression_option(header):
+    """Get the tar option to decompress a tarball with the given header.
+
+    :param bytes header: the first bytes of the tarball
+    :return: a tar option or None if the tarball is not compressed
+    """
+    for signature, option in TAR_COMPRESSION_OPTIONS:
+        if header.startswith(signature):
+            return option
+
+    return None
+
+
+def get_tar_decompression_options(header):
+    """Get the tar options to decompress a tarball with the given header.
+
+    Prefer a multithreaded decompressor if it is available.
+
+    :param bytes header: the first bytes of the tarball
+    :return: a list of tar options
+    """
+    option = get_tar_compression_option(header)
+
+    if not option:
+        return []
+
+    for program in TAR_PARALLEL_DECOMPRESSORS.get(option, []):
+        if shutil.which(program.split()[0]):
+            return ["--use-compress-program", program]
+
+    return [option]
+
+
 def get_local_image_path_from_url(url):
     image_path = ""
     if url.startswith("file://"):
@@ -67,15 +67,16 @@ class InstallLiveImageTask(Task):
 
         Download, verify and mount the image.
         """
-        task = DownloadImageTask(
+        download_task = DownloadImageTask(
             configuration=self._configuration,
             download_path=self._download_path
         )
-        image_path = self._run_task(task)
+        image_path = self._run_task(download_task)
 
         task = VerifyImageChecksumTask(
             configuration=self._configuration,
-            image_path=image_path
+            image_path=image_path,
+            calculated_checksum=download_task.checksum
         )
         self._run_task(task)
 
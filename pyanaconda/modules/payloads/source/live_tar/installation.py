@@ -15,11 +15,17 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+from pyanaconda.anaconda_loggers import get_module_logger
+from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.modules.common.task import Task
 from pyanaconda.modules.common.structures.live_image import LiveImageConfigurationData
 from pyanaconda.modules.payloads.payload.live_image.installation import DownloadImageTask, \
-    VerifyImageChecksumTask, RemoveImageTask, InstallFromTarTask
-from pyanaconda.modules.payloads.payload.live_image.utils import get_kernel_version_list_from_tar
+    VerifyImageChecksumTask, RemoveImageTask, InstallFromTarTask, InstallFromTarStreamTask
+from pyanaconda.modules.payloads.payload.live_image.utils import \
+    get_kernel_version_list_from_tar, get_local_image_path_from_url
+from pyanaconda.modules.payloads.payload.live_os.utils import get_kernel_version_list
+
+log = get_module_logger(__name__)
 
 __all__ = ["InstallLiveTarTask"]
 
@@ -51,6 +57,10 @@ class InstallLiveTarTask(Task):
 
         :return: a list of kernel versions
         """
+        if self._is_streamed():
+            self._stream_tarball()
+            return self._kernel_version_list
+
         self._set_up_tarball()
         self._collect_kernels()
         self._install_tarball()
@@ -58,20 +68,52 @@ class InstallLiveTarTask(Task):
 
         return self._kernel_version_list
 
+    def _is_streamed(self):
+        """Should be the tarball streamed from the network?
+
+        The checksum of a tarball has to be verified before the tarball
+        is extracted, so tarballs with a checksum are never streamed.
+        """
+        if not conf.payload.streamed_tarball_installation:
+            return False
+
+        if get_local_image_path_from_url(self._configuration.url):
+            return False
+
+        if self._configuration.checksum:
+            log.debug("The tarball has a checksum. It will be downloaded and verified first.")
+            return False
+
+        return True
+
+    def _stream_tarball(self):
+        """Download and install the tarball at once.
+
+        The kernels are collected from the installed system.
+        """
+        task = InstallFromTarStreamTask(
+            sysroot=self._sysroot,
+            configuration=self._configuration
+        )
+        self._run_task(task)
+
+        self._kernel_version_list = get_kernel_version_list(self._sysroot)
+
     def _set_up_tarball(self):
         """Set up the tarball for the installation.
 
         Download and verify the tarball.
         """
-        task = DownloadImageTask(
+        download_task = DownloadImageTask(
             configuration=self._configuration,
             download_path=self._download_path
         )
-        self._tarball_path = self._run_task(task)
+        self._tarball_path = self._run_task(download_task)
 
         task = VerifyImageChecksumTask(
             configuration=self._configuration,
-            image_path=self._tarball_path
+            image_path=self._tarball_path,
+            calculated_checksum=download_task.checksum
         )
         self._run_task(task)
 
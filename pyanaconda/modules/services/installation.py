@@ -18,7 +18,8 @@
 import os
 from configparser import ConfigParser
 
-from pyanaconda.core.service import enable_service, disable_service, is_service_installed
+from pyanaconda.core.service import enable_service, disable_service, is_service_installed, \
+    enable_services, disable_services
 from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.path import touch
 from pyanaconda.core.util import get_anaconda_version_string
@@ -162,13 +163,13 @@ class ConfigureServicesTask(Task):
         return "Configure services"
 
     def run(self):
-        for service_name in self._disabled_services:
-            log.debug("Disabling service: %s.", service_name)
-            disable_service(service_name, root=self._sysroot)
+        if self._disabled_services:
+            log.debug("Disabling services: %s.", ", ".join(self._disabled_services))
+            disable_services(self._disabled_services, root=self._sysroot)
 
-        for service_name in self._enabled_services:
-            log.debug("Enabling service: %s.", service_name)
-            enable_service(service_name, root=self._sysroot)
+        if self._enabled_services:
+            log.debug("Enabling services: %s.", ", ".join(self._enabled_services))
+            enable_services(self._enabled_services, root=self._sysroot)
 
 
 class ConfigureSystemdDefaultTargetTask(Task):
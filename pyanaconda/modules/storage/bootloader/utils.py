@@ -16,12 +16,14 @@
 # Red Hat, Inc.
 #
 import os
+import shutil
 from glob import glob
 
 from pyanaconda.modules.common.errors.installation import BootloaderInstallationError
 from pyanaconda.modules.storage.bootloader.image import LinuxBootLoaderImage
 from pyanaconda.core.configuration.anaconda import conf
-from pyanaconda.core.util import execWithRedirect
+from pyanaconda.core.path import make_directories
+from pyanaconda.core.util import execWithRedirect, execConcurrently
 from pyanaconda.product import productName
 
 from pyanaconda.anaconda_loggers import get_module_logger
@@ -30,6 +32,13 @@ log = get_module_logger(__name__)
 __all__ = ["configure_boot_loader", "install_boot_loader", "recreate_initrds",
            "create_rescue_images"]
 
+# The maximal number of initrds generated at the same time. Every
+# dracut job needs a lot of memory and disk space, so don't use all CPUs.
+INITRD_WORKERS = 4
+
+# The directory for temporary files of dracut jobs in the target system.
+INITRD_TMP_DIR = "/var/tmp/anaconda-dracut"
+
 
 def create_rescue_images(sysroot, kernel_versions):
     """Create the rescue initrd images for each installed kernel."""
@@ -262,6 +271,9 @@ def recreate_initrds(sysroot, kernel_versions):
     This needs to be done after all configuration files have been
     written, since dracut depends on some of them.
 
+    The dracut jobs of different kernels are independent, so they
+    run at the same time. Every job uses its own temporary directory.
+
     :param sysroot: a path to the root of the installed system
     :param kernel_versions: a list of kernel versions
     """
@@ -271,34 +283,69 @@ def recreate_initrds(sysroot, kernel_versions):
         log.debug("new-kernel-pkg does not exist, using dracut instead")
         use_dracut = True
 
+    if not conf.target.is_image and not use_dracut:
+        # The new-kernel-pkg script updates the boot loader configuration,
+        # so it cannot run for several kernels at the same time.
+        for kernel in kernel_versions:
+            log.info("Recreating initrd for %s", kernel)
+            execWithRedirect(
+                "new-kernel-pkg",
+                ["--mkinitrd", "--dracut", "--depmod", "--update", kernel],
+                root=sysroot
+            )
+        return
+
+    if not conf.target.is_image:
+        # Generate the module dependencies of all kernels before
+        # the dracut jobs, so they don't have to wait for it.
+        log.info("Generating module dependencies for %s", ", ".join(kernel_versions))
+        _run_jobs(sysroot, kernel_versions, [
+            ("depmod", ["-a", kernel]) for kernel in kernel_versions
+        ])
+
+    jobs = []
+
     for kernel in kernel_versions:
         log.info("Recreating initrd for %s", kernel)
+        args = ["--tmpdir", _get_initrd_tmp_dir(kernel)]
 
         if conf.target.is_image:
             # Dracut runs in the host-only mode by default, so we need to
             # turn it off by passing the -N option, because the mode is not
             # sensible for disk image installations. Using /dev/disk/by-uuid/
             # is necessary due to disk image naming.
-            execWithRedirect(
-                "dracut", [
-                    "-N", "--persistent-policy", "by-uuid",
-                    "-f", "/boot/initramfs-%s.img" % kernel, kernel
-                ],
-                root=sysroot
-            )
-        else:
-            if use_dracut:
-                execWithRedirect(
-                    "depmod", ["-a", kernel], root=sysroot
-                )
-                execWithRedirect(
-                    "dracut",
-                    ["-f", "/boot/initramfs-%s.img" % kernel, kernel],
-                    root=sysroot
-                )
-            else:
-                execWithRedirect(
-                    "new-kernel-pkg",
-                    ["--mkinitrd", "--dracut", "--depmod", "--update", kernel],
-                    root=sysroot
-                )
+            args += ["-N", "--persistent-policy", "by-uuid"]
+
+        args += ["-f", "/boot/initramfs-%s.img" % kernel, kernel]
+        jobs.append(("dracut", args))
+
+    try:
+        for kernel in kernel_versions:
+            make_directories(sysroot + _get_initrd_tmp_dir(kernel))
+
+        _run_jobs(sysroot, kernel_versions, jobs)
+    finally:
+        shutil.rmtree(sysroot + INITRD_TMP_DIR, ignore_errors=True)
+
+
+def _get_initrd_tmp_dir(kernel):
+    """Get a temporary directory for the dracut job of the given kernel.
+
+    :param kernel: a kernel version
+    :return: a path in the target system
+    """
+    return os.path.join(INITRD_TMP_DIR, kernel)
+
+
+def _run_jobs(sysroot, kernel_versions, jobs):
+    """Run the jobs of the given kernels at the same time.
+
+    :param sysroot: a path to the root of the installed system
+    :param kernel_versions: a list of kernel versions
+    :param jobs: a list of commands and their arguments for each kernel
+    """
+    codes = execConcurrently(jobs, max_workers=INITRD_WORKERS, root=sysroot)
+
+    for kernel, (command, _args), rc in zip(kernel_versions, jobs, codes):
+        if rc:
+            log.warning("The command %s failed for %s with the code %s.", command, kernel, rc)
@@ -19,6 +19,7 @@
 import os
 
 from pyanaconda.core import users
+from pyanaconda.core.user_database import UserDatabase
 
 from pyanaconda.modules.common.task import Task
 
@@ -63,23 +64,28 @@ class SetRootPasswordTask(Task):
 class CreateUsersTask(Task):
     """Create users on the target system."""
 
-    def __init__(self, sysroot, user_data_list):
+    def __init__(self, sysroot, user_data_list, batch=False):
         """Create a new user creation task.
 
         :param str sysroot: a path to the root of the installed system
         :param user_data_list: list of users to create
         :type user_data_list: list of UserData instances
+        :param bool batch: should we create the users in a batch?
         """
         super().__init__()
         self._sysroot = sysroot
         self._user_data_list = user_data_list
+        self._batch = batch
 
     @property
     def name(self):
         return "Create users"
 
     def run(self):
-        self._create_users()
+        if self._batch:
+            self._create_users_in_batch()
+        else:
+            self._create_users()
 
     def _create_users(self):
         for user_data in self._user_data_list:
@@ -100,27 +106,68 @@ class CreateUsersTask(Task):
             except ValueError as e:
                 log.warning(str(e))
 
+    def _crypt_passwords(self):
+        """Crypt the passwords of all users at the same time.
+
+        :return: a list of passwords and their crypted flags
+        """
+        passwords = [(u.password, u.is_crypted) for u in self._user_data_list]
+        indexes = [i for i, (p, is_crypted) in enumerate(passwords) if p and not is_crypted]
+        crypted = users.crypt_passwords([passwords[i][0] for i in indexes])
+
+        for i, password in zip(indexes, crypted):
+            passwords[i] = (password, True)
+
+        return passwords
+
+    def _create_users_in_batch(self):
+        database = UserDatabase(self._sysroot)
+        database.load()
+
+        for user_data, (password, is_crypted) in zip(self._user_data_list,
+                                                      self._crypt_passwords()):
+            try:
+                database.create_user(username=user_data.name,
+                                     password=password,
+                                     is_crypted=is_crypted,
+                                     lock=user_data.lock,
+                                     homedir=user_data.homedir,
+                                     uid=user_data.get_uid(),
+                                     gid=user_data.get_gid(),
+                                     groups=user_data.groups,
+                                     shell=user_data.shell,
+                                     gecos=user_data.gecos)
+            except ValueError as e:
+                log.warning(str(e))
+
+        database.write()
+
 
 class CreateGroupsTask(Task):
     """Create groups on the target system."""
 
-    def __init__(self, sysroot, group_data_list):
+    def __init__(self, sysroot, group_data_list, batch=False):
         """Create a new group creation task.
 
         :param str sysroot: a path to the root of the installed system
         :param group_data_list: list of groups to create
         :type group_data_list: list of GroupData instances
+        :param bool batch: should we create the groups in a batch?
         """
         super().__init__()
         self._sysroot = sysroot
         self._group_data_list = group_data_list
+        self._batch = batch
 
     @property
     def name(self):
         return "Create groups"
 
     def run(self):
-        self._create_groups()
+        if self._batch:
+            self._create_groups_in_batch()
+        else:
+            self._create_groups()
 
     def _create_groups(self):
         for group_data in self._group_data_list:
@@ -130,32 +177,58 @@ class CreateGroupsTask(Task):
             except ValueError as e:
                 log.warning(str(e))
 
+    def _create_groups_in_batch(self):
+        database = UserDatabase(self._sysroot)
+        database.load()
+
+        for group_data in self._group_data_list:
+            try:
+                database.create_group(group_name=group_data.name, gid=group_data.get_gid())
+            except ValueError as e:
+                log.warning(str(e))
+
+        database.write()
+
 
 class SetSshKeysTask(Task):
     """Install specified SSH keys to the target system."""
 
-    def __init__(self, sysroot, ssh_key_data_list):
+    def __init__(self, sysroot, ssh_key_data_list, batch=False):
         """Create a new SSH key installation task.
 
         :param str sysroot: a path to the root of the installed system
         :param ssh_key_data_list: list of keys to install
         :type ssh_key_data_list: list of SshKeyData instances
+        :param bool batch: should we install the keys in a batch?
         """
         super().__init__()
         self._sysroot = sysroot
         self._ssh_key_data_list = ssh_key_data_list
+        self._batch = batch
 
     @property
     def name(self):
         return "Set SSH keys"
 
     def run(self):
-        self._set_ssh_keys()
+        if self._batch:
+            self._set_ssh_keys_in_batch()
+        else:
+            self._set_ssh_keys()
 
     def _set_ssh_keys(self):
         for key_data in self._ssh_key_data_list:
             users.set_user_ssh_key(key_data.username, key_data.key)
 
+    def _set_ssh_keys_in_batch(self):
+        database = UserDatabase(self._sysroot)
+        database.load()
+
+        for key_data in self._ssh_key_data_list:
+            database.add_ssh_key(key_data.username, key_data.key)
+
+        database.write()
+
 
 class ConfigureRootPasswordSSHLoginTask(Task):
     """Optionally add an override allowing root to login with password over SSH."""
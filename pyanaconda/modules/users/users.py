@@ -139,7 +139,8 @@ class UsersService(KickstartService):
         """
         return CreateGroupsTask(
             sysroot=conf.target.system_root,
-            group_data_list=self.groups
+            group_data_list=self.groups,
+            batch=conf.target.batch_user_provisioning
         )
 
     def configure_users_with_task(self):
@@ -149,7 +150,8 @@ class UsersService(KickstartService):
         """
         return CreateUsersTask(
             sysroot=conf.target.system_root,
-            user_data_list=self.users
+            user_data_list=self.users,
+            batch=conf.target.batch_user_provisioning
         )
 
     def set_root_password_with_task(self):
@@ -171,7 +173,8 @@ class UsersService(KickstartService):
         """
         return SetSshKeysTask(
             sysroot=conf.target.system_root,
-            ssh_key_data_list=self.ssh_keys
+            ssh_key_data_list=self.ssh_keys,
+            batch=conf.target.batch_user_provisioning
         )
 
     def configure_root_password_ssh_login_with_task(self):
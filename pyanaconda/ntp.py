@@ -23,18 +23,23 @@ Module facilitating the work with NTP servers and NTP daemon's configuration
 
 import re
 import os
+import sys
 import tempfile
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from pyanaconda.anaconda_loggers import get_module_logger
 from pyanaconda.core.async_utils import async_action_nowait
 from pyanaconda.core.i18n import N_, _
 from pyanaconda.core.constants import NTP_SERVER_TIMEOUT, NTP_SERVER_QUERY, \
-    THREAD_NTP_SERVER_CHECK, NTP_SERVER_OK, NTP_SERVER_NOK
+    THREAD_NTP_SERVER_CHECK, NTP_SERVER_OK, NTP_SERVER_NOK, NTP_SERVER_CHECK_WORKERS, \
+    NTP_SERVER_STATUS_TTL
 from pyanaconda.core.signal import Signal
 from pyanaconda.core.util import execWithRedirect
+from pyanaconda.threading import threadMgr
 from pyanaconda.modules.common.structures.timezone import TimeSourceData
-from pyanaconda.threading import threadMgr, AnacondaThread
 
 NTP_CONFIG_FILE = "/etc/chrony.conf"
 
@@ -228,12 +233,185 @@ def save_servers_to_config(servers, conf_file_path=NTP_CONFIG_FILE, out_file_pat
             raise NTPconfigError(msg.format(oserr.strerror)) from oserr
 
 
+class NTPServerProber(object):
+    """The prober of NTP servers.
+
+    The servers are checked in a bounded pool of threads. The results
+    are cached for a limited time and the same server is not checked
+    again while its check is still running.
+    """
+
+    def __init__(self, max_workers=NTP_SERVER_CHECK_WORKERS, ttl=NTP_SERVER_STATUS_TTL):
+        """Create a new prober.
+
+        :param int max_workers: a maximal number of checks that run at the same time
+        :param int ttl: a number of seconds for which a result is valid
+        """
+        self._max_workers = max_workers
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._executor = None
+        self._results = {}
+        self._callbacks = {}
+
+    def _get_cached_status(self, key):
+        """Get a valid cached status of the given server.
+
+        :param key: a hostname and the NTS option of an NTP server
+        :return: a status of the NTP server or None
+        """
+        result = self._results.get(key)
+
+        if not result:
+            return None
+
+        status, timestamp = result
+
+        if time.monotonic() - timestamp > self._ttl:
+            del self._results[key]
+            return None
+
+        return status
+
+    def get_statuses(self, servers):
+        """Get the cached statuses of the given NTP servers.
+
+        :param servers: a list of TimeSourceData instances
+        :return: a dictionary of hostnames and statuses
+        """
+        with self._lock:
+            statuses = {}
+
+            for server in servers:
+                status = self._get_cached_status(_get_probe_key(server))
+                statuses[server.hostname] = NTP_SERVER_QUERY if status is None else status
+
+            return statuses
+
+    def probe(self, hostname, nts_enabled, callback):
+        """Check if the given NTP server appears to be working.
+
+        The callback is called with the hostname, the NTS option
+        and the status of the server. If the result is cached, the
+        callback is called immediately. Otherwise, it is called from
+        a worker thread when the check is finished.
+
+        :param str hostname: a hostname of an NTP server
+        :param bool nts_enabled: is NTS enabled?
+        :param callback: a function to call with the result
+        """
+        key = (hostname, nts_enabled)
+
+        with self._lock:
+            status = self._get_cached_status(key)
+
+            if status is None:
+                if key in self._callbacks:
+                    log.debug("NTP server %s is already being checked.", hostname)
+                    self._callbacks[key].append(callback)
+                    return
+
+                if not self._executor:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix=THREAD_NTP_SERVER_CHECK
+                    )
+
+                self._callbacks[key] = [callback]
+                self._executor.submit(self._probe, key)
+                return
+
+        callback(hostname, nts_enabled, status)
+
+    def _probe(self, key):
+        """Check the NTP server and report the result.
+
+        Unexpected errors of the check and of the callbacks are
+        reported to the thread manager, because nobody waits for
+        the results of the worker threads.
+
+        :param key: a hostname and the NTS option of an NTP server
+        """
+        hostname, nts_enabled = key
+
+        try:
+            status = self._check(hostname, nts_enabled)
+        except Exception:  # pylint: disable=broad-except
+            self._report_error("Failed to check NTP server {}.".format(hostname))
+            status = None
+
+        with self._lock:
+            # Don't cache the result of a failed check.
+            if status is not None:
+                self._results[key] = (status, time.monotonic())
+
+            callbacks = self._callbacks.pop(key, [])
+
+        if status is None:
+            status = NTP_SERVER_NOK
+
+        for callback in callbacks:
+            try:
+                callback(hostname, nts_enabled, status)
+            except Exception:  # pylint: disable=broad-except
+                self._report_error("Failed to report NTP server {}.".format(hostname))
+
+    def _check(self, hostname, nts_enabled):
+        """Check the NTP server.
+
+        :param str hostname: a hostname of an NTP server
+        :param bool nts_enabled: is NTS enabled?
+        :return: a status of the NTP server
+        """
+        log.debug("Checking NTP server %s", hostname)
+
+        try:
+            result = ntp_server_working(hostname, nts_enabled)
+        except OSError as e:
+            log.error("Failed to check NTP server %s: %s", hostname, e)
+            result = False
+
+        if result:
+            log.debug("NTP server %s appears to be working.", hostname)
+            return NTP_SERVER_OK
+        else:
+            log.debug("NTP server %s appears not to be working.", hostname)
+            return NTP_SERVER_NOK
+
+    @staticmethod
+    def _report_error(msg):
+        """Report the current exception to the thread manager.
+
+        :param str msg: a message to log
+        """
+        log.exception(msg)
+        threadMgr.set_error(threading.current_thread().name, *sys.exc_info())
+
+
+def _get_probe_key(server):
+    """Get a key of the NTP server for the prober.
+
+    :param TimeSourceData server: an NTP server
+    :return: a hostname and the NTS option of the NTP server
+    """
+    return server.hostname, "nts" in server.options
+
+
+# The prober shared by all user interfaces.
+ntp_server_prober = NTPServerProber()
+
+
 class NTPServerStatusCache(object):
     """The cache of NTP server states."""
 
-    def __init__(self):
+    def __init__(self, prober=None):
+        """Create a new cache.
+
+        :param prober: an NTP server prober or None for the shared one
+        """
         self._cache = {}
         self._changed = Signal()
+        self._prober = prober or ntp_server_prober
 
     @property
     def changed(self):
@@ -266,18 +444,31 @@ class NTPServerStatusCache(object):
         :param TimeSourceData server: an NTP server
         """
         # Get a hostname and NTS option.
-        hostname = server.hostname
-        nts_enabled = "nts" in server.options
+        hostname, nts_enabled = _get_probe_key(server)
 
         # Reset the current status.
         self._set_status(hostname, NTP_SERVER_QUERY)
 
         # Start the check.
-        threadMgr.add(AnacondaThread(
-            prefix=THREAD_NTP_SERVER_CHECK,
-            target=self._check_status,
-            args=(hostname, nts_enabled))
-        )
+        self._prober.probe(hostname, nts_enabled, self._on_status_checked)
+
+    def check_statuses(self, servers):
+        """Asynchronously check if given NTP servers appear to be working.
+
+        The cached results are used at once and only the other
+        servers are checked.
+
+        :param servers: a list of TimeSourceData instances
+        """
+        statuses = self._prober.get_statuses(servers)
+
+        for server in servers:
+            if statuses[server.hostname] == NTP_SERVER_QUERY:
+                self.check_status(server)
+            else:
+                self._set_status(server.hostname, statuses[server.hostname])
+
+        self._report_status_changed()
 
     def _set_status(self, hostname, status):
         """Set the status of the given NTP server.
@@ -296,19 +487,12 @@ class NTPServerStatusCache(object):
         """
         self._changed.emit()
 
-    def _check_status(self, hostname, nts_enabled):
-        """Check if an NTP server appears to be working.
+    def _on_status_checked(self, hostname, nts_enabled, status):
+        """Set the checked status of an NTP server.
 
         :param str hostname: a hostname of an NTP server
+        :param bool nts_enabled: is NTS enabled?
+        :param int status: a status of the NTP server
         """
-        log.debug("Checking NTP server %s", hostname)
-        result = ntp_server_working(hostname, nts_enabled)
-
-        if result:
-            log.debug("NTP server %s appears to be working.", hostname)
-            self._set_status(hostname, NTP_SERVER_OK)
-        else:
-            log.debug("NTP server %s appears not to be working.", hostname)
-            self._set_status(hostname, NTP_SERVER_NOK)
-
+        self._set_status(hostname, status)
         self._report_status_changed()
@@ -32,7 +32,8 @@ from pyanaconda.modules.payloads.kickstart import convert_ks_repo_to_repo_data
 from pyanaconda.modules.payloads.payload.dnf.initialization import configure_dnf_logging
 from pyanaconda.modules.payloads.payload.dnf.installation import ImportRPMKeysTask, \
     SetRPMMacrosTask, DownloadPackagesTask, InstallPackagesTask, PrepareDownloadLocationTask, \
-    CleanUpDownloadLocationTask, ResolvePackagesTask, UpdateDNFConfigurationTask
+    CleanUpDownloadLocationTask, ResolvePackagesTask, UpdateDNFConfigurationTask, \
+    DownloadAndInstallPackagesTask
 from pyanaconda.modules.payloads.payload.dnf.utils import get_kernel_version_list, \
     calculate_required_space
 from pyanaconda.modules.payloads.payload.dnf.dnf_manager import DNFManager, DNFManagerError
@@ -307,17 +308,6 @@ class DNFPayload(Payload):
         self._dnf_manager.configure_proxy(self._get_proxy_url())
         self._dnf_manager.dump_configuration()
 
-    def _sync_metadata(self, dnf_repo):
-        try:
-            dnf_repo.load()
-        except dnf.exceptions.RepoError as e:
-            id_ = dnf_repo.id
-            log.info('_sync_metadata: addon repo error: %s', e)
-            self._set_repo_enabled(id_, False)
-            self.verbose_errors.append(str(e))
-        log.debug('repo %s: _sync_metadata success from %s', dnf_repo.id,
-                  dnf_repo.baseurl or dnf_repo.mirrorlist or dnf_repo.metalink)
-
     ###
     # METHODS FOR WORKING WITH REPOSITORIES
     ###
@@ -469,10 +459,16 @@ class DNFPayload(Payload):
 
     def gather_repo_metadata(self):
         with self._repos_lock:
-            for repo in self._base.repos.iter_enabled():
-                self._sync_metadata(repo)
+            errors = self._dnf_manager.load_repositories()
+
+            for repo_id, e in errors.items():
+                log.info('repo %s: failed to load metadata: %s', repo_id, e)
+                self._set_repo_enabled(repo_id, False)
+                self.verbose_errors.append(str(e))
+
         self._base.fill_sack(load_system_repo=False)
         self._base.read_comps(arch_filter=True)
+        self._dnf_manager.store_metadata_snapshot()
 
     def install(self):
         progress_message(N_('Starting package installation process'))
@@ -502,15 +498,21 @@ class DNFPayload(Payload):
         task = PrepareDownloadLocationTask(self._dnf_manager)
         task.run()
 
-        # Download the packages.
-        task = DownloadPackagesTask(self._dnf_manager)
-        task.progress_changed_signal.connect(self._progress_cb)
-        task.run()
+        if conf.payload.pipelined_installation:
+            # Download and install the packages in a pipeline.
+            task = DownloadAndInstallPackagesTask(self._dnf_manager)
+            task.progress_changed_signal.connect(self._progress_cb)
+            task.run()
+        else:
+            # Download the packages.
+            task = DownloadPackagesTask(self._dnf_manager)
+            task.progress_changed_signal.connect(self._progress_cb)
+            task.run()
 
-        # Install the packages.
-        task = InstallPackagesTask(self._dnf_manager)
-        task.progress_changed_signal.connect(self._progress_cb)
-        task.run()
+            # Install the packages.
+            task = InstallPackagesTask(self._dnf_manager)
+            task.progress_changed_signal.connect(self._progress_cb)
+            task.run()
 
         # Clean up the download location.
         task = CleanUpDownloadLocationTask(self._dnf_manager)
@@ -734,9 +736,16 @@ class DNFPayload(Payload):
                     self._dnf_manager.set_repository_enabled(id_, False)
 
             # fetch md for enabled repos
-            for ks_repo in self.data.repo.dataList():
-                if self.is_repo_enabled(ks_repo.name):
-                    self._dnf_manager.load_repository(ks_repo.name)
+            repo_ids = [
+                ks_repo.name for ks_repo in self.data.repo.dataList()
+                if self.is_repo_enabled(ks_repo.name)
+            ]
+
+            errors = self._dnf_manager.load_repositories(repo_ids)
+
+            for repo_id in repo_ids:
+                if repo_id in errors:
+                    raise errors[repo_id]
 
     def _find_and_mount_iso(self, device, device_mount_dir, iso_path, iso_mount_dir):
         """Find and mount installation source from ISO on device.
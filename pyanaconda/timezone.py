@@ -22,13 +22,13 @@ configuration, valid timezones recognition etc.
 
 """
 
-import langtable
 import zoneinfo
 from collections import OrderedDict
 from functools import cache
 
 from pyanaconda.core import util
 from pyanaconda.core.constants import THREAD_STORAGE
+from pyanaconda.core.imports import langtable
 from pyanaconda.flags import flags
 from pyanaconda.modules.common.constants.objects import BOOTLOADER
 from pyanaconda.modules.common.constants.services import TIMEZONE, STORAGE
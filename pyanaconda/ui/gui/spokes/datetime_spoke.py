@@ -414,9 +414,7 @@ class DatetimeSpoke(FirstbootSpokeMixIn, NormalSpoke):
             self._show_no_network_warning()
         else:
             self.clear_info()
-
-            for server in self._ntp_servers:
-                self._ntp_servers_states.check_status(server)
+            self._ntp_servers_states.check_statuses(self._ntp_servers)
 
         if conf.system.can_set_time_synchronization:
             ntp_working = has_active_network and is_service_running(NTP_SERVICE)
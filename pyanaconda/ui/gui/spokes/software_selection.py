@@ -243,10 +243,8 @@ class SoftwareSelectionSpoke(NormalSpoke):
         """Create rows for all available environments."""
         self._clear_listbox(self._environment_list_box)
 
-        for environment in self._selection_cache.available_environments:
-            # Get the environment data.
-            data = self._dnf_manager.get_environment_data(environment)
-            selected = self._selection_cache.is_environment_selected(environment)
+        for data in self._dnf_manager.get_all_environments_data():
+            selected = self._selection_cache.is_environment_selected(data.id)
 
             # Add a new environment row.
             row = EnvironmentListBoxRow(data, selected)
@@ -264,28 +262,34 @@ class SoftwareSelectionSpoke(NormalSpoke):
                 self._selection_cache.environment
             )
 
+            # Get the data of all optional groups.
+            optional_groups = self._dnf_manager.get_groups_data(
+                environment_data.optional_groups
+            )
+
+            # Get the data of user visible groups that are not optional.
+            visible_groups = self._dnf_manager.get_groups_data([
+                group for group in environment_data.visible_groups
+                if group not in environment_data.optional_groups
+            ])
+
             # Add all optional groups.
-            for group in environment_data.optional_groups:
-                self._add_group_row(group)
+            for data in optional_groups:
+                self._add_group_row(data)
 
             # Add the separator.
             if environment_data.optional_groups and environment_data.visible_groups:
                 self._addon_list_box.insert(SeparatorRow(), -1)
 
             # Add user visible groups that are not optional.
-            for group in environment_data.visible_groups:
-                if group in environment_data.optional_groups:
-                    continue
-
-                self._add_group_row(group)
+            for data in visible_groups:
+                self._add_group_row(data)
 
         self._addon_list_box.show_all()
 
-    def _add_group_row(self, group):
+    def _add_group_row(self, data):
         """Add a new row for the specified group."""
-        # Get the group data.
-        data = self._dnf_manager.get_group_data(group)
-        selected = self._selection_cache.is_group_selected(group)
+        selected = self._selection_cache.is_group_selected(data.id)
 
         # Add a new group row.
         row = GroupListBoxRow(data, selected)
@@ -218,9 +218,8 @@ class SoftwareSpoke(NormalTUISpoke):
             spacing=2
         )
 
-        for environment in self._selection_cache.available_environments:
-            data = self._dnf_manager.get_environment_data(environment)
-            selected = self._selection_cache.is_environment_selected(environment)
+        for data in self._dnf_manager.get_all_environments_data():
+            selected = self._selection_cache.is_environment_selected(data.id)
 
             widget = CheckboxWidget(
                 title=data.name,
@@ -338,9 +337,10 @@ class AdditionalSoftwareSpoke(NormalTUISpoke):
             spacing=2
         )
 
-        for group in self._selection_cache.available_groups:
-            data = self._dnf_manager.get_group_data(group)
-            selected = self._selection_cache.is_group_selected(group)
+        groups = self._dnf_manager.get_groups_data(self._selection_cache.available_groups)
+
+        for data in groups:
+            selected = self._selection_cache.is_group_selected(data.id)
 
             widget = CheckboxWidget(
                 title=data.name,
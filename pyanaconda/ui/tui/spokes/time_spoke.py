@@ -97,8 +97,7 @@ class TimeSpoke(FirstbootSpokeMixIn, NormalTUISpoke):
                       "can't decide where to get initial NTP servers", flags.environs)
 
         # check if the newly added NTP servers work fine
-        for server in self._ntp_servers:
-            self._ntp_servers_states.check_status(server)
+        self._ntp_servers_states.check_statuses(self._ntp_servers)
 
         # we assume that the NTP spoke is initialized enough even if some NTP
         # server check threads might still be running
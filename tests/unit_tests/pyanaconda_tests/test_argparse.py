@@ -244,3 +244,32 @@ class ArgparseTest(unittest.TestCase):
         assert conf.system._is_boot_iso is False
         assert conf.system._is_live_os is False
         assert conf.system._is_unknown is True
+
+    def test_payload(self):
+        conf = AnacondaConfiguration.from_defaults()
+
+        opts, _removed = self._parseCmdline([])
+        conf.set_from_opts(opts)
+
+        assert conf.payload.verify_ssl is True
+        assert conf.payload.metadata_snapshot_path == ""
+
+        opts, _removed = self._parseCmdline(['--noverifyssl', '--metadata-snapshot=/what/ever'])
+        conf.set_from_opts(opts)
+
+        assert conf.payload.verify_ssl is False
+        assert conf.payload.metadata_snapshot_path == "/what/ever"
+
+    def test_queued_logging(self):
+        conf = AnacondaConfiguration.from_defaults()
+
+        opts, _removed = self._parseCmdline([])
+        conf.set_from_opts(opts)
+
+        assert conf.anaconda.queued_logging is False
+
+        boot_cmdline = KernelArguments.from_string("inst.queued-logging")
+        opts, _removed = self._parseCmdline([], boot_cmdline=boot_cmdline)
+        conf.set_from_opts(opts)
+
+        assert conf.anaconda.queued_logging is True
@@ -0,0 +1,107 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pyanaconda.modules.storage.bootloader.utils import recreate_initrds, INITRD_TMP_DIR
+
+
+class RecreateInitrdsTestCase(unittest.TestCase):
+    """Test the recreate_initrds function."""
+
+    def setUp(self):
+        self._sysroot = tempfile.TemporaryDirectory()
+        self._tmp_dirs = []
+
+    def tearDown(self):
+        self._sysroot.cleanup()
+
+    def _exec_concurrently(self, jobs, max_workers=None, root="/"):
+        """Check the temporary directories of dracut jobs."""
+        for command, args in jobs:
+            if command == "dracut":
+                tmp_dir = args[args.index("--tmpdir") + 1]
+                assert os.path.isdir(root + tmp_dir)
+                self._tmp_dirs.append(tmp_dir)
+
+        return [0] * len(jobs)
+
+    @patch("pyanaconda.modules.storage.bootloader.utils.conf")
+    @patch("pyanaconda.modules.storage.bootloader.utils.execConcurrently")
+    def test_dracut(self, exec_mock, conf_mock):
+        """Generate initrds with dracut."""
+        conf_mock.target.is_image = False
+        exec_mock.side_effect = self._exec_concurrently
+        sysroot = self._sysroot.name
+
+        recreate_initrds(sysroot, ["1.0", "2.0"])
+
+        assert exec_mock.call_count == 2
+        depmod_jobs = exec_mock.call_args_list[0][0][0]
+        dracut_jobs = exec_mock.call_args_list[1][0][0]
+
+        assert depmod_jobs == [
+            ("depmod", ["-a", "1.0"]),
+            ("depmod", ["-a", "2.0"]),
+        ]
+        assert dracut_jobs == [
+            ("dracut", ["--tmpdir", INITRD_TMP_DIR + "/1.0", "-f", "/boot/initramfs-1.0.img", "1.0"]),
+            ("dracut", ["--tmpdir", INITRD_TMP_DIR + "/2.0", "-f", "/boot/initramfs-2.0.img", "2.0"]),
+        ]
+
+        assert self._tmp_dirs == [INITRD_TMP_DIR + "/1.0", INITRD_TMP_DIR + "/2.0"]
+        assert not os.path.exists(sysroot + INITRD_TMP_DIR)
+
+    @patch("pyanaconda.modules.storage.bootloader.utils.conf")
+    @patch("pyanaconda.modules.storage.bootloader.utils.execConcurrently")
+    def test_dracut_image(self, exec_mock, conf_mock):
+        """Generate initrds of a disk image."""
+        conf_mock.target.is_image = True
+        exec_mock.side_effect = self._exec_concurrently
+
+        recreate_initrds(self._sysroot.name, ["1.0"])
+
+        exec_mock.assert_called_once()
+        assert exec_mock.call_args[0][0] == [
+            ("dracut", [
+                "--tmpdir", INITRD_TMP_DIR + "/1.0", "-N", "--persistent-policy", "by-uuid",
+                "-f", "/boot/initramfs-1.0.img", "1.0"
+            ]),
+        ]
+
+    @patch("pyanaconda.modules.storage.bootloader.utils.conf")
+    @patch("pyanaconda.modules.storage.bootloader.utils.execWithRedirect")
+    @patch("pyanaconda.modules.storage.bootloader.utils.execConcurrently")
+    def test_new_kernel_pkg(self, exec_mock, redirect_mock, conf_mock):
+        """Generate initrds with new-kernel-pkg."""
+        conf_mock.target.is_image = False
+        sysroot = self._sysroot.name
+        os.makedirs(sysroot + "/usr/sbin")
+        open(sysroot + "/usr/sbin/new-kernel-pkg", "w").close()
+
+        recreate_initrds(sysroot, ["1.0", "2.0"])
+
+        exec_mock.assert_not_called()
+        assert redirect_mock.call_count == 2
+        redirect_mock.assert_called_with(
+            "new-kernel-pkg",
+            ["--mkinitrd", "--dracut", "--depmod", "--update", "2.0"],
+            root=sysroot
+        )
@@ -0,0 +1,532 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import io
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import dnf.exceptions
+import pytest
+
+from blivet.size import Size
+
+from pyanaconda.core.constants import REQUIREMENT_TYPE_PACKAGE
+from pyanaconda.modules.common.errors.payload import UnknownCompsEnvironmentError, \
+    UnknownCompsGroupError
+from pyanaconda.modules.payloads.payload.dnf.dnf_manager import DNFManager, MetadataError
+from pyanaconda.modules.payloads.payload.dnf.installation import ResolvePackagesTask
+from pyanaconda.modules.payloads.payload.dnf.validation import CheckPackagesSelectionTask
+from pyanaconda.modules.payloads.payload.dnf.utils import calculate_hash, \
+    get_repomd_urls_from_mirrors
+
+METALINK = """<?xml version="1.0" encoding="utf-8"?>
+<metalink version="3.0" xmlns="http://www.metalinker.org/">
+ <files>
+  <file name="repomd.xml">
+   <resources maxconnections="1">
+    <url protocol="https" type="https" preference="100">https://a/repodata/repomd.xml</url>
+    <url protocol="http" type="http" preference="99">http://b/repodata/repomd.xml</url>
+   </resources>
+  </file>
+ </files>
+</metalink>
+"""
+
+MIRRORLIST = """# repo = fedora-38 arch = x86_64
+https://a/os/
+
+http://b/os
+"""
+
+
+def _create_dnf_manager():
+    """Create a DNF manager with a fake DNF base."""
+    dnf_manager = DNFManager()
+    dnf_manager._DNFManager__base = Mock()
+    return dnf_manager
+
+
+def _create_repo(baseurl=(), metalink=None, mirrorlist=None):
+    """Create a fake DNF repo."""
+    return Mock(id="r", baseurl=list(baseurl), metalink=metalink, mirrorlist=mirrorlist)
+
+
+class RepomdContentTestCase(unittest.TestCase):
+    """Test the download of repomd.xml files."""
+
+    def setUp(self):
+        self.dnf_manager = _create_dnf_manager()
+        self.files = {}
+        self.dnf_manager._base.urlopen.side_effect = self._urlopen
+
+    def _urlopen(self, url, repo, mode):
+        if url not in self.files:
+            raise OSError("Not found: {}".format(url))
+
+        return io.StringIO(self.files[url])
+
+    def test_mirrors(self):
+        """Get URLs of repomd.xml from a list of mirrors."""
+        assert get_repomd_urls_from_mirrors(METALINK) == [
+            "https://a/repodata/repomd.xml",
+            "http://b/repodata/repomd.xml",
+        ]
+        assert get_repomd_urls_from_mirrors(MIRRORLIST) == [
+            "https://a/os/repodata/repomd.xml",
+            "http://b/os/repodata/repomd.xml",
+        ]
+        assert get_repomd_urls_from_mirrors("") == []
+
+    def test_baseurl(self):
+        """Get repomd.xml from the base URLs."""
+        repo = _create_repo(baseurl=["http://x", "http://y"])
+        self.files["http://y/repodata/repomd.xml"] = "y"
+
+        assert self.dnf_manager._get_repomd_content(repo) == "y"
+
+    def test_skip_mirrors(self):
+        """Don't resolve mirrors by default."""
+        repo = _create_repo(metalink="http://metalink")
+        self.files["http://metalink"] = METALINK
+        self.files["https://a/repodata/repomd.xml"] = "a"
+
+        assert self.dnf_manager._get_repomd_content(repo) == ""
+        self.dnf_manager._base.urlopen.assert_not_called()
+
+    def test_metalink(self):
+        """Get repomd.xml from a metalink."""
+        repo = _create_repo(metalink="http://metalink")
+        self.files["http://metalink"] = METALINK
+        self.files["http://b/repodata/repomd.xml"] = "b"
+
+        assert self.dnf_manager._get_repomd_content(repo, resolve_mirrors=True) == "b"
+
+    def test_mirrorlist(self):
+        """Get repomd.xml from a mirrorlist."""
+        repo = _create_repo(mirrorlist="http://mirrorlist")
+        self.files["http://mirrorlist"] = MIRRORLIST
+        self.files["https://a/os/repodata/repomd.xml"] = "a"
+
+        assert self.dnf_manager._get_repomd_content(repo, resolve_mirrors=True) == "a"
+
+    def test_unavailable_mirrors(self):
+        """Handle an unavailable list of mirrors."""
+        repo = _create_repo(metalink="http://metalink")
+        assert self.dnf_manager._get_repomd_content(repo, resolve_mirrors=True) == ""
+
+    @patch.object(DNFManager, "_get_metadata_snapshot")
+    def test_restore_snapshot(self, get_snapshot):
+        """Restore a snapshot of a repository with a metalink."""
+        snapshot = get_snapshot.return_value
+        repo = _create_repo(metalink="http://metalink")
+        self.files["http://metalink"] = METALINK
+        self.files["https://a/repodata/repomd.xml"] = "a"
+
+        self.dnf_manager._restore_metadata_snapshot(repo)
+        snapshot.restore_repository.assert_called_once_with(
+            "r",
+            calculate_hash("a"),
+            repo._repo.getCachedir.return_value,
+            self.dnf_manager._base.conf.cachedir
+        )
+
+    @patch.object(DNFManager, "_get_metadata_snapshot")
+    def test_skip_snapshot(self, get_snapshot):
+        """Skip the snapshot if repomd.xml is not available."""
+        snapshot = get_snapshot.return_value
+        repo = _create_repo(metalink="http://metalink")
+
+        self.dnf_manager._restore_metadata_snapshot(repo)
+        snapshot.restore_repository.assert_not_called()
+
+
+@patch.object(DNFManager, "_get_metadata_snapshot", Mock(return_value=None))
+class LoadRepositoriesTestCase(unittest.TestCase):
+    """Test the loading of repositories."""
+
+    def setUp(self):
+        self.dnf_manager = _create_dnf_manager()
+        self.repos = {}
+        self.dnf_manager._base.repos.get.side_effect = self.repos.get
+        self.dnf_manager._base.repos.iter_enabled.side_effect = \
+            lambda: iter(self.repos.values())
+
+    def _add_repo(self, repo_id, load=None):
+        repo = Mock(id=repo_id, baseurl=["http://" + repo_id])
+        repo.load.side_effect = load
+        self.repos[repo_id] = repo
+        return repo
+
+    def test_load_repositories(self):
+        """Load repositories and collect their errors."""
+        a = self._add_repo("a")
+        b = self._add_repo("b", dnf.exceptions.RepoError("Fake error!"))
+        c = self._add_repo("c")
+
+        errors = self.dnf_manager.load_repositories()
+
+        assert list(errors.keys()) == ["b"]
+        assert isinstance(errors["b"], MetadataError)
+        assert str(errors["b"]) == "Fake error!"
+
+        for repo in (a, b, c):
+            repo.enable.assert_called_once_with()
+            repo.load.assert_called_once_with()
+
+        a.disable.assert_not_called()
+        b.disable.assert_called_once_with()
+        c.disable.assert_not_called()
+
+    def test_load_selected_repositories(self):
+        """Load only the specified repositories."""
+        a = self._add_repo("a")
+        b = self._add_repo("b")
+
+        assert self.dnf_manager.load_repositories(["b"]) == {}
+        a.load.assert_not_called()
+        b.load.assert_called_once_with()
+
+        assert self.dnf_manager.load_repositories([]) == {}
+
+    def test_load_concurrently(self):
+        """Load the repositories at the same time."""
+        # The barrier times out if the repositories are loaded one by one.
+        barrier = threading.Barrier(3, timeout=10)
+
+        for repo_id in ("a", "b", "c"):
+            self._add_repo(repo_id, lambda: barrier.wait())
+
+        assert self.dnf_manager.load_repositories() == {}
+        assert not barrier.broken
+
+    def test_unexpected_error(self):
+        """Raise unexpected errors after all repositories are loaded."""
+        self._add_repo("a", ValueError("Fake error!"))
+        b = self._add_repo("b")
+
+        with pytest.raises(ValueError, match="Fake error!"):
+            self.dnf_manager.load_repositories()
+
+        b.load.assert_called_once_with()
+
+
+class InstallationSizeTestCase(unittest.TestCase):
+    """Test the calculation of the installation size."""
+
+    def setUp(self):
+        self.dnf_manager = _create_dnf_manager()
+
+    def _set_transaction(self, *packages):
+        transaction = [Mock(pkg=package) for package in packages]
+        self.dnf_manager._base.transaction = transaction
+        return transaction
+
+    def _create_package(self, installsize, files_number):
+        return Mock(installsize=installsize, files=["/f"] * files_number)
+
+    @patch("pyanaconda.modules.payloads.payload.dnf.dnf_manager.conf")
+    def test_files_number(self, mocked_conf):
+        """Estimate the number of installed files."""
+        mocked_conf.payload.precise_installation_size = False
+        get_files_number = DNFManager._get_files_number
+
+        assert get_files_number(self._create_package(0, 100)) == 16
+        assert get_files_number(self._create_package(Size("24 KiB") - 1, 100)) == 16
+        assert get_files_number(self._create_package(Size("24 KiB"), 100)) == 17
+        assert get_files_number(self._create_package(Size("24 MiB"), 100)) == 16 + 1024
+
+    @patch("pyanaconda.modules.payloads.payload.dnf.dnf_manager.conf")
+    def test_precise_files_number(self, mocked_conf):
+        """Count the installed files."""
+        mocked_conf.payload.precise_installation_size = True
+        get_files_number = DNFManager._get_files_number
+
+        assert get_files_number(self._create_package(0, 0)) == 0
+        assert get_files_number(self._create_package(Size("24 MiB"), 100)) == 100
+
+    def test_no_transaction(self):
+        """Get the installation size without a transaction."""
+        self.dnf_manager._base.transaction = None
+        assert self.dnf_manager.get_installation_size() == Size("3000 MiB")
+
+    @patch("pyanaconda.modules.payloads.payload.dnf.dnf_manager.conf")
+    def test_installation_size(self, mocked_conf):
+        """Calculate the installation size."""
+        mocked_conf.payload.precise_installation_size = False
+        self._set_transaction(
+            self._create_package(Size("240 KiB"), 1),
+            self._create_package(Size("0 KiB"), 1),
+        )
+
+        # The packages, 26 and 16 files of 6 KiB and 10% on top.
+        expected = Size((Size("240 KiB") + 42 * Size("6 KiB")) * 1.1)
+        assert self.dnf_manager.get_installation_size() == expected
+
+        mocked_conf.payload.precise_installation_size = True
+        self._set_transaction(
+            self._create_package(Size("240 KiB"), 1),
+            self._create_package(Size("0 KiB"), 1),
+        )
+
+        expected = Size((Size("240 KiB") + 2 * Size("6 KiB")) * 1.1)
+        assert self.dnf_manager.get_installation_size() == expected
+
+    @patch("pyanaconda.modules.payloads.payload.dnf.dnf_manager.conf")
+    def test_cached_installation_size(self, mocked_conf):
+        """Cache the installation size of the transaction."""
+        mocked_conf.payload.precise_installation_size = False
+        package = self._create_package(Size("240 KiB"), 1)
+        self._set_transaction(package)
+        size = self.dnf_manager.get_installation_size()
+
+        # The same transaction uses the cached size.
+        package.installsize = Size("1 GiB")
+        assert self.dnf_manager.get_installation_size() == size
+
+        # A new transaction is calculated again.
+        self._set_transaction(package)
+        assert self.dnf_manager.get_installation_size() > size
+
+
+def _create_comps_object(object_id, **kwargs):
+    """Create a fake comps object."""
+    return Mock(id=object_id, ui_name=object_id.upper(), ui_description="", **kwargs)
+
+
+def _create_option(name, default=False):
+    """Create a fake option of a comps environment."""
+    option = Mock(default=default)
+    option.name = name
+    return option
+
+
+class CompsIndexTestCase(unittest.TestCase):
+    """Test the index of the comps data."""
+
+    def setUp(self):
+        self.dnf_manager = _create_dnf_manager()
+        self.comps = self._create_comps()
+        self.dnf_manager._base.comps = self.comps
+
+    def _create_comps(self):
+        comps = Mock()
+        comps.groups = [
+            _create_comps_object("a", visible=True),
+            _create_comps_object("b", visible=False),
+            _create_comps_object("c", visible=True),
+        ]
+        comps.environments = [
+            _create_comps_object("x", option_ids=[
+                _create_option("a", default=True),
+                _create_option("b"),
+            ]),
+            _create_comps_object("y", option_ids=[]),
+        ]
+
+        patterns = {obj.ui_name: obj for obj in comps.groups + comps.environments}
+        comps.group_by_pattern.side_effect = patterns.get
+        comps.environment_by_pattern.side_effect = patterns.get
+        return comps
+
+    def test_environment_data(self):
+        """Get the data of environments."""
+        data = self.dnf_manager.get_environment_data("x")
+        assert data.id == "x"
+        assert data.name == "X"
+        assert data.optional_groups == ["a", "b"]
+        assert data.default_groups == ["a"]
+        assert data.visible_groups == ["a", "c"]
+
+        assert self.dnf_manager.get_environment_data("Y").id == "y"
+
+        with pytest.raises(UnknownCompsEnvironmentError):
+            self.dnf_manager.get_environment_data("z")
+
+        environments = self.dnf_manager.get_all_environments_data()
+        assert [data.id for data in environments] == ["x", "y"]
+
+    def test_group_data(self):
+        """Get the data of groups."""
+        data = self.dnf_manager.get_group_data("a")
+        assert data.id == "a"
+        assert data.name == "A"
+
+        assert self.dnf_manager.get_group_data("B").id == "b"
+
+        with pytest.raises(UnknownCompsGroupError):
+            self.dnf_manager.get_group_data("z")
+
+    def test_groups_data(self):
+        """Get the data of groups in a batch."""
+        with patch.object(self.dnf_manager, "_get_comps_index",
+                          wraps=self.dnf_manager._get_comps_index) as get_index:
+            groups = self.dnf_manager.get_groups_data(["c", "A", "b"])
+
+        assert [data.id for data in groups] == ["c", "a", "b"]
+        get_index.assert_called_once_with()
+
+        assert self.dnf_manager.get_groups_data([]) == []
+
+        with pytest.raises(UnknownCompsGroupError):
+            self.dnf_manager.get_groups_data(["a", "z"])
+
+    def test_cached_index(self):
+        """Create the index only once."""
+        environments, groups = self.dnf_manager._get_comps_index()
+        self.comps.groups = []
+        self.comps.environments = []
+
+        assert self.dnf_manager._get_comps_index()[0] is environments
+        assert self.dnf_manager._get_comps_index()[1] is groups
+        assert [data.id for data in self.dnf_manager.get_groups_data(["a"])] == ["a"]
+
+    def test_copied_data(self):
+        """Don't share the data of the index with callers."""
+        self.dnf_manager.get_group_data("a").name = "changed"
+        self.dnf_manager.get_groups_data(["a"])[0].name = "changed"
+        assert self.dnf_manager.get_group_data("a").name == "A"
+
+        self.dnf_manager.get_environment_data("x").default_groups.append("c")
+        self.dnf_manager.get_all_environments_data()[0].name = "changed"
+        assert self.dnf_manager.get_environment_data("x").default_groups == ["a"]
+        assert self.dnf_manager.get_environment_data("x").name == "X"
+
+    def test_rebuilt_index(self):
+        """Create the index again if the comps or metadata change."""
+        _environments, groups = self.dnf_manager._get_comps_index()
+
+        # The repomd.xml hashes have changed.
+        self.dnf_manager._md_hashes = {"r": b"hash"}
+        _environments, new_groups = self.dnf_manager._get_comps_index()
+        assert new_groups is not groups
+        assert self.dnf_manager._get_comps_index()[1] is new_groups
+
+        # The comps are loaded again.
+        comps = self._create_comps()
+        comps.groups = comps.groups[:1]
+        self.dnf_manager._base.comps = comps
+        assert list(self.dnf_manager._get_comps_index()[1].keys()) == ["a"]
+
+    def test_reset_index(self):
+        """Drop the index with the DNF base."""
+        self.dnf_manager._get_comps_index()
+        assert self.dnf_manager._comps_index is not None
+
+        self.dnf_manager.reset_base()
+        assert self.dnf_manager._comps_index is None
+
+
+class ResolutionCacheTestCase(unittest.TestCase):
+    """Test the cache of the resolved software selection."""
+
+    def setUp(self):
+        self.dnf_manager = _create_dnf_manager()
+        self.base = self.dnf_manager._base
+        self.base.repos.iter_enabled.side_effect = lambda: iter([Mock(id="r")])
+        self.dnf_manager._md_hashes = {"r": b"hash"}
+
+    def _get_key(self):
+        return self.dnf_manager.get_resolution_key(["a"], ["b"], ["m:1"], [])
+
+    def _cache_report(self, error_messages=()):
+        report = Mock(error_messages=list(error_messages))
+        self.dnf_manager.cache_resolution(self._get_key(), report)
+        return report
+
+    def test_hit(self):
+        """Get the cached resolution."""
+        report = self._cache_report()
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is report
+
+    def test_miss_selection(self):
+        """Don't get the resolution of a different selection."""
+        self._cache_report()
+        key = self.dnf_manager.get_resolution_key(["a", "c"], ["b"], ["m:1"], [])
+        assert self.dnf_manager.get_cached_resolution(key) is None
+
+    def test_miss_errors(self):
+        """Don't cache resolutions with errors."""
+        self._cache_report(["Fake error!"])
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    def test_miss_sack(self):
+        """Don't get the resolution if the sack has changed."""
+        self._cache_report()
+        self.base.sack = Mock()
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    def test_miss_transaction(self):
+        """Don't get the resolution if the transaction has changed."""
+        self._cache_report()
+        self.base.transaction = Mock()
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    def test_miss_repositories(self):
+        """Don't get the resolution if the enabled repositories have changed."""
+        self._cache_report()
+        self.base.repos.iter_enabled.side_effect = lambda: iter([Mock(id="r"), Mock(id="s")])
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    def test_miss_md_hashes(self):
+        """Don't get the resolution if the metadata have changed."""
+        self._cache_report()
+        self.dnf_manager._md_hashes = {"r": b"new hash"}
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    def test_miss_cleared(self):
+        """Don't get the resolution after the selection is cleared."""
+        self._cache_report()
+        self.dnf_manager.clear_selection()
+        assert self.dnf_manager.get_cached_resolution(self._get_key()) is None
+
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.collect_driver_disk_requirements")
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.collect_platform_requirements")
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.collect_language_requirements")
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.collect_remote_requirements")
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.get_kernel_package")
+    @patch("pyanaconda.modules.payloads.payload.dnf.validation.get_installation_specs")
+    def test_resolve_checked_selection(self, get_specs, get_kernel, *collect_requirements):
+        """Reuse the selection resolved by the check during the installation."""
+        get_specs.return_value = (["@core", "vim"], ["nano"])
+        get_kernel.return_value = "kernel"
+
+        for collect in collect_requirements:
+            collect.return_value = []
+
+        requirement = Mock(type=REQUIREMENT_TYPE_PACKAGE, reason="")
+        requirement.name = "langpacks-en"
+        collect_requirements[1].return_value = [requirement]
+
+        self.base.comps.environments = []
+        selection = Mock(modules=[], disabled_modules=[])
+        self.dnf_manager.apply_specs = Mock()
+        self.dnf_manager.enable_modules = Mock()
+        self.dnf_manager.disable_modules = Mock()
+        self.dnf_manager.resolve_selection = Mock()
+
+        report = CheckPackagesSelectionTask(self.dnf_manager, selection).run()
+        assert report.error_messages == []
+
+        self.dnf_manager.apply_specs.assert_called_once()
+        include_list, exclude_list = self.dnf_manager.apply_specs.call_args.args
+        assert "langpacks-en" in include_list
+        assert exclude_list == ["nano"]
+
+        ResolvePackagesTask(self.dnf_manager, selection).run()
+        self.dnf_manager.apply_specs.assert_called_once()
+        self.dnf_manager.resolve_selection.assert_called_once_with()
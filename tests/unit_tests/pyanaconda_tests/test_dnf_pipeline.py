@@ -0,0 +1,296 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import queue
+import unittest
+from unittest.mock import Mock, call
+
+import pytest
+
+from pyanaconda.modules.common.errors.installation import PayloadInstallationError
+from pyanaconda.modules.payloads.payload.dnf.dnf_manager import DNFManager, DNFManagerError
+from pyanaconda.modules.payloads.payload.dnf.download_progress import process_download_progress
+from pyanaconda.modules.payloads.payload.dnf.transaction_progress import \
+    encode_progress_records, decode_progress_records, process_transaction_progress
+from pyanaconda.modules.payloads.payload.dnf.utils import order_by_dependencies, \
+    split_into_batches
+
+
+class OrderByDependenciesTestCase(unittest.TestCase):
+    """Test the order_by_dependencies function."""
+
+    def test_no_dependencies(self):
+        """Order items without dependencies."""
+        assert order_by_dependencies({}) == []
+        assert order_by_dependencies({"a": [], "b": []}) == [["a"], ["b"]]
+
+    def test_chain(self):
+        """Order a chain of dependencies."""
+        groups = order_by_dependencies({"a": ["b"], "b": ["c"], "c": []})
+        assert groups == [["c"], ["b"], ["a"]]
+
+    def test_long_chain(self):
+        """Order a chain that is too long for recursion."""
+        dependencies = {i: [i + 1] for i in range(5000)}
+        dependencies[5000] = []
+
+        groups = order_by_dependencies(dependencies)
+        assert groups == [[i] for i in reversed(range(5001))]
+
+    def test_cycle(self):
+        """Keep items with cyclic dependencies together."""
+        groups = order_by_dependencies({"a": ["b"], "b": ["c"], "c": ["b", "d"], "d": []})
+        assert groups[0] == ["d"]
+        assert sorted(groups[1]) == ["b", "c"]
+        assert groups[2] == ["a"]
+
+    def test_unknown_dependency(self):
+        """Order items that depend on items that are not ordered."""
+        groups = order_by_dependencies({"a": ["x"], "b": []})
+        assert groups == [["x"], ["a"], ["b"]]
+
+    def test_deferred(self):
+        """Defer items with unknown dependencies and their dependents."""
+        dependencies = {"a": ["b"], "b": [], "c": ["d"], "d": [], "e": []}
+        groups = order_by_dependencies(dependencies, deferred=["b"])
+        assert groups == [["d"], ["c"], ["e"], ["b", "a"]]
+
+        groups = order_by_dependencies(dependencies, deferred=["missing"])
+        assert groups == order_by_dependencies(dependencies)
+
+
+class SplitIntoBatchesTestCase(unittest.TestCase):
+    """Test the split_into_batches function."""
+
+    def test_empty(self):
+        """Split no groups."""
+        assert split_into_batches([], len, 3) == []
+
+    def test_split(self):
+        """Split groups into batches of a similar size."""
+        groups = [["aa"], ["bb"], ["cc"], ["dd"]]
+        assert split_into_batches(groups, len, 2) == [["aa", "bb"], ["cc", "dd"]]
+        assert split_into_batches(groups, len, 1) == [["aa", "bb", "cc", "dd"]]
+        assert split_into_batches(groups, len, 0) == [["aa", "bb", "cc", "dd"]]
+
+    def test_groups(self):
+        """Never split a group between batches."""
+        groups = [["a", "b", "c", "d"], ["e"], ["f"]]
+        assert split_into_batches(groups, len, 3) == [["a", "b", "c", "d"], ["e", "f"]]
+
+    def test_maximum(self):
+        """Don't create more batches than requested."""
+        groups = [[str(i)] for i in range(10)]
+        batches = split_into_batches(groups, len, 3)
+
+        assert len(batches) == 3
+        assert sum(batches, []) == [str(i) for i in range(10)]
+
+
+class ProcessDownloadProgressTestCase(unittest.TestCase):
+    """Test the process_download_progress function."""
+
+    def _get_queue(self, *messages):
+        q = queue.Queue()
+
+        for message in messages:
+            q.put(message)
+
+        return q
+
+    def test_downloaded(self):
+        """Wait for the batch to be downloaded."""
+        callback = Mock()
+        q = self._get_queue(
+            ("progress", "1"),
+            ("downloaded", 0),
+            ("progress", "2"),
+            ("downloaded", 1),
+            ("quit", "DNF done"),
+        )
+
+        process_download_progress(q, 0, callback)
+        assert callback.call_args_list == [call("1")]
+
+        process_download_progress(q, 1, callback)
+        assert callback.call_args_list == [call("1"), call("2")]
+
+    def test_error(self):
+        """Report a failed download."""
+        q = self._get_queue(("downloaded", 0), ("error", "Fake error!"))
+
+        with pytest.raises(PayloadInstallationError, match="Fake error!"):
+            process_download_progress(q, 1, Mock())
+
+    def test_quit(self):
+        """Report an unexpected end of the download."""
+        q = self._get_queue(("quit", "Fake quit!"))
+
+        with pytest.raises(RuntimeError, match="Fake quit!"):
+            process_download_progress(q, 0, Mock())
+
+
+class ProgressRecordsTestCase(unittest.TestCase):
+    """Test the encoding and decoding of the progress records."""
+
+    def _check_records(self, records, expected=None):
+        data = encode_progress_records(records)
+        assert list(decode_progress_records(data)) == (expected or records)
+
+    def test_empty(self):
+        """Encode no records."""
+        assert encode_progress_records([]) == b""
+        assert list(decode_progress_records(b"")) == []
+
+    def test_records(self):
+        """Encode and decode records."""
+        self._check_records([
+            ("install", "bash-5.1.8-2.fc35.x86_64"),
+            ("log", "Installed: bash-5.1.8-2.fc35.x86_64 " + "0" * 64),
+            ("post", ""),
+            ("done", ""),
+        ])
+
+    def test_empty_message(self):
+        """Encode records without messages."""
+        self._check_records(
+            [("post", None), ("done", "")],
+            [("post", ""), ("done", "")]
+        )
+
+    def test_unicode(self):
+        """Encode records with non-ASCII messages."""
+        self._check_records([("error", "Chyba při instalaci: 软件包")])
+
+    def test_size(self):
+        """Every record has a header and a variable-length message."""
+        assert len(encode_progress_records([("post", None)])) == 5
+        assert len(encode_progress_records([("install", "abc")])) == 8
+        assert len(encode_progress_records([("install", "ř")])) == 7
+
+    def test_invalid(self):
+        """Decode invalid data."""
+        data = encode_progress_records([("install", "bash")])
+
+        with pytest.raises(ValueError, match="Truncated progress record"):
+            list(decode_progress_records(data[:-1]))
+
+        with pytest.raises(ValueError, match="Invalid progress record"):
+            list(decode_progress_records(data[:3]))
+
+        with pytest.raises(ValueError, match="Invalid progress record"):
+            list(decode_progress_records(b"\xff" + data[1:]))
+
+
+class ProcessTransactionProgressTestCase(unittest.TestCase):
+    """Test the process_transaction_progress function."""
+
+    def _get_connection(self, *batches):
+        connection = Mock()
+        connection.recv_bytes.side_effect = [
+            encode_progress_records(batch) for batch in batches
+        ]
+        return connection
+
+    def test_done(self):
+        """Report the last progress message of every batch."""
+        callback = Mock()
+        connection = self._get_connection(
+            [("install", "a"), ("install", "b"), ("log", "Installed: b")],
+            [("log", "Nothing to report.")],
+            [("configure", "a"), ("verify", "a")],
+            [("post", ""), ("done", ""), ("quit", "DNF quit")],
+        )
+
+        with self.assertLogs(level="INFO") as cm:
+            process_transaction_progress(connection, callback)
+
+        assert callback.call_args_list == [
+            call("Installing b"),
+            call("Verifying a"),
+            call("Performing post-installation setup tasks"),
+        ]
+        assert any("Installed: b" in line for line in cm.output)
+        assert any("Nothing to report." in line for line in cm.output)
+        assert connection.recv_bytes.call_count == 4
+
+    def test_error(self):
+        """Report a failed transaction."""
+        connection = self._get_connection(
+            [("install", "a"), ("error", "Fake error!")]
+        )
+
+        with pytest.raises(PayloadInstallationError, match="Fake error!"):
+            process_transaction_progress(connection, Mock())
+
+    def test_quit(self):
+        """Report an unexpected end of the transaction."""
+        connection = self._get_connection([("quit", "Fake quit!")])
+
+        with pytest.raises(RuntimeError, match="Fake quit!"):
+            process_transaction_progress(connection, Mock())
+
+    def test_closed(self):
+        """Report a closed connection."""
+        connection = Mock()
+        connection.recv_bytes.side_effect = EOFError()
+
+        with pytest.raises(RuntimeError, match="ended abruptly"):
+            process_transaction_progress(connection, Mock())
+
+
+class SelectTransactionPackagesTestCase(unittest.TestCase):
+    """Test the selection of packages in the transaction process."""
+
+    def _get_base(self, available, resolved):
+        base = Mock()
+        base.repos.iter_enabled.return_value = []
+        base.sack.query.return_value.available.return_value.filter.side_effect = \
+            lambda nevra_strict, reponame: [nevra_strict] if nevra_strict in available else []
+
+        packages = []
+        for nevra in resolved:
+            pkg = Mock(reponame="r")
+            pkg.__str__ = Mock(return_value=nevra)
+            packages.append(pkg)
+
+        base.transaction.install_set = packages
+        return base
+
+    def test_select(self):
+        """Select the packages of the batch."""
+        base = self._get_base(["a", "b"], ["a", "b"])
+        DNFManager._select_transaction_packages(base, [("a", "r"), ("b", "r")], ([], []))
+
+        assert base.package_install.call_args_list == [
+            call("a", strict=True), call("b", strict=True)
+        ]
+        base.resolve.assert_called_once_with()
+
+    def test_missing_package(self):
+        """Fail if a package of the batch is not available."""
+        base = self._get_base(["a"], ["a"])
+
+        with pytest.raises(DNFManagerError, match="b from r is not available"):
+            DNFManager._select_transaction_packages(base, [("a", "r"), ("b", "r")], ([], []))
+
+    def test_unexpected_package(self):
+        """Fail if the transaction doesn't match the batch."""
+        base = self._get_base(["a"], ["a", "c"])
+
+        with pytest.raises(DNFManagerError, match="Unexpected"):
+            DNFManager._select_transaction_packages(base, [("a", "r")], ([], []))
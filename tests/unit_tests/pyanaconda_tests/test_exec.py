@@ -0,0 +1,111 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from pyanaconda.core.util import execWithRedirect, execConcurrently
+
+
+def wait_for_files(*paths):
+    """Create a shell script that waits for the given files.
+
+    The script waits up to 10 seconds and exits with 99 if
+    the files don't exist.
+    """
+    condition = " && ".join('[ -e "{}" ]'.format(path) for path in paths)
+    return "for i in $(seq 200); do {0} && break; sleep 0.05; done; {0} || exit 99; ".format(
+        condition
+    )
+
+
+class ExecTestCase(unittest.TestCase):
+    """Test the execution of external programs."""
+
+    def test_exec_with_redirect(self):
+        """Redirect the output of a program."""
+        with tempfile.TemporaryFile("w+t") as f:
+            rc = execWithRedirect("sh", ["-c", "echo first; echo second >&2; printf third"],
+                                  stdout=f)
+            f.seek(0)
+            assert f.read() == "first\nsecond\nthird\n"
+
+        assert rc == 0
+
+        rc = execWithRedirect("sh", ["-c", "exit 3"])
+        assert rc == 3
+
+    def test_exec_with_callback(self):
+        """Process the output of a program while it is running."""
+        lines = []
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "processed")
+
+            def callback(line):
+                # The program waits for the first line to be processed.
+                lines.append(line)
+                open(path, "w").close()
+
+            script = "echo 1; " + wait_for_files(path) + "echo 2"
+            rc = execWithRedirect("sh", ["-c", script], callback=callback)
+
+        assert rc == 0
+        assert lines == ["1", "2"]
+
+    def test_exec_with_carriage_returns(self):
+        """Process lines ended by carriage returns."""
+        lines = []
+        rc = execWithRedirect("printf", ["1\\r2\\r3\\n4\\r\\n"], callback=lines.append)
+
+        assert rc == 0
+        assert lines == ["1", "2", "3", "4"]
+
+    def test_exec_with_callback_error(self):
+        """Stop the program if the callback fails."""
+        def callback(line):
+            raise ValueError(line)
+
+        with pytest.raises(ValueError):
+            execWithRedirect("sh", ["-c", "echo 1; sleep 10"], callback=callback)
+
+    def test_exec_missing_program(self):
+        """Run a program that doesn't exist."""
+        with pytest.raises(OSError):
+            execWithRedirect("/nonexistent/program", [])
+
+    def test_exec_concurrently(self):
+        """Run several programs at the same time."""
+        assert execConcurrently([]) == []
+
+        with tempfile.TemporaryDirectory() as d:
+            paths = [os.path.join(d, str(i)) for i in range(3)]
+
+            # Every program marks its start and waits for the other programs.
+            commands = [
+                ("sh", ["-c", "touch {}; {}exit {}".format(
+                    path, wait_for_files(*paths), i + 1
+                )])
+                for i, path in enumerate(paths)
+            ]
+
+            codes = execConcurrently(commands, max_workers=3)
+
+        assert codes == [1, 2, 3]
@@ -0,0 +1,259 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import errno
+import os
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch, Mock
+
+import pytest
+
+from pyanaconda.modules.payloads.payload.live_image import image_copy
+from pyanaconda.modules.payloads.payload.live_image.image_copy import ImageCopyEngine, \
+    ImageCopyError, get_exclude_pattern_regex
+
+
+class ImageCopyEngineTestCase(unittest.TestCase):
+    """Test the copy engine of images."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp_dir.name, "source")
+        self.target = os.path.join(self._tmp_dir.name, "target")
+        os.mkdir(self.source)
+        os.mkdir(self.target)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _create_file(self, path, content="", mode=0o644):
+        """Create a file in the source."""
+        full_path = os.path.join(self.source, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        with open(full_path, "w") as f:
+            f.write(content)
+
+        os.chmod(full_path, mode)
+        return full_path
+
+    def _read_file(self, path):
+        """Read a file in the target."""
+        with open(os.path.join(self.target, path)) as f:
+            return f.read()
+
+    def _run_engine(self, **kwargs):
+        """Run the copy engine."""
+        engine = ImageCopyEngine(source=self.source, target=self.target, **kwargs)
+        engine.run()
+        return engine
+
+    def _supports_xattrs(self, path):
+        """Does the file system support user xattrs?"""
+        try:
+            os.setxattr(path, "user.test", b"test")
+        except OSError:
+            return False
+
+        return True
+
+    def test_copy_files(self):
+        """Copy files, directories, symlinks and special files."""
+        self._create_file("etc/hostname", "host", mode=0o640)
+        self._create_file("usr/bin/tool", "#!/bin/sh", mode=0o755)
+        os.symlink("usr/bin", os.path.join(self.source, "bin"))
+        os.mkfifo(os.path.join(self.source, "fifo"))
+        os.utime(os.path.join(self.source, "etc", "hostname"), (1, 2))
+
+        callback = Mock()
+        engine = self._run_engine(callback=callback)
+
+        assert self._read_file("etc/hostname") == "host"
+        assert self._read_file("usr/bin/tool") == "#!/bin/sh"
+        assert os.readlink(os.path.join(self.target, "bin")) == "usr/bin"
+        assert stat.S_ISFIFO(os.lstat(os.path.join(self.target, "fifo")).st_mode)
+
+        st = os.stat(os.path.join(self.target, "etc", "hostname"))
+        assert stat.S_IMODE(st.st_mode) == 0o640
+        assert st.st_mtime == 2
+        assert stat.S_IMODE(os.stat(os.path.join(self.target, "usr/bin/tool")).st_mode) == 0o755
+
+        # 4 directories, 2 files, 1 symlink and 1 fifo.
+        assert engine.copied_files == 8
+        assert engine.copied_size == len("host") + len("#!/bin/sh")
+        callback.assert_called_with(8, engine.copied_size)
+
+    def test_copy_xattrs(self):
+        """Copy extended attributes."""
+        path = self._create_file("file", "data")
+
+        if not self._supports_xattrs(path):
+            self.skipTest("The file system doesn't support xattrs.")
+
+        self._run_engine()
+        target_path = os.path.join(self.target, "file")
+        assert os.getxattr(target_path, "user.test") == b"test"
+
+    def test_copy_hardlinks(self):
+        """Copy hardlinks."""
+        path = self._create_file("a/file", "data")
+        os.makedirs(os.path.join(self.source, "b"))
+        os.link(path, os.path.join(self.source, "b", "link"))
+
+        engine = self._run_engine()
+
+        st1 = os.stat(os.path.join(self.target, "a", "file"))
+        st2 = os.stat(os.path.join(self.target, "b", "link"))
+        assert st1.st_ino == st2.st_ino
+        assert st1.st_nlink == 2
+
+        # The data is copied only once.
+        assert engine.copied_size == len("data")
+
+    def test_excluded_paths(self):
+        """Don't copy excluded paths."""
+        self._create_file("tmp/file", "data")
+        self._create_file("etc/machine-id", "id")
+        self._create_file("etc/hostname", "host")
+        self._create_file("run/file", "data")
+        self._create_file("dev", "not a directory")
+
+        self._run_engine(excluded_paths=["/tmp/*", "/etc/machine-id", "/run/", "/dev/"])
+
+        assert os.listdir(os.path.join(self.target, "tmp")) == []
+        assert not os.path.exists(os.path.join(self.target, "etc", "machine-id"))
+        assert not os.path.exists(os.path.join(self.target, "run"))
+        assert self._read_file("etc/hostname") == "host"
+        assert self._read_file("dev") == "not a directory"
+
+    def test_excluded_nested_paths(self):
+        """Don't let wildcards of excluded paths match slashes."""
+        self._create_file("boot/vmlinuz-0-rescue-123", "rescue")
+        self._create_file("boot/grub2/rescue/file", "data")
+        self._create_file("boot/efi/EFI/rescue.efi", "data")
+        self._create_file("var/a/b/cache", "data")
+        self._create_file("var/a/cache", "data")
+
+        self._run_engine(excluded_paths=["/boot/*rescue*", "/var/**/b/cache"])
+
+        assert not os.path.exists(os.path.join(self.target, "boot", "vmlinuz-0-rescue-123"))
+        assert self._read_file("boot/grub2/rescue/file") == "data"
+        assert self._read_file("boot/efi/EFI/rescue.efi") == "data"
+        assert not os.path.exists(os.path.join(self.target, "var", "a", "b", "cache"))
+        assert self._read_file("var/a/cache") == "data"
+
+    def test_exclude_patterns(self):
+        """Translate the exclude patterns like rsync."""
+        regex = get_exclude_pattern_regex("/boot/*rescue*")
+        assert regex.fullmatch("/boot/vmlinuz-rescue")
+        assert not regex.fullmatch("/boot/grub2/rescue")
+
+        regex = get_exclude_pattern_regex("/dev/")
+        assert regex.fullmatch("/dev")
+        assert not regex.fullmatch("/dev/null")
+
+        regex = get_exclude_pattern_regex("/a?c/[!x]y/**")
+        assert regex.fullmatch("/abc/zy/d/e")
+        assert not regex.fullmatch("/a/c/zy/d")
+        assert not regex.fullmatch("/abc/xy/d")
+
+        regex = get_exclude_pattern_regex("/etc/machine.id")
+        assert not regex.fullmatch("/etc/machine-id")
+
+    def test_replace_existing(self):
+        """Replace existing files in the target."""
+        self._create_file("file", "new")
+        os.symlink("/nowhere", os.path.join(self.target, "file"))
+
+        self._run_engine()
+        assert self._read_file("file") == "new"
+
+    @patch.object(image_copy, "fcntl")
+    def test_clone(self, fcntl_mock):
+        """Clone the data of files."""
+        self._create_file("file", "data")
+
+        with patch("os.copy_file_range") as copy_range:
+            self._run_engine()
+
+        fcntl_mock.ioctl.assert_called_once()
+        copy_range.assert_not_called()
+
+    @patch.object(image_copy, "fcntl")
+    def test_copy_file_range_fallback(self, fcntl_mock):
+        """Copy the data with copy_file_range if cloning is not supported."""
+        fcntl_mock.ioctl.side_effect = OSError(errno.EOPNOTSUPP, "Not supported")
+        self._create_file("a", "data")
+        self._create_file("b", "more data")
+
+        with patch("os.copy_file_range", wraps=os.copy_file_range) as copy_range:
+            with patch("os.sendfile") as sendfile:
+                engine = self._run_engine()
+
+        assert self._read_file("a") == "data"
+        assert self._read_file("b") == "more data"
+        assert not engine._clone_supported
+        assert copy_range.called
+        sendfile.assert_not_called()
+
+        # Cloning is not tried again.
+        fcntl_mock.ioctl.assert_called_once()
+
+    @patch.object(image_copy, "fcntl")
+    def test_sendfile_fallback(self, fcntl_mock):
+        """Copy the data with sendfile if copy_file_range is not supported."""
+        fcntl_mock.ioctl.side_effect = OSError(errno.EXDEV, "Cross-device link")
+        self._create_file("a", "data")
+        self._create_file("b", "more data")
+
+        error = OSError(errno.ENOSYS, "Not implemented")
+
+        with patch("os.copy_file_range", side_effect=error) as copy_range:
+            with patch("os.sendfile", wraps=os.sendfile) as sendfile:
+                engine = self._run_engine()
+
+        assert self._read_file("a") == "data"
+        assert self._read_file("b") == "more data"
+        assert not engine._copy_range_supported
+        assert sendfile.called
+
+        # copy_file_range is not tried again.
+        copy_range.assert_called_once()
+
+    @patch.object(ImageCopyEngine, "_copy_data")
+    def test_count_errors(self, copy_data):
+        """Count files that failed to be copied."""
+        copy_data.side_effect = OSError(errno.EACCES, "Permission denied")
+        self._create_file("a", "data")
+        self._create_file("b", "data")
+        self._create_file("c/d", "data")
+
+        engine = self._run_engine()
+
+        assert engine._failures == 3
+        assert engine.copied_size == 0
+
+    @patch.object(ImageCopyEngine, "_copy_data")
+    def test_fatal_error(self, copy_data):
+        """Stop the copying on a fatal error."""
+        copy_data.side_effect = OSError(errno.ENOSPC, "No space left on device")
+        self._create_file("a", "data")
+
+        with pytest.raises(ImageCopyError, match="No space left on device"):
+            self._run_engine()
@@ -0,0 +1,162 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import builtins
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from pyanaconda.core import imports
+from pyanaconda.core.imports import lazy_import, ImportProfiler
+
+
+class ImportsTestCase(unittest.TestCase):
+    """Test the lazy imports and the import profiler."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self._tmp_dir.name)
+
+        self._create_module("ana_test_parent", "import ana_test_child\nVALUE = 42\n")
+        self._create_module("ana_test_child", "LOADED = True\n")
+
+    def tearDown(self):
+        sys.path.remove(self._tmp_dir.name)
+        self._tmp_dir.cleanup()
+
+        for name in ("ana_test_parent", "ana_test_child", "ana_test_slow"):
+            sys.modules.pop(name, None)
+            imports._lazy_modules.pop(name, None)
+
+    def _create_module(self, name, content):
+        """Create a module in the temporary directory."""
+        with open(os.path.join(self._tmp_dir.name, name + ".py"), "w") as f:
+            f.write(content)
+
+    def test_lazy_import(self):
+        """Load the module on the first access."""
+        module = lazy_import("ana_test_parent")
+        assert "ana_test_child" not in sys.modules
+
+        assert module.VALUE == 42
+        assert "ana_test_child" in sys.modules
+
+    def test_lazy_import_once(self):
+        """Create only one lazy module."""
+        module = lazy_import("ana_test_parent")
+        assert lazy_import("ana_test_parent") is module
+
+        assert module.VALUE == 42
+        assert lazy_import("ana_test_parent") is sys.modules["ana_test_parent"]
+
+    def test_lazy_import_threads(self):
+        """Load the module from multiple threads at the same time."""
+        self._create_module("ana_test_slow", "import time\ntime.sleep(0.2)\nVALUE = 42\n")
+        module = lazy_import("ana_test_slow")
+        barrier = threading.Barrier(5, timeout=10)
+        results = []
+
+        def use_module():
+            barrier.wait()
+            results.append(module.VALUE)
+
+        threads = [threading.Thread(target=use_module) for _i in range(5)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert results == [42] * 5
+
+    def test_lazy_import_loaded(self):
+        """Return a module that is already loaded."""
+        assert lazy_import("os") is os
+
+    def test_lazy_import_missing(self):
+        """Fail if the module doesn't exist."""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("ana_test_missing")
+
+    @patch("pyanaconda.core.imports.lazy_import")
+    def test_langtable(self, lazy_import_mock):
+        """Get the lazily imported language tables."""
+        assert imports.langtable is lazy_import_mock.return_value
+        lazy_import_mock.assert_called_once_with("langtable")
+
+        with pytest.raises(AttributeError):
+            imports.missing_attribute  # pylint: disable=pointless-statement
+
+    def test_import_profiler(self):
+        """Measure the imports of modules."""
+        original_import = builtins.__import__
+        profiler = ImportProfiler()
+        profiler.start()
+
+        try:
+            import ana_test_parent  # pylint: disable=import-error,unused-import
+        finally:
+            profiler.stop()
+
+        assert builtins.__import__ is original_import
+
+        records = profiler.records
+        parent_time, parent_self_time = records["ana_test_parent"]
+        child_time, child_self_time = records["ana_test_child"]
+
+        assert parent_time >= child_time
+        assert parent_self_time <= parent_time - child_time + 1e-9
+        assert child_self_time == child_time
+        assert profiler.total_time >= parent_time
+
+        lines = profiler.get_report(limit=1)
+        assert lines[0].startswith("The imports took")
+        assert len(lines) == 2
+        assert lines[1].endswith("ana_test_parent")
+
+    def test_import_profiler_loaded_modules(self):
+        """Don't measure modules that are already loaded."""
+        profiler = ImportProfiler()
+        profiler.start()
+
+        try:
+            import os.path  # pylint: disable=redefined-outer-name,unused-import
+        finally:
+            profiler.stop()
+
+        assert profiler.records == {}
+
+    def test_import_profiler_threads(self):
+        """Measure only the imports of the current thread."""
+        profiler = ImportProfiler()
+        profiler.start()
+
+        try:
+            thread = threading.Thread(target=lambda: __import__("ana_test_child"))
+            thread.start()
+            thread.join()
+        finally:
+            profiler.stop()
+
+        assert "ana_test_child" in sys.modules
+        assert profiler.records == {}
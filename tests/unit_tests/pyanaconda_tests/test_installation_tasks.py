@@ -18,10 +18,21 @@
 # with the express permission of Red Hat, Inc.
 #
 
+import csv
+import json
+import resource
+import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import patch, Mock
+
+import pytest
 
 from pyanaconda.installation_tasks import Task
 from pyanaconda.installation_tasks import TaskQueue
+from pyanaconda.installation_tasks import TELEMETRY_FIELDS, write_telemetry_report
+from pyanaconda.errors import ERROR_RAISE
 
 class InstallTasksTestCase(unittest.TestCase):
 
@@ -369,3 +380,161 @@ class InstallTasksTestCase(unittest.TestCase):
         assert self._test_variable1 == 3
         assert self._test_variable2 == 2
         assert self._test_variable3 == 1
+
+    def test_task_telemetry(self):
+        """Check that the telemetry of tasks is measured."""
+        task = Task("foo", self._increment_var1)
+        assert task.telemetry.get_data() == {}
+
+        task.start()
+        data = task.telemetry.get_data()
+
+        assert data["wall_time"] >= 0
+        assert data["progress_steps"] == 0
+        assert data["installer_cpu_time"] >= 0
+        assert data["installer_peak_rss"] > 0
+        assert data["children_peak_rss"] >= 0
+        assert data["system_read_bytes"] >= 0
+        assert data["system_write_bytes"] >= 0
+
+    @patch("pyanaconda.installation_tasks.resource.getrusage")
+    def test_task_telemetry_peak_rss(self, getrusage):
+        """Check that the peak RSS is measured."""
+        getrusage.side_effect = lambda who: Mock(
+            ru_maxrss=2048 if who == resource.RUSAGE_SELF else 512
+        )
+
+        task = Task("foo", self._increment_var1)
+        task.start()
+        data = task.telemetry.get_data()
+
+        assert data["installer_peak_rss"] == 2048 * 1024
+        assert data["children_peak_rss"] == 512 * 1024
+
+    def test_task_queue_telemetry(self):
+        """Check that the telemetry report of a task queue works correctly."""
+        group1 = TaskQueue(name="group1")
+        group1.append(Task("increment var 1", self._increment_var1))
+        group1.append(Task("increment var 2", self._increment_var2))
+        queue1 = TaskQueue(name="queue1")
+        queue1.append(group1)
+        queue1.append(Task("increment var 3", self._increment_var3))
+        queue1.start()
+
+        records = queue1.get_telemetry_records()
+        assert [(r["type"], r["name"], r["parent"], r["depth"]) for r in records] == [
+            ("queue", "queue1", None, 0),
+            ("queue", "group1", "queue1", 1),
+            ("task", "increment var 1", "group1", 2),
+            ("task", "increment var 2", "group1", 2),
+            ("task", "increment var 3", "queue1", 1),
+        ]
+
+        for record in records:
+            assert list(record.keys()) == TELEMETRY_FIELDS
+            assert record["wall_time"] >= 0
+
+        assert records[0]["wall_time"] >= records[1]["wall_time"]
+
+        with tempfile.TemporaryDirectory() as d:
+            json_path, csv_path = write_telemetry_report(queue1, d)
+
+            with open(json_path) as f:
+                report = json.load(f)
+
+            assert report["queue"] == "queue1"
+            assert report["tasks"] == records
+
+            with open(csv_path) as f:
+                rows = list(csv.DictReader(f))
+
+            assert [row["name"] for row in rows] == [r["name"] for r in records]
+
+    def test_task_conflicts(self):
+        """Check that conflicts of tasks are detected correctly."""
+        task1 = Task("task1", writes=["/etc/locale.conf"])
+        task2 = Task("task2", reads=["/etc"], writes=[])
+        task3 = Task("task3", writes=["/etc/localtime"])
+        task4 = Task("task4", reads=["/etc/localtime"])
+        task5 = Task("task5")
+
+        assert task1.conflicts_with(task2)
+        assert task2.conflicts_with(task1)
+        assert not task1.conflicts_with(task3)
+        assert task3.conflicts_with(task4)
+        assert not task2.conflicts_with(task4)
+        assert task1.conflicts_with(task1)
+        assert task5.conflicts_with(task4)
+        assert task4.conflicts_with(task5)
+
+    def test_concurrent_task_queue(self):
+        """Check that independent tasks run concurrently."""
+        barrier = threading.Barrier(2, timeout=5)
+        events = []
+
+        def wait_for_other_task(name):
+            barrier.wait()
+            events.append(name)
+
+        queue1 = TaskQueue(name="queue1", max_workers=2)
+        queue1.task_started.connect(lambda t: events.append("started " + t.name))
+        queue1.task_completed.connect(lambda t: events.append("completed " + t.name))
+
+        # The tasks block each other if they don't run concurrently.
+        queue1.append(Task("task1", wait_for_other_task, ("task1",), writes=["/etc/a"]))
+        queue1.append(Task("task2", wait_for_other_task, ("task2",), writes=["/etc/b"]))
+        queue1.start()
+
+        assert events[:2] == ["started task1", "started task2"]
+        assert events[-2:] == ["completed task1", "completed task2"]
+        assert queue1.done
+
+    def test_concurrent_task_queue_order(self):
+        """Check that conflicting tasks run in the order of the queue."""
+        events = []
+
+        def append_event(name, delay=0.0):
+            time.sleep(delay)
+            events.append(name)
+
+        group1 = TaskQueue(name="group1")
+        group1.append(Task("task3", append_event, ("task3",)))
+
+        queue1 = TaskQueue(name="queue1", max_workers=4)
+        queue1.task_completed.connect(lambda t: events.append("completed " + t.name))
+        queue1.append(Task("task1", append_event, ("task1", 0.2), writes=["/etc"]))
+        queue1.append(Task("task2", append_event, ("task2",), reads=["/etc/passwd"]))
+        queue1.append(group1)
+        queue1.append(Task("task4", append_event, ("task4",), writes=["/var"]))
+        queue1.start()
+
+        assert events == [
+            "task1",
+            "completed task1",
+            "task2",
+            "completed task2",
+            "task3",
+            "completed task3",
+            "task4",
+            "completed task4",
+        ]
+
+        assert queue1.current_task_number is None
+        assert all(task.done for task in (queue1[0], queue1[1], group1[0], queue1[3]))
+
+    def test_concurrent_task_queue_failure(self):
+        """Check that a failed concurrent task stops the queue."""
+        def fail():
+            raise RuntimeError("Fake error!")
+
+        queue1 = TaskQueue(name="queue1", max_workers=2)
+        queue1.append(Task("task1", fail, writes=["/etc/a"]))
+        queue1.append(Task("task2", self._increment_var1, writes=["/etc/a"]))
+
+        with patch("pyanaconda.installation_tasks.errorHandler") as handler:
+            handler.cb.return_value = ERROR_RAISE
+
+            with pytest.raises(RuntimeError):
+                queue1.start()
+
+        assert self._test_variable1 == 0
@@ -0,0 +1,90 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import threading
+import unittest
+from unittest.mock import Mock
+
+from pyanaconda.modules.boss.kickstart_manager import KickstartManager
+
+
+class FakeObserver(object):
+    """A fake observer of a module with a blocking proxy."""
+
+    def __init__(self, name, kickstart, barrier):
+        self.service_name = name
+        self.is_service_available = True
+        self.proxy = Mock()
+        self.proxy.KickstartCommands = [name]
+        self.proxy.KickstartSections = []
+        self.proxy.KickstartAddons = []
+        self.proxy.GenerateKickstart.side_effect = lambda: self._wait(kickstart)
+        self.proxy.ReadKickstart.side_effect = lambda data: self._wait({})
+        self._barrier = barrier
+
+    def _wait(self, result):
+        # Block until all modules are called. If the modules
+        # are called one by one, the barrier will time out.
+        self._barrier.wait()
+        return result
+
+
+class KickstartManagerTestCase(unittest.TestCase):
+    """Test the kickstart manager."""
+
+    def setUp(self):
+        self.manager = KickstartManager()
+        self.barrier = threading.Barrier(3, timeout=10)
+        self.observers = [
+            FakeObserver("org.fedoraproject.Anaconda.Modules.B", "b", self.barrier),
+            FakeObserver("org.fedoraproject.Anaconda.Modules.A", "a", self.barrier),
+            FakeObserver("org.fedoraproject.Anaconda.Modules.C", "c", self.barrier),
+        ]
+        self.manager.on_module_observers_changed(self.observers)
+
+    def test_generate_kickstart(self):
+        """Generate the kickstart from modules at the same time."""
+        kickstart = self.manager.generate_kickstart()
+        assert not self.barrier.broken
+        assert kickstart == "a\n\nb\n\nc"
+
+    def test_distribute_kickstart(self):
+        """Distribute the kickstart to modules at the same time."""
+        elements = Mock()
+        elements.get_kickstart_from_elements.return_value = "kickstart"
+
+        reports = self.manager._distribute_to_modules(elements)
+        assert not self.barrier.broken
+        assert len(reports) == 3
+
+        commands = [c.kwargs["commands"] for c in elements.get_and_process_elements.call_args_list]
+        assert commands == [[o.service_name] for o in self.observers]
+
+        # The kickstart ownership is cached.
+        self.observers[0].proxy.KickstartCommands = ["changed"]
+        self.manager._distribute_to_modules(elements)
+
+        commands = [c.kwargs["commands"] for c in elements.get_and_process_elements.call_args_list]
+        assert commands[3:] == [[o.service_name] for o in self.observers]
+
+        # Forget the ownership of removed modules.
+        self.manager.on_module_observers_changed([])
+        self.manager.on_module_observers_changed(self.observers)
+        self.manager._distribute_to_modules(elements)
+
+        commands = [c.kwargs["commands"] for c in elements.get_and_process_elements.call_args_list]
+        assert commands[6] == ["changed"]
@@ -0,0 +1,197 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, Mock
+
+import pytest
+import requests
+
+from pyanaconda.modules.common.structures.live_image import LiveImageConfigurationData
+from pyanaconda.modules.payloads.payload.live_image.installation import DownloadImageTask, \
+    InstallFromImageTask, InstallFromTarTask
+from pyanaconda.modules.payloads.payload.live_image.installation_progress import \
+    PublishedProgress
+from pyanaconda.modules.payloads.source.live_tar.installation import InstallLiveTarTask
+
+
+class FakeRangeResponse(object):
+    """A fake response to a range request."""
+
+    def __init__(self, data, headers):
+        first, last = headers["Range"].removeprefix("bytes=").split("-")
+        self._data = data[int(first):int(last) + 1]
+        self.status_code = requests.codes.partial_content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._data), 4):
+            yield self._data[i:i + 4]
+
+
+class FakeSession(object):
+    """A fake requests session."""
+
+    def __init__(self, data, failing_start=None):
+        self._data = data
+        self._failing_start = failing_start
+        self.started = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers, **kwargs):
+        start = int(headers["Range"].removeprefix("bytes=").split("-")[0])
+
+        with self._lock:
+            self.started.append(start)
+
+        if start == self._failing_start:
+            raise requests.exceptions.ConnectionError("Fake error!")
+
+        return FakeRangeResponse(self._data, headers)
+
+
+@patch("pyanaconda.modules.payloads.payload.live_image.installation.IMAGE_DOWNLOAD_RETRIES", 0)
+@patch("pyanaconda.modules.payloads.payload.live_image.installation.IMAGE_DOWNLOAD_CONNECTIONS", 2)
+@patch("pyanaconda.modules.payloads.payload.live_image.installation.IMAGE_DOWNLOAD_SEGMENT_SIZE", 10)
+class SegmentedDownloadTestCase(unittest.TestCase):
+    """Test the download of an image in segments."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp_dir.name, "image.img")
+        self._data = bytes(range(256)) * 4
+
+        configuration = LiveImageConfigurationData()
+        configuration.url = "http://my/image.img"
+        configuration.checksum = hashlib.sha256(self._data).hexdigest()
+        self._task = DownloadImageTask(configuration, self._path)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_download(self):
+        """Download the image in segments."""
+        self._task._segmented_download(FakeSession(self._data), len(self._data))
+
+        with open(self._path, "rb") as f:
+            assert f.read() == self._data
+
+        assert self._task.checksum == hashlib.sha256(self._data).hexdigest()
+
+    def test_failed_segment(self):
+        """Stop the download if a segment fails."""
+        session = FakeSession(self._data, failing_start=0)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            self._task._segmented_download(session, len(self._data))
+
+        # The queued segments are not downloaded.
+        assert len(session.started) < len(self._data) // 10
+
+
+class InstallFromImageTaskTestCase(unittest.TestCase):
+    """Test the installation from an image."""
+
+    def test_publish_rsync_progress(self):
+        """Publish the progress reported by rsync."""
+        progress = Mock(processed_files=0)
+        publish = InstallFromImageTask._publish_rsync_progress
+
+        publish("Number of files: 1,234 (reg: 1,000, dir: 234)", progress)
+        progress.publish.assert_not_called()
+
+        publish("         32,768   0%    0.00kB/s    0:00:00  ", progress)
+        progress.publish.assert_called_once_with(0, 32768)
+        progress.publish.reset_mock()
+
+        publish("  1,234,567  42%   12.34MB/s    0:00:12 (xfr#123, ir-chk=1000/5678)", progress)
+        progress.publish.assert_called_once_with(123, 1234567)
+
+    @patch("pyanaconda.modules.payloads.payload.live_image.installation.execWithRedirect")
+    def test_rsync_progress(self, exec_mock):
+        """Report the progress of rsync."""
+        def run_rsync(cmd, args, callback, **kwargs):
+            callback("      500,000  50%   10.00MB/s    0:00:01 (xfr#5, ir-chk=5/10)")
+            callback("    1,000,000 100%   10.00MB/s    0:00:02 (xfr#10, to-chk=0/10)")
+            return 0
+
+        exec_mock.side_effect = run_rsync
+        callback = Mock()
+
+        task = InstallFromImageTask(sysroot="/mnt/sysroot", mount_point="/mnt/image")
+        progress = PublishedProgress(installation_size=1000000, callback=callback)
+        task._install_image(progress)
+
+        args = exec_mock.call_args[0][1]
+        assert "--info=progress2" in args
+        assert args[-2:] == ["/mnt/image/", "/mnt/sysroot"]
+
+        assert progress.processed_files == 10
+        assert progress.processed_size == 1000000
+        assert callback.call_args_list[-1][0][0] == "Installing software 100%"
+
+
+class InstallFromTarTaskTestCase(unittest.TestCase):
+    """Test the installation from a tarball."""
+
+    def test_tar_progress(self):
+        """Don't publish a number of files for tar."""
+        progress = Mock()
+        task = InstallFromTarTask(sysroot="/mnt/sysroot", tarfile=None)
+        task._run_tar(["cat"], [b"a" * 10, b"b" * 20], progress)
+
+        assert progress.publish.call_args_list == [
+            ((None, 10),),
+            ((None, 30),),
+        ]
+
+
+class InstallLiveTarTaskTestCase(unittest.TestCase):
+    """Test the installation of a live tarball."""
+
+    def _is_streamed(self, url, checksum=""):
+        configuration = LiveImageConfigurationData()
+        configuration.url = url
+        configuration.checksum = checksum
+
+        task = InstallLiveTarTask("/mnt/sysroot", configuration)
+        return task._is_streamed()
+
+    @patch("pyanaconda.modules.payloads.source.live_tar.installation.conf")
+    def test_streamed_tarball(self, conf_mock):
+        """Stream only remote tarballs without a checksum."""
+        conf_mock.payload.streamed_tarball_installation = False
+        assert not self._is_streamed("http://my/image.tar")
+
+        conf_mock.payload.streamed_tarball_installation = True
+        assert self._is_streamed("http://my/image.tar")
+        assert not self._is_streamed("file:///my/image.tar")
+
+        # The checksum has to be verified before the extraction.
+        assert not self._is_streamed("http://my/image.tar", checksum="abc")
@@ -0,0 +1,165 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+from pyanaconda.anaconda_logging import AnacondaLogWriter, AnacondaQueueHandler, \
+    AnacondaBatchFileHandler
+
+
+class QueuedLoggingTestCase(unittest.TestCase):
+    """Test the queued logging."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp_dir.name, "test.log")
+        self._writer = AnacondaLogWriter()
+        self._writer.start()
+
+        self._file_handler = AnacondaBatchFileHandler(self._path)
+        self._file_handler.setFormatter(logging.Formatter("%(threadName)s %(message)s"))
+
+        self._queue_handler = AnacondaQueueHandler(self._writer)
+        self._queue_handler.target_handlers.append(self._file_handler)
+
+        self._logger = logging.getLogger("anaconda.test_queued_logging")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.DEBUG)
+        self._logger.addHandler(self._queue_handler)
+
+    def tearDown(self):
+        self._writer.stop()
+        self._logger.removeHandler(self._queue_handler)
+        self._file_handler.close()
+        self._tmp_dir.cleanup()
+
+    def _read_log(self):
+        with open(self._path) as f:
+            return f.read().splitlines()
+
+    def test_flush(self):
+        """Write the queued records on flush."""
+        for i in range(1000):
+            self._logger.debug("Message %d: %s", i, {"key": i})
+
+        self._writer.flush()
+        lines = self._read_log()
+
+        assert len(lines) == 1000
+        assert lines[0] == "MainThread Message 0: {'key': 0}"
+        assert lines[-1] == "MainThread Message 999: {'key': 999}"
+
+    def test_stop(self):
+        """Write the queued records on stop."""
+        self._logger.info("The last message.")
+        self._writer.stop()
+
+        assert self._read_log() == ["MainThread The last message."]
+
+        # The logging doesn't fail after the writer is stopped.
+        self._writer.flush()
+        self._writer.stop()
+
+    def test_levels(self):
+        """Respect the levels of the target handlers."""
+        self._file_handler.setLevel(logging.INFO)
+        self._logger.debug("Debug message.")
+        self._logger.info("Info message.")
+        self._writer.flush()
+
+        assert self._read_log() == ["MainThread Info message."]
+
+    def test_exception(self):
+        """Write the traceback of an exception."""
+        try:
+            raise ValueError("Fake error!")
+        except ValueError:
+            self._logger.exception("Failed.")
+
+        self._writer.flush()
+        lines = self._read_log()
+
+        assert lines[0] == "MainThread Failed."
+        assert lines[-1] == "ValueError: Fake error!"
+
+    def test_format_in_writer(self):
+        """Format the records in the thread of the log writer."""
+        threads = []
+
+        class Formatter(logging.Formatter):
+            def format(self, record):
+                threads.append(threading.current_thread().name)
+                return super().format(record)
+
+        self._file_handler.setFormatter(Formatter("%(message)s"))
+        self._logger.debug("Message %d: %s", 1, "text")
+        self._writer.flush()
+
+        assert self._read_log() == ["Message 1: text"]
+        assert threads == ["AnaLogWriterThread"]
+
+    def test_prepare(self):
+        """Don't merge immutable arguments in the calling thread."""
+        record = self._logger.makeRecord(
+            self._logger.name, logging.DEBUG, __file__, 0, "%s %d", ("a", 1), None
+        )
+        prepared = self._queue_handler.prepare(record)
+
+        assert prepared is not record
+        assert prepared.msg == "%s %d"
+        assert prepared.args == ("a", 1)
+
+    def test_mutable_arguments(self):
+        """Log the arguments as they were when the message was logged."""
+        data = {"key": 1}
+        self._logger.debug("Data: %s", data)
+        self._logger.debug("Data: %(key)s", data)
+        data["key"] = 2
+
+        self._writer.flush()
+        assert self._read_log() == ["MainThread Data: {'key': 1}", "MainThread Data: 1"]
+
+    def test_threads(self):
+        """Log from multiple threads."""
+        def log_messages(name):
+            for i in range(100):
+                self._logger.debug("%s %d", name, i)
+
+        threads = [
+            threading.Thread(target=log_messages, args=("thread{}".format(i),))
+            for i in range(4)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self._writer.flush()
+        lines = self._read_log()
+
+        assert len(lines) == 400
+
+        for i in range(4):
+            name = "thread{}".format(i)
+            messages = [line[line.index(name):] for line in lines if name + " " in line]
+            assert messages == ["{} {}".format(name, j) for j in range(100)]
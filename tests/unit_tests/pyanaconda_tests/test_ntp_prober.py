@@ -0,0 +1,209 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import threading
+import time
+import unittest
+from unittest.mock import patch, Mock
+
+from pyanaconda.core.constants import NTP_SERVER_OK, NTP_SERVER_NOK, NTP_SERVER_QUERY
+from pyanaconda.modules.common.structures.timezone import TimeSourceData
+from pyanaconda.ntp import NTPServerProber, NTPServerStatusCache
+
+
+def _get_server(hostname, options=()):
+    server = TimeSourceData()
+    server.hostname = hostname
+    server.options = list(options)
+    return server
+
+
+class NTPServerProberTestCase(unittest.TestCase):
+    """Test the prober of NTP servers."""
+
+    def setUp(self):
+        self._results = []
+        self._done = threading.Semaphore(0)
+
+    def _callback(self, hostname, nts_enabled, status):
+        self._results.append((hostname, nts_enabled, status))
+        self._done.release()
+
+    def _wait(self, count):
+        for _i in range(count):
+            assert self._done.acquire(timeout=5)
+
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe(self, working_mock):
+        """Check NTP servers."""
+        working_mock.side_effect = lambda hostname, nts: hostname == "good"
+        prober = NTPServerProber()
+
+        prober.probe("good", False, self._callback)
+        prober.probe("bad", True, self._callback)
+        self._wait(2)
+
+        assert sorted(self._results) == [
+            ("bad", True, NTP_SERVER_NOK),
+            ("good", False, NTP_SERVER_OK),
+        ]
+
+        assert prober.get_statuses([
+            _get_server("good"), _get_server("bad", ["nts"]), _get_server("new")
+        ]) == {
+            "good": NTP_SERVER_OK,
+            "bad": NTP_SERVER_NOK,
+            "new": NTP_SERVER_QUERY,
+        }
+
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_error(self, working_mock):
+        """Handle a failed check of an NTP server."""
+        working_mock.side_effect = OSError("Fake error!")
+        prober = NTPServerProber()
+
+        prober.probe("server", False, self._callback)
+        self._wait(1)
+
+        assert self._results == [("server", False, NTP_SERVER_NOK)]
+
+    @patch("pyanaconda.ntp.threadMgr")
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_unexpected_error(self, working_mock, thread_mgr):
+        """Report an unexpected failure of a check."""
+        working_mock.side_effect = ValueError("Fake error!")
+        prober = NTPServerProber()
+
+        with self.assertLogs(level="ERROR"):
+            prober.probe("server", False, self._callback)
+            self._wait(1)
+
+        assert self._results == [("server", False, NTP_SERVER_NOK)]
+        thread_mgr.set_error.assert_called_once()
+        assert thread_mgr.set_error.call_args.args[1] is ValueError
+
+        # The failed result is not cached.
+        assert prober.get_statuses([_get_server("server")]) == {"server": NTP_SERVER_QUERY}
+
+        working_mock.side_effect = None
+        working_mock.return_value = True
+
+        prober.probe("server", False, self._callback)
+        self._wait(1)
+        assert self._results[-1] == ("server", False, NTP_SERVER_OK)
+
+    @patch("pyanaconda.ntp.threadMgr")
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_callback_error(self, working_mock, thread_mgr):
+        """Report a failed callback."""
+        event = threading.Event()
+        working_mock.side_effect = lambda hostname, nts: event.wait(5)
+        prober = NTPServerProber()
+
+        def callback(*args):
+            raise ValueError("Fake error!")
+
+        with self.assertLogs(level="ERROR"):
+            prober.probe("server", False, callback)
+            prober.probe("server", False, self._callback)
+            event.set()
+            self._wait(1)
+
+        # The other callbacks are still called.
+        assert self._results == [("server", False, NTP_SERVER_OK)]
+        thread_mgr.set_error.assert_called_once()
+        assert thread_mgr.set_error.call_args.args[1] is ValueError
+
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_in_flight(self, working_mock):
+        """Don't check the same NTP server at the same time."""
+        event = threading.Event()
+        working_mock.side_effect = lambda hostname, nts: event.wait(5)
+        prober = NTPServerProber()
+
+        for _i in range(3):
+            prober.probe("server", False, self._callback)
+
+        event.set()
+        self._wait(3)
+
+        working_mock.assert_called_once_with("server", False)
+        assert self._results == [("server", False, NTP_SERVER_OK)] * 3
+
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_cache(self, working_mock):
+        """Cache the results of NTP server checks."""
+        working_mock.return_value = True
+        prober = NTPServerProber(ttl=0.2)
+
+        prober.probe("server", False, self._callback)
+        self._wait(1)
+
+        # Use the cached result.
+        prober.probe("server", False, self._callback)
+        self._wait(1)
+        working_mock.assert_called_once_with("server", False)
+
+        # The result has expired.
+        time.sleep(0.3)
+        prober.probe("server", False, self._callback)
+        self._wait(1)
+        assert working_mock.call_count == 2
+
+    @patch("pyanaconda.ntp.ntp_server_working")
+    def test_probe_workers(self, working_mock):
+        """Limit the number of running checks."""
+        lock = threading.Lock()
+        running = []
+        maximum = []
+
+        def check(hostname, nts):
+            with lock:
+                running.append(hostname)
+                maximum.append(len(running))
+
+            time.sleep(0.1)
+
+            with lock:
+                running.remove(hostname)
+
+            return True
+
+        working_mock.side_effect = check
+        prober = NTPServerProber(max_workers=2)
+
+        for i in range(6):
+            prober.probe("server{}".format(i), False, self._callback)
+
+        self._wait(6)
+        assert max(maximum) == 2
+
+    @patch("pyanaconda.ntp.NTPServerStatusCache._report_status_changed", Mock())
+    def test_status_cache(self):
+        """Check the statuses of NTP servers in a batch."""
+        prober = Mock()
+        prober.get_statuses.return_value = {"a": NTP_SERVER_OK, "b": NTP_SERVER_QUERY}
+        cache = NTPServerStatusCache(prober)
+
+        cache.check_statuses([_get_server("a"), _get_server("b", ["nts"])])
+        prober.probe.assert_called_once_with("b", True, cache._on_status_checked)
+
+        assert cache.get_status(_get_server("a")) == NTP_SERVER_OK
+        assert cache.get_status(_get_server("b")) == NTP_SERVER_QUERY
+
+        cache._on_status_checked("b", True, NTP_SERVER_NOK)
+        assert cache.get_status(_get_server("b")) == NTP_SERVER_NOK
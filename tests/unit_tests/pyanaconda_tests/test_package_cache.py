@@ -0,0 +1,186 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch, call
+
+import hawkey
+
+from pyanaconda.modules.payloads.payload.dnf.dnf_manager import DNFManager
+from pyanaconda.modules.payloads.payload.dnf.package_cache import PackageCache
+
+
+class FakePackage(object):
+    """A fake DNF package."""
+
+    def __init__(self, download_dir, name, content=b"", size=0):
+        self.name = name
+        self.chksum = (hawkey.CHKSUM_SHA256, hashlib.sha256(name.encode()).digest())
+        self._path = os.path.join(download_dir, name + ".rpm")
+
+        with open(self._path, "wb") as f:
+            f.write(content or os.urandom(size))
+
+    def localPkg(self):
+        return self._path
+
+    def __repr__(self):
+        return self.name
+
+
+class PackageCacheTestCase(unittest.TestCase):
+    """Test the persistent cache of downloaded packages."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self._tmp.name, "cache")
+        self.download_dir = os.path.join(self._tmp.name, "download")
+        os.makedirs(self.download_dir)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _get_cached_files(self):
+        cached = []
+
+        for root, _dirs, files in os.walk(self.cache_dir):
+            cached.extend(os.path.join(root, name) for name in files)
+
+        return sorted(cached)
+
+    def test_file_path(self):
+        """Get a path to the cached file."""
+        cache = PackageCache(self.cache_dir, 1024)
+        package = FakePackage(self.download_dir, "a", b"a")
+        digest = package.chksum[1].hex()
+
+        assert cache.get_file_path(package) == os.path.join(
+            self.cache_dir,
+            hawkey.chksum_name(hawkey.CHKSUM_SHA256),
+            digest[:2],
+            digest + ".rpm"
+        )
+
+        package.chksum = None
+        assert cache.get_file_path(package) is None
+
+    def test_store(self):
+        """Store packages in the cache."""
+        cache = PackageCache(self.cache_dir, 1024)
+        packages = [
+            FakePackage(self.download_dir, "a", b"a"),
+            FakePackage(self.download_dir, "b", b"b"),
+        ]
+
+        cache.store_packages(packages)
+
+        paths = [cache.get_file_path(p) for p in packages]
+        assert self._get_cached_files() == sorted(paths)
+
+        with open(paths[0], "rb") as f:
+            assert f.read() == b"a"
+
+    def test_store_missing(self):
+        """Don't store packages that were not downloaded."""
+        cache = PackageCache(self.cache_dir, 1024)
+        package = FakePackage(self.download_dir, "a", b"a")
+        os.unlink(package.localPkg())
+
+        cache.store_packages([package])
+        assert self._get_cached_files() == []
+
+    def test_store_no_eviction(self):
+        """Don't evict the cache when packages are stored."""
+        cache = PackageCache(self.cache_dir, 10)
+        packages = [FakePackage(self.download_dir, str(i), size=8) for i in range(3)]
+
+        with patch.object(cache, "evict") as evict:
+            cache.store_packages(packages)
+
+        evict.assert_not_called()
+        assert len(self._get_cached_files()) == 3
+
+    def test_restore(self):
+        """Restore packages from the cache."""
+        cache = PackageCache(self.cache_dir, 1024)
+        cached = FakePackage(self.download_dir, "a", b"a")
+        missing = FakePackage(self.download_dir, "b", b"b")
+        cache.store_packages([cached])
+
+        os.unlink(cached.localPkg())
+        os.unlink(missing.localPkg())
+        os.utime(cache.get_file_path(cached), (0, 0))
+
+        assert cache.restore_packages([cached, missing]) == [cached]
+        assert not os.path.exists(missing.localPkg())
+
+        with open(cached.localPkg(), "rb") as f:
+            assert f.read() == b"a"
+
+        # The restored package is marked as recently used.
+        assert os.stat(cache.get_file_path(cached)).st_mtime > 0
+
+    def test_evict(self):
+        """Remove the least recently used packages."""
+        cache = PackageCache(self.cache_dir, 20)
+        packages = [FakePackage(self.download_dir, str(i), size=8) for i in range(4)]
+        cache.store_packages(packages)
+
+        for i, package in enumerate(packages):
+            os.utime(cache.get_file_path(package), (i, i))
+
+        cache.evict()
+        assert self._get_cached_files() == sorted(
+            cache.get_file_path(p) for p in packages[2:]
+        )
+
+    def test_evict_under_limit(self):
+        """Keep the packages under the size limit."""
+        cache = PackageCache(self.cache_dir, 32)
+        packages = [FakePackage(self.download_dir, str(i), size=8) for i in range(4)]
+        cache.store_packages(packages)
+
+        cache.evict()
+        assert len(self._get_cached_files()) == 4
+
+
+class DownloadWithPackageCacheTestCase(unittest.TestCase):
+    """Test the download of packages with the package cache."""
+
+    @patch.object(DNFManager, "_get_package_cache")
+    def test_run_download(self, get_cache):
+        """Evict the cache once after all batches are downloaded."""
+        cache = Mock()
+        get_cache.return_value = cache
+        base = Mock()
+        queue = Mock()
+        batches = [["a"], ["b", "c"]]
+
+        DNFManager._run_download(base, batches, queue)
+
+        assert cache.mock_calls == [
+            call.restore_packages(["a"]),
+            call.store_packages(["a"]),
+            call.restore_packages(["b", "c"]),
+            call.store_packages(["b", "c"]),
+            call.evict(),
+        ]
+        assert base.download_packages.call_count == 2
+        assert queue.put.call_args_list[-1] == call(('quit', "DNF done"))
@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from unittest.mock import patch, call
+
+import pytest
+
+from pyanaconda.core.service import enable_services, disable_services
+
+
+@patch("pyanaconda.core.service.execWithCapture")
+@patch("pyanaconda.core.service.execWithRedirect")
+class ServicesTestCase(unittest.TestCase):
+    """Test the configuration of systemd services."""
+
+    def test_enable_services(self, exec_mock, capture_mock):
+        """Enable services in one run."""
+        exec_mock.return_value = 0
+        capture_mock.return_value = "enabled\nstatic\n"
+
+        enable_services([], root="/mnt/sysroot")
+        exec_mock.assert_not_called()
+
+        enable_services(["a.service", "b.service"], root="/mnt/sysroot")
+        exec_mock.assert_called_once_with(
+            "systemctl", ["enable", "a.service", "b.service", "--root", "/mnt/sysroot"]
+        )
+        capture_mock.assert_called_once_with(
+            "systemctl", ["is-enabled", "a.service", "b.service", "--root", "/mnt/sysroot"],
+            filter_stderr=True
+        )
+
+    def test_enable_services_verification(self, exec_mock, capture_mock):
+        """Verify the enabled services."""
+        exec_mock.return_value = 0
+        capture_mock.return_value = "enabled\ndisabled\n"
+
+        with pytest.raises(ValueError):
+            enable_services(["a.service", "b.service"])
+
+    def test_enable_services_failure(self, exec_mock, capture_mock):
+        """Enable services one by one if the run fails."""
+        exec_mock.side_effect = [1, 0, 1]
+
+        with pytest.raises(ValueError):
+            enable_services(["a.service", "b.service"])
+
+        assert exec_mock.call_args_list == [
+            call("systemctl", ["enable", "a.service", "b.service"]),
+            call("systemctl", ["enable", "a.service"]),
+            call("systemctl", ["enable", "b.service"]),
+        ]
+        capture_mock.assert_not_called()
+
+    def test_disable_services(self, exec_mock, capture_mock):
+        """Disable services."""
+        exec_mock.return_value = 0
+        disable_services(["a.service", "b.service"])
+        exec_mock.assert_called_once_with(
+            "systemctl", ["disable", "a.service", "b.service"]
+        )
+
+        # Disable the existing services if some of them don't exist.
+        exec_mock.reset_mock()
+        exec_mock.side_effect = [1, 0, 1]
+        disable_services(["a.service", "b.service"])
+
+        assert exec_mock.call_args_list == [
+            call("systemctl", ["disable", "a.service", "b.service"]),
+            call("systemctl", ["disable", "a.service"]),
+            call("systemctl", ["disable", "b.service"]),
+        ]
@@ -0,0 +1,147 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dasbus.constants import DBUS_START_REPLY_SUCCESS
+
+from pyanaconda.core.signal import Signal
+from pyanaconda.modules.boss.module_manager.start_modules import StartModulesTask
+from pyanaconda.modules.common.errors.module import UnavailableModuleError
+
+
+class FakeModuleObserver(object):
+    """Fake observer of a DBus module."""
+
+    def __init__(self, message_bus, service_name):
+        self.service_name = service_name
+        self.service_available = Signal()
+        self.proxy = Mock()
+
+    def connect_once_available(self):
+        """The service is available immediately."""
+        self.service_available.emit(self)
+
+    def __repr__(self):
+        return self.service_name
+
+
+class StartModulesTaskTestCase(unittest.TestCase):
+    """Test the task for starting DBus modules."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.message_bus = Mock()
+        self.dbus = self.message_bus.proxy
+        self.dbus.ListActivatableNames.return_value = [
+            "org.fedoraproject.Anaconda.Modules.Storage",
+            "org.fedoraproject.Anaconda.Modules.Payloads",
+            "org.fedoraproject.Anaconda.Addons.Kdump",
+            "org.fedoraproject.Anaconda.Addons.Forbidden",
+            "org.freedesktop.systemd1",
+        ]
+        self.failing = set()
+        self.dbus.StartServiceByName.side_effect = self._start_service_by_name
+
+    def _start_service_by_name(self, service_name, flags, callback, callback_args):
+        """Start the service and call the callback."""
+        def call():
+            if service_name in self.failing:
+                raise ValueError("Fake error!")
+
+            return DBUS_START_REPLY_SUCCESS
+
+        callback(call, *callback_args)
+
+    def _run_task(self, timestamps):
+        """Run the task with the given timestamps."""
+        task = StartModulesTask(
+            message_bus=self.message_bus,
+            activatable=[
+                "org.fedoraproject.Anaconda.Modules.*",
+                "org.fedoraproject.Anaconda.Addons.*",
+            ],
+            forbidden=[
+                "org.fedoraproject.Anaconda.Addons.Forbidden",
+            ],
+            optional=[
+                "org.fedoraproject.Anaconda.Addons.*",
+            ],
+        )
+
+        with patch("pyanaconda.modules.boss.module_manager.start_modules.ModuleObserver",
+                   FakeModuleObserver):
+            with patch("pyanaconda.modules.boss.module_manager.start_modules.time") as time:
+                time.monotonic.side_effect = timestamps
+                observers = task.run()
+
+        return task, observers
+
+    def _get_started_modules(self):
+        """Get names of the started modules in the order of the start."""
+        return [c.args[0] for c in self.dbus.StartServiceByName.call_args_list]
+
+    def test_start_modules(self):
+        """Test the start of the modules."""
+        task, observers = self._run_task([0, 1, 2, 5, 9, 10])
+
+        assert self._get_started_modules() == [
+            "org.fedoraproject.Anaconda.Modules.Storage",
+            "org.fedoraproject.Anaconda.Modules.Payloads",
+            "org.fedoraproject.Anaconda.Addons.Kdump",
+        ]
+        assert [o.service_name for o in observers] == self._get_started_modules()
+
+        for observer in observers:
+            observer.proxy.Ping.assert_called_once_with()
+
+        assert task.module_timings == {
+            "org.fedoraproject.Anaconda.Modules.Storage": 5,
+            "org.fedoraproject.Anaconda.Modules.Payloads": 8,
+            "org.fedoraproject.Anaconda.Addons.Kdump": 8,
+        }
+
+    def test_start_optional_module_failure(self):
+        """Test a failure of an optional module."""
+        self.failing = {"org.fedoraproject.Anaconda.Addons.Kdump"}
+        task, observers = self._run_task([0, 1, 2, 3, 4])
+
+        assert self._get_started_modules() == [
+            "org.fedoraproject.Anaconda.Modules.Storage",
+            "org.fedoraproject.Anaconda.Modules.Payloads",
+            "org.fedoraproject.Anaconda.Addons.Kdump",
+        ]
+        assert [o.service_name for o in observers] == [
+            "org.fedoraproject.Anaconda.Modules.Storage",
+            "org.fedoraproject.Anaconda.Modules.Payloads",
+        ]
+        assert task.module_timings == {
+            "org.fedoraproject.Anaconda.Modules.Storage": 3,
+            "org.fedoraproject.Anaconda.Modules.Payloads": 3,
+        }
+
+    def test_start_required_module_failure(self):
+        """Test a failure of a required module."""
+        self.failing = {"org.fedoraproject.Anaconda.Modules.Payloads"}
+
+        with pytest.raises(UnavailableModuleError) as cm:
+            self._run_task([0, 1, 2, 3])
+
+        assert "org.fedoraproject.Anaconda.Modules.Payloads has failed" in str(cm.value)
@@ -0,0 +1,157 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import unittest
+from unittest.mock import patch, Mock
+
+import pytest
+
+from pyanaconda.core.signal import Signal
+from pyanaconda.modules.common.task import sync_run_task, TASK_POLLING_INTERVAL
+
+
+class FakeContext(object):
+    """A fake private main context with a fake clock.
+
+    Every iteration dispatches the next scheduled event. If there
+    are no events, the time passes until the iteration times out.
+    """
+
+    def __init__(self):
+        self.now = 0
+        self.events = []
+        self.push_thread_default = Mock()
+        self.pop_thread_default = Mock()
+
+    def monotonic(self):
+        return self.now
+
+    def iterate(self, context, timeout):
+        assert context is self
+
+        if self.events:
+            self.events.pop(0)()
+        else:
+            self.now += timeout
+
+
+class FakeTaskProxy(object):
+    """A fake proxy of a remote task."""
+
+    def __init__(self, context):
+        self.Name = "Fake task"
+        self.Stopped = Signal()
+        self.ProgressChanged = Signal()
+        self.IsRunning = False
+        self.Cancel = Mock(side_effect=self.stop)
+        self.Finish = Mock()
+        self._context = context
+
+    def Start(self):
+        self.IsRunning = True
+
+    def schedule_progress(self, *messages):
+        for step, message in enumerate(messages):
+            self._context.events.append(
+                lambda s=step, m=message: self.ProgressChanged.emit(s, m)
+            )
+
+    def schedule_stop(self, emit_stopped=True):
+        self._context.events.append(lambda: self.stop(emit_stopped))
+
+    def stop(self, emit_stopped=True):
+        self.IsRunning = False
+
+        if emit_stopped:
+            self.Stopped.emit()
+
+
+class SyncRunTaskTestCase(unittest.TestCase):
+    """Test the sync_run_task function."""
+
+    def setUp(self):
+        self.context = FakeContext()
+        self.task_proxy = FakeTaskProxy(self.context)
+
+        for name, target in [
+            ("create_new_context", Mock(return_value=self.context)),
+            ("iterate_context", self.context.iterate),
+            ("time", Mock(monotonic=self.context.monotonic)),
+        ]:
+            patcher = patch("pyanaconda.modules.common.task." + name, target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_stopped_signal(self):
+        """Finish the task on the Stopped signal."""
+        self.task_proxy.schedule_stop()
+        sync_run_task(self.task_proxy)
+
+        # The task finished without waiting for the next check.
+        assert self.context.now == 0
+        self.task_proxy.Finish.assert_called_once_with()
+        self.task_proxy.Cancel.assert_not_called()
+
+    def test_private_context(self):
+        """Receive the signals in a private main context."""
+        self.task_proxy.schedule_stop()
+        sync_run_task(self.task_proxy)
+
+        self.context.push_thread_default.assert_called_once_with()
+        self.context.pop_thread_default.assert_called_once_with()
+
+    def test_missing_stopped_signal(self):
+        """Finish the task without the Stopped signal."""
+        self.task_proxy.schedule_stop(emit_stopped=False)
+        sync_run_task(self.task_proxy)
+
+        # The task finished at the next check.
+        assert self.context.now == TASK_POLLING_INTERVAL
+        self.task_proxy.Finish.assert_called_once_with()
+
+    def test_progress_callback(self):
+        """Report the progress of the task."""
+        callback = Mock()
+        self.task_proxy.schedule_progress("Step 1", "Step 2")
+        self.task_proxy.schedule_stop()
+        sync_run_task(self.task_proxy, callback=callback)
+
+        assert callback.call_count == 2
+        callback.assert_called_with(self.task_proxy)
+
+    def test_timeout(self):
+        """Cancel the task that has timed out."""
+        with pytest.raises(TimeoutError):
+            sync_run_task(self.task_proxy, timeout=5)
+
+        assert self.context.now == 5
+        self.task_proxy.Cancel.assert_called_once_with()
+        self.task_proxy.Finish.assert_not_called()
+        assert not self.task_proxy.IsRunning
+
+    def test_cancel_on_error(self):
+        """Cancel the task if the callback fails."""
+        callback = Mock(side_effect=KeyboardInterrupt())
+        self.task_proxy.schedule_progress("Step 1")
+
+        with pytest.raises(KeyboardInterrupt):
+            sync_run_task(self.task_proxy, callback=callback)
+
+        self.task_proxy.Cancel.assert_called_once_with()
+        self.task_proxy.Finish.assert_not_called()
+        assert not self.task_proxy.IsRunning
+        self.context.pop_thread_default.assert_called_once_with()
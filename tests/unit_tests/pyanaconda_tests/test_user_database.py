@@ -0,0 +1,174 @@
+#
+# Copyright (C) 2021  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from pyanaconda.core.user_database import UserDatabase
+from pyanaconda.core.users import crypt_passwords
+
+
+class UserDatabaseTestCase(unittest.TestCase):
+    """Test the user database."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._root = self._tmp_dir.name
+        os.makedirs(self._root + "/etc/skel")
+        os.makedirs(self._root + "/home")
+
+        self._write("/etc/passwd", "root:x:0:0:root:/root:/bin/bash\n"
+                                   "old:x:1000:1000::/home/old:/bin/bash\n")
+        self._write("/etc/shadow", "root:!::0:99999:7:::\n"
+                                   "old:!::0:99999:7:::\n")
+        self._write("/etc/group", "root:x:0:\n"
+                                  "wheel:x:10:\n"
+                                  "old:x:1000:\n")
+        self._write("/etc/gshadow", "root:::\n"
+                                    "wheel:::\n"
+                                    "old:!::\n")
+        self._write("/etc/subuid", "old:100000:65536\n")
+        self._write("/etc/skel/.bashrc", "# bashrc\n")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, path, content):
+        with open(self._root + path, "w") as f:
+            f.write(content)
+
+    def _read(self, path):
+        with open(self._root + path) as f:
+            return f.read().splitlines()
+
+    def _get_database(self):
+        database = UserDatabase(self._root)
+        database.load()
+        return database
+
+    @patch("pyanaconda.core.user_database.util.execWithRedirect")
+    def test_create_groups(self, exec_mock):
+        """Create groups."""
+        database = self._get_database()
+        database.create_group("first")
+        database.create_group("second", gid=5000)
+        database.create_group("third")
+
+        with pytest.raises(ValueError):
+            database.create_group("wheel")
+
+        with pytest.raises(ValueError):
+            database.create_group("fourth", gid=10)
+
+        database.write()
+
+        assert self._read("/etc/group")[3:] == [
+            "first:x:1001:",
+            "second:x:5000:",
+            "third:x:5001:",
+        ]
+        assert self._read("/etc/gshadow")[3:] == [
+            "first:!::",
+            "second:!::",
+            "third:!::",
+        ]
+        assert self._read("/etc/group-")[-1] == "old:x:1000:"
+
+        exec_mock.assert_called_once_with("restorecon", [
+            "-r", self._root + "/etc/group", self._root + "/etc/gshadow"
+        ])
+
+    @patch("pyanaconda.core.user_database.util.execWithRedirect")
+    def test_create_users(self, exec_mock):
+        """Create users."""
+        database = self._get_database()
+        database.create_user("first", password="$6$crypted", is_crypted=True,
+                             groups=["wheel", "lab(3000)"], gecos="First User")
+        database.create_user("second", password="", lock=True, uid=2000, gid=10,
+                             shell="/bin/zsh")
+        database.create_user("third")
+
+        with pytest.raises(ValueError):
+            database.create_user("old")
+
+        with pytest.raises(ValueError):
+            database.create_user("fourth", uid=2000)
+
+        database.write()
+
+        assert self._read("/etc/passwd")[2:] == [
+            "first:x:1001:1001:First User:/home/first:/bin/bash",
+            "second:x:2000:10::/home/second:/bin/zsh",
+            "third:x:2001:2001::/home/third:/bin/bash",
+        ]
+        assert self._read("/etc/shadow")[2:] == [
+            "first:$6$crypted::0:99999:7:::",
+            "second:!::0:99999:7:::",
+            "third:!::0:99999:7:::",
+        ]
+        assert self._read("/etc/group")[1:] == [
+            "wheel:x:10:first",
+            "old:x:1000:",
+            "lab:x:3000:first",
+            "first:x:1001:",
+            "third:x:2001:",
+        ]
+        assert self._read("/etc/subuid") == [
+            "old:100000:65536",
+            "first:165536:65536",
+            "second:231072:65536",
+            "third:296608:65536",
+        ]
+
+        assert os.path.exists(self._root + "/home/first/.bashrc")
+        assert os.stat(self._root + "/home/first").st_mode & 0o777 == 0o700
+
+        exec_mock.assert_called_once()
+        assert exec_mock.call_args[0][1][1:4] == [
+            self._root + "/home/first",
+            self._root + "/home/second",
+            self._root + "/home/third",
+        ]
+
+    @patch("pyanaconda.core.user_database.util.execWithRedirect")
+    def test_add_ssh_keys(self, exec_mock):
+        """Add SSH keys."""
+        os.makedirs(self._root + "/home/old")
+        database = self._get_database()
+        database.add_ssh_key("old", "key1")
+        database.add_ssh_key("old", "key2")
+
+        with pytest.raises(ValueError):
+            database.add_ssh_key("nobody", "key")
+
+        database.write()
+
+        assert self._read("/home/old/.ssh/authorized_keys") == ["key1", "key2"]
+        exec_mock.assert_called_once_with("restorecon", ["-r", self._root + "/home/old/.ssh"])
+
+    def test_crypt_passwords(self):
+        """Crypt several passwords at the same time."""
+        assert crypt_passwords([]) == []
+
+        passwords = crypt_passwords(["first", "second", "third"], max_workers=2)
+        assert len(passwords) == 3
+        assert len(set(passwords)) == 3
+        assert all(p.startswith("$") for p in passwords)